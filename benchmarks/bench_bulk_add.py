@@ -0,0 +1,60 @@
+"""1,000 sequential ``add_mapping`` calls, preview included.
+
+    python benchmarks/bench_bulk_add.py
+
+Needs PyQt6; runs headless through Qt's offscreen platform plugin.  The
+info hotkey is set, so the header (whose tooltip lists every mapping)
+grows with the keymap, as in a real profile.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+import main as gui_en
+import main_zhcn as gui_zh
+from pyahk.engine import render_script
+from pyahk.widgets import seq_item
+
+ADDS = 1_000
+STEPS = ("Ctrl+C", "0.1 s", '"hello"', "Enter")
+
+
+def add_many(module, dedup):
+    win = module.KeyMapper()
+    win.toggle.setText("F12")
+    win.info.setText("F11")
+    win.dedup.setCurrentIndex(1 if dedup else 0)
+    QApplication.processEvents()
+    win.script.wait()
+    t0 = time.perf_counter()
+    for i in range(ADDS):
+        win.trigger.setText(f"SC{i + 1:03X}")
+        for token in STEPS:
+            win.seq.addItem(seq_item(token))
+        win.add_mapping()
+    QApplication.processEvents()        # let any deferred refresh run
+    win.script.wait()                   # …and its background generation
+    elapsed = time.perf_counter() - t0
+    assert win.preview.toPlainText() == render_script(win._profile())
+    return elapsed
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name, module in (("main", gui_en), ("main_zhcn", gui_zh)):
+        for dedup in (False, True):
+            elapsed = add_many(module, dedup)
+            mode = "shared bodies" if dedup else "blocks"
+            print(f"{name:10s} {mode:13s} {ADDS:,} adds {elapsed:8.2f} s "
+                  f"({elapsed / ADDS * 1000:6.2f} ms/add)")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
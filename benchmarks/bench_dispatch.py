@@ -0,0 +1,49 @@
+"""Script size of per-hotkey blocks vs. the table dispatcher, 1k/10k mappings.
+
+    python benchmarks/bench_dispatch.py
+"""
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pyahk.engine import Mapping, Profile, render_script
+
+
+def mappings(n):
+    mods = ["Ctrl", "Alt", "Shift", "Win"]
+    keys = [f"F{i}" for i in range(1, 25)] + list("ABCDEFGHIJKLMNOPQRSTUVWXYZ") \
+        + [f"SC{i:03X}" for i in range(1, 0x200)] \
+        + [f"vk{i:02X}" for i in range(1, 0xFF)]
+    prefixes = [m for r in range(len(mods) + 1)
+                for m in itertools.combinations(mods, r)]
+    triggers = ("+".join((*p, k)) for k in keys for p in prefixes)
+    steps = ["Ctrl+C", "Ctrl+V", "Enter", "Tab", "0.05 s", "0.1 s",
+             '"hello"', '"world"', "Click x2", "A", "B", "Alt+Tab"]
+    rnd = random.Random(0)
+    return [Mapping(t, tuple(rnd.choices(steps, k=rnd.randint(1, 8))))
+            for t in itertools.islice(triggers, n)]
+
+
+def main():
+    print(f"{'mappings':>9} {'layout':>7} {'bytes':>11} {'lines':>8} {'render ms':>10}")
+    for n in (1_000, 10_000):
+        maps = mappings(n)
+        sizes = {}
+        for layout in ("blocks", "table"):
+            profile = Profile(maps=maps, toggle="F12", layout=layout)
+            t0 = time.perf_counter()
+            text = render_script(profile)
+            elapsed = time.perf_counter() - t0
+            sizes[layout] = len(text.encode("utf-8"))
+            print(f"{n:>9,} {layout:>7} {sizes[layout]:>11,} "
+                  f"{text.count(chr(10)) + 1:>8,} {elapsed * 1000:>10.1f}")
+        print(f"{'':>9} {'table':>7} is {sizes['table'] / sizes['blocks']:.0%} "
+              f"of blocks")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Bulk conflict validation of 50k triggers through the canonical index.
+
+    python benchmarks/bench_hotkeys.py
+"""
+import itertools
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pyahk.hotkeys import HotkeyIndex, canonical_hotkey
+
+
+def triggers(n=50_000):
+    mods = ["", "Ctrl", "Alt", "Shift", "Win"]
+    keys = [f"F{i}" for i in range(1, 25)] + list("ABCDEFGHIJKLMNOPQRSTUVWXYZ") \
+        + [f"Numpad{i}" for i in range(10)] + ["Enter", "Tab", "Space", "Home"]
+    combos = [(m1, m2, k) for m1, m2 in itertools.combinations(mods, 2)
+              for k in keys]
+    rnd = random.Random(0)
+    out = []
+    for _ in range(n):
+        m1, m2, k = rnd.choice(combos)
+        sep = rnd.choice(["+", "-", " "])
+        out.append(sep.join(p for p in (m1, m2, k) if p))
+    return out
+
+
+def main():
+    raws = triggers()
+    canonical_hotkey.cache_clear()
+    t0 = time.perf_counter()
+    conflicts = HotkeyIndex().update(raws)
+    elapsed = time.perf_counter() - t0
+    print(f"validated {len(raws):,} triggers in {elapsed * 1000:.1f} ms "
+          f"({len(conflicts):,} conflicts)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Import a ~10 MB folder of generated scripts, one worker vs. all cores.
+
+    python benchmarks/bench_import.py
+
+The scripts are rendered with a spread of options (optimized or not,
+shared bodies, table layout, runtime profiles, chunked mappings), then read
+back with ``python -m pyahk import``.  Every script is checked to import
+without skipped lines.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pyahk.cli import main as cli
+from pyahk.engine import Mapping, Profile, save_script
+from pyahk.importer import import_script
+
+SCRIPTS = 40
+MAPPINGS = 2_500                        # per script, ~250 KB each
+STEPS = ("Ctrl+C", "Ctrl+V", "Enter", "Tab", "0.05 s", "0.1 s", '"hello"',
+         '"world"', "Click x2", "A", "B", "Alt+Tab")
+OPTIONS = ({}, {"optimize": False}, {"dedup": "exact"}, {"dedup": "prefix"},
+           {"layout": "table"}, {"runtime": "game"})
+
+
+def profile(i):
+    rnd = random.Random(i)
+    maps = [Mapping(f"SC{j + 1:03X}", tuple(rnd.choices(STEPS, k=rnd.randint(1, 8))),
+                    rnd.choice(("", "", "", "game")), not j % 11)
+            for j in range(MAPPINGS)]
+    return Profile(maps=maps, toggle="F12", exit="Ctrl+Q", info="F11",
+                   **OPTIONS[i % len(OPTIONS)])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "scripts"
+        src.mkdir()
+        for i in range(SCRIPTS):
+            save_script(profile(i), src / f"keymap{i:02d}.ahk")
+        size = sum(p.stat().st_size for p in src.iterdir())
+        assert not any(import_script(p)[1] for p in src.iterdir())
+        for jobs in sorted({1, os.cpu_count() or 1}):
+            t0 = time.perf_counter()
+            cli(["import", str(src), "-o", str(Path(tmp) / "out"), "-j", str(jobs)])
+            elapsed = time.perf_counter() - t0
+            print(f"{SCRIPTS} scripts, {size / 1e6:.1f} MB, -j {jobs:<3d} "
+                  f"{elapsed:6.2f} s ({size / 1e6 / elapsed:5.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
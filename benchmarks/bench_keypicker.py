@@ -0,0 +1,49 @@
+"""Key picker open latency: first (cold) open vs reuse of the cached dialog.
+
+    python benchmarks/bench_keypicker.py
+
+Needs PyQt6; runs headless through Qt's offscreen platform plugin.
+"""
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+
+import main as gui_en
+import main_zhcn as gui_zh
+
+
+def open_once(win):
+    # what _pick_into does, minus the modal event loop
+    t0 = time.perf_counter()
+    dlg = win._key_picker()
+    dlg.show()
+    QApplication.processEvents()
+    elapsed = time.perf_counter() - t0
+    dlg.hide()
+    return elapsed
+
+
+def measure(module, repeats=50):
+    win = module.KeyMapper()
+    cold = open_once(win)
+    warm = sorted(open_once(win) for _ in range(repeats))
+    return cold, warm[len(warm) // 2]
+
+
+def main():
+    app = QApplication.instance() or QApplication(sys.argv)
+    for name, module in (("main", gui_en), ("main_zhcn", gui_zh)):
+        cold, warm = measure(module)
+        print(f"{name:10s} first open {cold * 1000:7.2f} ms   "
+              f"reopen (median) {warm * 1000:7.2f} ms")
+    app.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Save and load a 100k-mapping project, JSON vs binary.
+
+    python benchmarks/bench_project.py
+
+"load → store" reads and checks the file with :func:`~pyahk.project.read_project`
+and fills a :class:`~pyahk.store.MappingStore`, as *Open project…* does; the old path
+(``Profile.load`` on a profile JSON, then a store over its list) is shown
+for comparison.  Parse caches are cleared before every load.
+"""
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pyahk.engine import Mapping, Profile
+from pyahk.project import read_project, save_project
+from pyahk.steps import parse_step
+from pyahk.store import MappingStore
+
+MAPPINGS = 100_000
+STEPS = ("Ctrl+C", "Ctrl+V", "Enter", "Tab", "0.05 s", "0.1 s", '"hello"',
+         '"world"', "Click x2", "A", "B", "Alt+Tab")
+
+
+def mappings(n):
+    rnd = random.Random(0)
+    return [Mapping(f"SC{i + 1:03X}", tuple(rnd.choices(STEPS, k=rnd.randint(1, 8))),
+                    rnd.choice(("", "", "", "game")))
+            for i in range(n)]
+
+
+def timed(fn):
+    parse_step.cache_clear()
+    t0 = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - t0) * 1000
+
+
+def main():
+    profile = Profile(maps=mappings(MAPPINGS), toggle="F12", info="F11")
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        legacy = tmp / "profile.json"
+        legacy.write_text(json.dumps(profile.to_dict()),
+                          encoding="utf-8")
+        _, ms = timed(lambda: MappingStore(Profile.load(legacy).maps))
+        print(f"{'profile JSON':14s} {legacy.stat().st_size / 1e6:6.2f} MB"
+              f"{'':>16s}   load → store {ms:7.1f} ms")
+        for name in ("keymap.pyahk", "keymap.pyahkb"):
+            path = tmp / name
+            t0 = time.perf_counter()
+            save_project(profile, path)
+            save = (time.perf_counter() - t0) * 1000
+
+            def load():
+                store = MappingStore()
+                store.extend(read_project(path)[1])
+                return store
+
+            store, ms = timed(load)
+            assert list(store) == profile.maps
+            print(f"{path.suffix:14s} {path.stat().st_size / 1e6:6.2f} MB"
+                  f"   save {save:7.1f} ms   load → store {ms:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Memory and re-render cost of a 100k-step profile.
+
+    python benchmarks/bench_steps.py
+"""
+import gc
+import json
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pyahk.engine import Profile, render_script
+from pyahk.steps import parse_stats, parse_step
+
+STEPS = 100_000
+PER_MAPPING = 20
+
+
+def profile_json():
+    rnd = random.Random(0)
+    keys = ["Ctrl+C", "Ctrl+V", "Enter", "Tab", "Alt+Tab", "Shift+Ctrl+S",
+            "A", "B", "Click", "Click x2"]
+    maps = []
+    for i in range(STEPS // PER_MAPPING):
+        steps = []
+        for _ in range(PER_MAPPING):
+            r = rnd.random()
+            if r < 0.6:
+                steps.append(rnd.choice(keys))
+            elif r < 0.8:
+                steps.append(f"{rnd.randint(1, 2000) / 1000:g} s")
+            else:
+                steps.append(f'"note {rnd.randint(0, 20_000)}"')
+        maps.append({"trigger": f"SC{i + 1:03X}", "steps": steps})
+    return json.dumps({"maps": maps, "toggle": "F12", "info": "F11"})
+
+
+def main():
+    text = profile_json()
+    gc.collect()
+    parse_step.cache_clear()
+    tracemalloc.start()
+    profile = Profile.from_dict(json.loads(text))
+    loaded, _ = tracemalloc.get_traced_memory()
+    # what a refresh touches: every step parsed, kept per mapping
+    parsed = [tuple(map(parse_step, m.steps)) for m in profile.maps]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    distinct = len({s for m in profile.maps for s in m.steps})
+    print(f"{STEPS:,} steps, {distinct:,} distinct tokens")
+    print(f"loaded profile  : {loaded / STEPS:8.1f} bytes/step")
+    print(f"+ parsed steps  : {size / STEPS:8.1f} bytes/step")
+    del parsed
+
+    # every option change re-renders every block, re-parsing each token
+    for optimize in (True, False):
+        profile.optimize = optimize
+        t0 = time.perf_counter()
+        render_script(profile)
+        label = f"render {'optimized' if optimize else 'plain'}"
+        print(f"{label:16}: {(time.perf_counter() - t0) * 1000:8.1f} ms")
+    t0 = time.perf_counter()
+    for s in (s for m in profile.maps for s in m.steps):
+        parse_step(s)
+    print(f"re-parse pass   : {(time.perf_counter() - t0) * 1000:8.1f} ms")
+    hits, misses, maxsize, cur = parse_stats()
+    print(f"memo            : {hits:,} hits / {misses:,} misses "
+          f"({cur:,}/{maxsize} entries)")
+
+
+if __name__ == "__main__":
+    main()
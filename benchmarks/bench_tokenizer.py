@@ -0,0 +1,73 @@
+"""Tokens/sec of ``to_ahk_step`` before and after the precompiled tokenizer.
+
+    python benchmarks/bench_tokenizer.py
+"""
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from pyahk.steps import MODS, parse_stats, parse_step, to_ahk_step
+
+
+def legacy_to_ahk_step(token: str) -> str:
+    # to_ahk_step as it was before the tokenizer
+    t = token.strip()
+    if m := re.fullmatch(r"(?i)click\s+x(\d+)", t):
+        return f"Click {int(m.group(1))}"
+    if t.lower().startswith("click"):
+        return t
+    if m := re.fullmatch(r"(\d+(?:\.\d+)?)\s*s", t, re.I):
+        return f"Sleep {int(float(m.group(1))*1000)}"
+    if t.startswith('"') and t.endswith('"'):
+        return f"Send {t}"
+    parts = re.split(r"[+\-\s]+", t)
+    mods = "".join(MODS.get(p.lower(), "") for p in parts[:-1])
+    raw = parts[-1]
+    key = raw.lower() if len(raw)==1 and raw.isalnum() else raw
+    if not (len(key)==1 and key.isalnum()):
+        key = f"{{{key}}}"
+    return f'Send "{mods}{key}"'
+
+
+def vocabulary(n=300):
+    keys = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789") + [
+        "Enter", "Tab", "Esc", "Space", "F5", "Numpad1", "PgUp"]
+    mods = ["", "Ctrl+", "Alt+", "Shift+", "Ctrl+Shift+", "Win+"]
+    vocab = {f"{m}{k}" for m in mods for k in keys}
+    vocab |= {f"{d/100:g} s" for d in range(1, 60)}
+    vocab |= {"Click", "Click x2", "Click x3", "Click right", '"hello"', '"ok"'}
+    return random.Random(0).sample(sorted(vocab), n)
+
+
+def rate(fn, tokens):
+    t0 = time.perf_counter()
+    for tok in tokens:
+        fn(tok)
+    return len(tokens) / (time.perf_counter() - t0)
+
+
+def main():
+    vocab = vocabulary()
+    for tok in vocab:
+        legacy = legacy_to_ahk_step(tok)
+        if tok.startswith('"'):         # text is typed with SendText since then
+            legacy = legacy.replace("Send ", "SendText ", 1)
+        assert to_ahk_step(tok) == legacy, tok
+    tokens = random.Random(1).choices(vocab, k=200_000)
+
+    parse_step.cache_clear()
+    before = rate(legacy_to_ahk_step, tokens)
+    after = rate(to_ahk_step, tokens)
+    hits, misses, maxsize, size = parse_stats()
+    print(f"legacy   : {before:12,.0f} tokens/s")
+    print(f"tokenizer: {after:12,.0f} tokens/s  ({after / before:.1f}x)")
+    print(f"memo     : {hits:,} hits / {misses:,} misses "
+          f"({size}/{maxsize} entries)")
+
+
+if __name__ == "__main__":
+    main()
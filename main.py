@@ -1,51 +1,30 @@
-import sys, re, subprocess, tempfile, time
+import sys, tempfile, time
 from pathlib import Path
-from PyQt6.QtCore import Qt, QCoreApplication
+from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLineEdit, QPushButton, QListWidget, QListWidgetItem, QTextEdit,
-    QFileDialog, QMessageBox, QGridLayout, QDialog, QCheckBox,
-    QInputDialog, QMenu, QLabel, QFrame, QSizePolicy
+    QLineEdit, QPushButton, QListWidget, QListView, QTextEdit,
+    QFileDialog, QMessageBox, QDialog, QCheckBox,
+    QInputDialog, QMenu, QLabel, QFrame, QSizePolicy, QComboBox, QSpinBox
 )
 
-# ───────── constants ─────────
-MODS = {"ctrl":"^", "alt":"!", "shift":"+", "win":"#"}
-SPECIALS = {
-    "enter","return","tab","esc","escape","space","backspace","bs",
-    "delete","del","home","end","pgup","pgdn","up","down","left","right"
-}
-CLICK_TRIGGERS = {
-    "click":"LButton","left click":"LButton","click left":"LButton",
-    "click right":"RButton","right click":"RButton"
-}
-
-# ───────── helpers ─────────
-def to_ahk_step(token: str) -> str:
-    t = token.strip()
-    if m := re.fullmatch(r"(?i)click\s+x(\d+)", t):
-        return f"Click {int(m.group(1))}"
-    if t.lower().startswith("click"):
-        return t
-    if m := re.fullmatch(r"(\d+(?:\.\d+)?)\s*s", t, re.I):
-        return f"Sleep {int(float(m.group(1))*1000)}"
-    if t.startswith('"') and t.endswith('"'):
-        return f"Send {t}"
-    parts = re.split(r"[+\-\s]+", t)
-    mods = "".join(MODS.get(p.lower(), "") for p in parts[:-1])
-    raw = parts[-1]
-    key = raw.lower() if len(raw)==1 and raw.isalnum() else raw
-    if not (len(key)==1 and key.isalnum()):
-        key = f"{{{key}}}"
-    return f'Send "{mods}{key}"'
-
-def hotkey_to_ahk(raw: str) -> str:
-    r = raw.strip().lower()
-    if r in CLICK_TRIGGERS:
-        return CLICK_TRIGGERS[r]
-    return "".join(
-        MODS.get(t.lower(), t.lower())
-        for t in re.split(r"[+\-\s]+", raw.strip())
-    )
+from pyahk.cache import CompileCache, cache_key
+from pyahk.compiler import (AHK2EXE_PATH, INSTALLER_AHK, compile_command,
+                            find_ahk2exe, find_base_binary)
+from pyahk.engine import Mapping, Profile, dedup_savings, save_script
+from pyahk.hotkeys import find_duplicates
+from pyahk.importer import import_script
+from pyahk.project import read_project, save_project
+from pyahk.steps import StepKind, intern_tokens, parse_step, repeat_token
+from pyahk.store import MappingStore
+from pyahk.widgets import (
+    LatestJob, LazyTabWidget, MappingListModel, RefreshScheduler,
+    ScriptPreview, fill_key_grid, run_with_progress, runtime_combo, seq_item,
+    seq_token, set_seq_token, toggle_seq_item,
+)
+
+PROJECT_FILTER = "Project (*.pyahk);;Binary project (*.pyahkb)"
+OPEN_FILTER = PROJECT_FILTER + ";;AHK script (*.ahk)"
 
 # ───────── small key‐picker ─────────
 class KeyPicker(QDialog):
@@ -91,35 +70,23 @@ class KeyPicker(QDialog):
                        "Numpad5","Numpad6","Numpad7","Numpad8","Numpad9",
                        "NumpadDot","NumpadAdd","NumpadSub","NumpadMult",
                        "NumpadDiv","NumpadEnter"]
-
-        grid = QGridLayout()
-        main_label = QLabel("Main")
-        main_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(main_label,0,0,1,10)
-        row,col = 1,0
-        for k in normal_keys:
-            btn=QPushButton(k); btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn,row,col)
-            col+=1
-            if col==10: col=0; row+=1
-
-        row+=1
-        label=QLabel("NumPad")
-        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(label,row,0,1,10)
-        row+=1; col=0
         DISPLAY={"NumpadAdd":"+","NumpadSub":"-","NumpadMult":"*",
                  "NumpadDiv":"/","NumpadDot":".","NumpadEnter":"Enter"}
-        for k in numpad_keys:
-            face=DISPLAY.get(k,k.replace("Numpad",""))
-            btn=QPushButton(face); btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn,row,col)
-            col+=1
-            if col==10: col=0; row+=1
 
-        lay.addLayout(grid)
+        # buttons are only created when a tab is first shown
+        tabs = LazyTabWidget()
+        tabs.addLazyTab("Main", lambda page:
+                        fill_key_grid(page, normal_keys, self._picked))
+        tabs.addLazyTab("NumPad", lambda page: fill_key_grid(
+            page, [(k, DISPLAY.get(k, k.replace("Numpad",""))) for k in numpad_keys],
+            self._picked))
+        lay.addWidget(tabs)
+
+    def reset(self):
+        """Prepare a cached picker for its next use."""
+        self.result = ""
+        for chk in (self.c,self.a,self.s,self.w):
+            chk.setChecked(False)
 
     def _picked(self,key):
         if key.lower().startswith("click"):
@@ -137,8 +104,12 @@ class KeyMapper(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("pyAHK")
-        self.maps = []
-        self.control_items = {}
+        self.maps = MappingStore()
+        self.mapmodel = MappingListModel(self.maps, self)
+        self._picker = None
+        self._building = False
+        self.compile_cache = CompileCache()
+        self.project_extra = {}         # loaded settings the window can't edit
 
         root=QWidget(); self.setCentralWidget(root)
         V=QVBoxLayout(root)
@@ -162,10 +133,11 @@ class KeyMapper(QMainWindow):
         seqrow=QHBoxLayout()
         self.seq=QListWidget()
         self.seq.setMaximumHeight(120)
-        self.seq.setToolTip("Mapping Functions")
         self.seq.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
         self.seq.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.seq.customContextMenuRequested.connect(self._seq_context_menu)
+        self.seq.itemDoubleClicked.connect(toggle_seq_item)
+        self.seq.setToolTip("Mapping Functions (double-click a Repeat to expand it)")
         col=QVBoxLayout()
         for lab,fn,tip in [
             ("⌨",self._add_key,"Add keystroke"),
@@ -238,8 +210,13 @@ class KeyMapper(QMainWindow):
         add.setFixedWidth(100)
         reset=QPushButton("Reset",clicked=self._reset_all)
         reset.setFixedWidth(100)
+        self.map_runtime=runtime_combo("Profile runtime")
+        self.map_runtime.setToolTip("Send mode and delays for this mapping only")
+        self.map_chunked=QCheckBox("Non-blocking")
+        self.map_chunked.setToolTip("Run the steps between delays on timers so other hotkeys stay responsive\nand the toggle key cancels a running sequence")
         left_ctrl=QHBoxLayout()
-        left_ctrl.addStretch(); left_ctrl.addWidget(add); left_ctrl.addStretch()
+        left_ctrl.addStretch(); left_ctrl.addWidget(add)
+        left_ctrl.addWidget(self.map_runtime); left_ctrl.addWidget(self.map_chunked); left_ctrl.addStretch()
         right_ctrl=QHBoxLayout()
         right_ctrl.addStretch(); right_ctrl.addWidget(reset); right_ctrl.addStretch()
         ctrl=QHBoxLayout()
@@ -254,17 +231,48 @@ class KeyMapper(QMainWindow):
         # Mappings & Preview
         mapping_label=QLabel("Key Mappings")
         mapping_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        preview_label=QLabel("AutoHotKey Script")
-        preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview_label=QLabel("AutoHotKey Script")
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.maplist=QListWidget()
+        self.maplist=QListView()
+        self.maplist.setModel(self.mapmodel)
+        self.maplist.setUniformItemSizes(True)
         self.maplist.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.maplist.customContextMenuRequested.connect(self._maplist_context_menu)
 
         self.preview=QTextEdit(); self.preview.setReadOnly(True)
+        self.script = ScriptPreview(self.preview, LatestJob(self))
+        self.savings = LatestJob(self)
+        self.refresher = RefreshScheduler(self._refresh, self._rerender, self)
 
         left=QVBoxLayout(); left.addWidget(mapping_label); left.addWidget(self.maplist)
-        right=QVBoxLayout(); right.addWidget(preview_label); right.addWidget(self.preview)
+        self.optimize=QCheckBox("Optimize sends"); self.optimize.setChecked(True)
+        self.optimize.setToolTip("Merge adjacent keys/text into one Send and fold Sleeps")
+        self.optimize.toggled.connect(self.refresher.request_full)
+        self.table=QCheckBox("Table output")
+        self.table.setToolTip("Emit a data table and one shared dispatcher (for very large keymaps)")
+        self.table.toggled.connect(self.refresher.request_full)
+        self.dedup=QComboBox()
+        for text, mode in (("No sharing", ""), ("Share identical", "exact"), ("Share prefixes", "prefix")):
+            self.dedup.addItem(text, mode)
+        self.dedup.setToolTip("Emit sequences used by several hotkeys once, as functions")
+        self.dedup.currentIndexChanged.connect(self.refresher.request_full)
+        self.paste=QSpinBox(); self.paste.setRange(0, 10000)
+        self.paste.setSpecialValueText("Never paste"); self.paste.setPrefix("Paste over "); self.paste.setSuffix(" chars")
+        self.paste.setToolTip("Paste long text through the clipboard instead of typing it (0 = never)")
+        self.paste.valueChanged.connect(self.refresher.request_full)
+        self.compare=QCheckBox("Show before/after")
+        self.compare.toggled.connect(self.refresher.request_full)
+        self.runtime=runtime_combo("AHK defaults")
+        self.runtime.setToolTip("Send mode, delays, hotkey limits and priority written into the script header")
+        self.runtime.currentIndexChanged.connect(self.refresher.request)
+        opts=QHBoxLayout(); opts.addStretch()
+        opts.addWidget(self.optimize); opts.addWidget(self.compare)
+        opts.addWidget(self.table); opts.addWidget(self.dedup); opts.addWidget(self.paste)
+        opts.addWidget(QLabel("Runtime:")); opts.addWidget(self.runtime); opts.addStretch()
+
+        right=QVBoxLayout(); right.addWidget(self.preview_label); right.addWidget(self.preview)
+        right.addLayout(opts)
         disp=QHBoxLayout(); disp.setStretch(0,1); disp.setStretch(1,1)
         disp.addLayout(left); disp.addLayout(right)
         V.addLayout(disp)
@@ -284,11 +292,25 @@ class KeyMapper(QMainWindow):
         build.setSizePolicy(QSizePolicy.Policy.Expanding,QSizePolicy.Policy.Fixed)
         hb.addWidget(save,1); hb.addWidget(build,1)
         V.addLayout(hb)
+        hb=QHBoxLayout()
+        openp=QPushButton("Open project…",clicked=self.open_project)
+        openp.setToolTip("Load mappings, hotkeys and options from a project file")
+        savep=QPushButton("Save project…",clicked=self.save_project)
+        savep.setToolTip("Save mappings, hotkeys and options to a project file")
+        hb.addWidget(openp,1); hb.addWidget(savep,1)
+        V.addLayout(hb)
 
         self.resize(500,500)
 
+    def _key_picker(self):
+        """One lazily built picker, reused for every pick."""
+        if self._picker is None:
+            self._picker = KeyPicker(self)
+        self._picker.reset()
+        return self._picker
+
     def _pick_into(self,lineedit):
-        dlg=KeyPicker(self)
+        dlg=self._key_picker()
         if dlg.exec():
             lineedit.setText(dlg.result)
 
@@ -296,18 +318,16 @@ class KeyMapper(QMainWindow):
         # only act on an actual clear
         if text:
             return
-        if control_name in self.control_items:
-            item = self.control_items.pop(control_name)
-            row  = self.maplist.row(item)
-            self.maplist.takeItem(row)
-            self._refresh()
+        if control_name in self.mapmodel.controls:
+            self.mapmodel.set_control(control_name, "")
+            self.refresher.request()
 
     def _add_key(self):
         sel=self.seq.selectedItems()
-        dlg=KeyPicker(self)
+        dlg=self._key_picker()
         if dlg.exec():
             if len(sel)==1:
-                sel[0].setText(dlg.result)
+                set_seq_token(sel[0], dlg.result)
                 self.seq.clearSelection()
             else:
                 self.seq.addItem(dlg.result)
@@ -318,7 +338,7 @@ class KeyMapper(QMainWindow):
         if ok:
             txt=f"{val:g} s"
             if len(sel)==1:
-                sel[0].setText(txt)
+                set_seq_token(sel[0], txt)
                 self.seq.clearSelection()
             else:
                 self.seq.addItem(txt)
@@ -329,7 +349,7 @@ class KeyMapper(QMainWindow):
         if ok and txt:
             lit=f'"{txt}"'
             if len(sel)==1:
-                sel[0].setText(lit)
+                set_seq_token(sel[0], lit)
                 self.seq.clearSelection()
             else:
                 self.seq.addItem(lit)
@@ -343,7 +363,7 @@ class KeyMapper(QMainWindow):
         multi = len(sels) > 1
         if not multi:
             editA = menu.addAction("Edit")
-        repA = menu.addAction("Replicate")
+        repA = menu.addAction("Repeat…")
         remA = menu.addAction("Remove")
         act = menu.exec(self.seq.mapToGlobal(pos))
 
@@ -355,33 +375,40 @@ class KeyMapper(QMainWindow):
                     self.seq.takeItem(r)
 
         elif act == repA:
-            for it in sels:
-                self.seq.addItem(it.text())
+            n, ok = QInputDialog.getInt(self, "Repeat", "Times:", 2, 0, 1_000_000)
+            if ok:
+                # fold the selection into one Repeat step where it started
+                rows = sorted(self.seq.row(it) for it in sels)
+                tokens = [seq_token(self.seq.item(r)) for r in rows]
+                for r in reversed(rows):
+                    self.seq.takeItem(r)
+                self.seq.insertItem(rows[0], seq_item(repeat_token(n, tokens)))
 
         elif not multi and act == editA:
-            it=sels[0]; txt=it.text()
-            # detect type
-            if m:=re.fullmatch(r"(\d+(?:\.\d+)?)\s*s",txt):
-                val=float(m.group(1))
-                new,ok=QInputDialog.getDouble(self,"Edit Delay","Seconds:",val,0.0,3600.0,2)
+            it=sels[0]; txt=seq_token(it)
+            # the parsed step knows its type
+            if (step:=parse_step(txt)).kind is StepKind.REPEAT:
+                new,ok=QInputDialog.getInt(self,"Edit Repeat","Times:",step.value,0,1_000_000)
+                if ok:
+                    set_seq_token(it, repeat_token(new, step.body))
+                    self.seq.clearSelection()
+            elif step.kind is StepKind.SLEEP:
+                new,ok=QInputDialog.getDouble(self,"Edit Delay","Seconds:",step.value/1000,0.0,3600.0,2)
                 if ok:
-                    it.setText(f"{new:g} s")
+                    set_seq_token(it, f"{new:g} s")
                     self.seq.clearSelection()
-            elif txt.startswith('"') and txt.endswith('"'):
-                inner=txt[1:-1]
-                new,ok=QInputDialog.getText(self,"Edit Text","Text to send:",text=inner)
+            elif step.kind is StepKind.TEXT:
+                new,ok=QInputDialog.getText(self,"Edit Text","Text to send:",text=step.value)
                 if ok:
-                    it.setText(f'"{new}"')
+                    set_seq_token(it, f'"{new}"')
                     self.seq.clearSelection()
             else:
-                dlg=KeyPicker(self)
+                dlg=self._key_picker()
                 if dlg.exec():
-                    it.setText(dlg.result)
+                    set_seq_token(it, dlg.result)
                     self.seq.clearSelection()
 
     def add_mapping(self):
-        from collections import Counter
-
         # ─── 1) no duplicates among trigger/toggle/exit/info ───
         fields = {
             'Trigger': self.trigger.text().strip(),
@@ -389,9 +416,9 @@ class KeyMapper(QMainWindow):
             'Exit': self.exit.text().strip(),
             'Info': self.info.text().strip(),
         }
-        # only non‐blank
+        # only non‐blank; "Ctrl+A" and "ctrl-a" count as the same hotkey
         used = [v for v in fields.values() if v]
-        dupes = [k for k, v in Counter(used).items() if v > 1]
+        dupes = find_duplicates(used)
         if dupes:
             QMessageBox.warning(
                 self,
@@ -401,72 +428,49 @@ class KeyMapper(QMainWindow):
             return
 
         # ─── 2) no control-field may clash with an existing mapping’s trigger ───
-        existing_trigs = [t for t, _ in self.maps]
         for name in ('Toggle', 'Exit', 'Info'):
             key = fields[name]
-            if key and key in existing_trigs:
+            if key and (mid := self.maps.find(key)) is not None:
                 QMessageBox.warning(
                     self,
                     "Hotkey Conflict",
-                    f"{name} hotkey “{key}” is already assigned to function!"
+                    f"{name} hotkey “{key}” is already assigned to function "
+                    f"“{self.maps.get(mid).trigger}”!"
                 )
                 return
 
         # ─── 3) no new trigger may clash with existing triggers ───
         trig = fields['Trigger']
-        steps = [self.seq.item(i).text() for i in range(self.seq.count())]
-        if trig and steps and trig in existing_trigs:
+        steps = [seq_token(self.seq.item(i)) for i in range(self.seq.count())]
+        if trig and steps and (mid := self.maps.find(trig)) is not None:
             QMessageBox.warning(
                 self,
                 "Hotkey Conflict",
-                f"Trigger hotkey “{trig}” is already mapped to another sequence."
+                f"Trigger hotkey “{trig}” is already mapped to another sequence "
+                f"(“{self.maps.get(mid).trigger}”)."
             )
             return
 
         # ─── 4) proceed to add/update your controls exactly as before ───
-        t = fields['Toggle']
-        if t:
-            disp = f"Toggle → {t}"
-            if 'toggle' not in self.control_items:
-                item = QListWidgetItem(disp)
-                self.maplist.addItem(item)
-                self.control_items['toggle'] = item
-            else:
-                self.control_items['toggle'].setText(disp)
-
-        e = fields['Exit']
-        if e:
-            disp = f"Exit → {e}"
-            if 'exit' not in self.control_items:
-                item = QListWidgetItem(disp)
-                self.maplist.addItem(item)
-                self.control_items['exit'] = item
-            else:
-                self.control_items['exit'].setText(disp)
-
-        i = fields['Info']
-        if i:
-            disp = f"Info → {i}"
-            if 'info' not in self.control_items:
-                item = QListWidgetItem(disp)
-                self.maplist.addItem(item)
-                self.control_items['info'] = item
-            else:
-                self.control_items['info'].setText(disp)
+        for name in ('Toggle', 'Exit', 'Info'):
+            if fields[name]:
+                self.mapmodel.set_control(name.lower(), fields[name])
 
         # ─── 5) add the normal trigger→sequence mapping ───
         if trig and steps:
-            self.maps.append((trig, steps))
-            self.maplist.addItem(f"{trig} → {', '.join(steps)}")
+            self.mapmodel.append_mapping(
+                Mapping(trig, intern_tokens(steps), self.map_runtime.currentData(),
+                        self.map_chunked.isChecked()))
+            self.script.insert(len(self.maps) - 1, self._profile())
             self.trigger.clear()
             self.seq.clear()
 
         # ─── 6) rebuild the script preview ───
-        self._refresh()
+        self.refresher.request()
 
     def _maplist_context_menu(self, pos):
-        item = self.maplist.itemAt(pos)
-        if not item:
+        index = self.maplist.indexAt(pos)
+        if not index.isValid():
             return
 
         menu = QMenu(self)
@@ -474,29 +478,23 @@ class KeyMapper(QMainWindow):
         if menu.exec(self.maplist.mapToGlobal(pos)) != rem:
             return
 
-        row = self.maplist.row(item)
+        row = index.row()
 
         # 1) If this is one of the toggle/exit/info controls, clear that field
-        for field, ctrl_item in list(self.control_items.items()):
-            if ctrl_item is item:
-                getattr(self, field).clear()
-                # _on_control_cleared will actually drop it from the list & refresh
-                return
+        if (field := self.mapmodel.control_at(row)) is not None:
+            getattr(self, field).clear()
+            # _on_control_cleared will actually drop it from the list & refresh
+            return
 
         # 2) Otherwise it’s one of your normal hotkey→sequence mappings.
-        #    Count how many control-fields actually precede this row:
-        ctrl_rows = [self.maplist.row(ci) for ci in self.control_items.values()]
-        num_above = sum(1 for r in ctrl_rows if r < row)
-
-        idx = row - num_above
-        if 0 <= idx < len(self.maps):
-            # remove from your internal list
-            self.maps.pop(idx)
-            # remove from the UI
-            self.maplist.takeItem(row)
-            # rebuild the preview
-            self._refresh()
-
+        mid = self.mapmodel.mapping_id(row)
+        if mid is not None:
+            # remove from the store (and its hotkey index) and the view
+            idx = self.maps.index_of(mid)
+            self.mapmodel.remove_mapping(mid)
+            # drop its block from the preview, then patch the header
+            self.script.remove(idx, self._profile())
+            self.refresher.request()
 
     def _reset_all(self):
         ans=QMessageBox.question(self,"Confirm Reset",
@@ -507,170 +505,198 @@ class KeyMapper(QMainWindow):
             for fld in (self.trigger,self.toggle,self.exit,self.info):
                 fld.clear()
             self.seq.clear()
-            self.maps.clear()
-            self.control_items.clear()
-            self.maplist.clear()
-            self.preview.clear()
-            self._refresh()
+            self.mapmodel.clear()
+            self.project_extra = {}
+            self.refresher.request_full()
+
+    def _profile(self) -> Profile:
+        """Snapshot of the current widgets as an engine profile."""
+        return Profile(
+            maps=self.maps,
+            toggle=self.toggle.text(),
+            exit=self.exit.text(),
+            info=self.info.text(),
+            optimize=self.optimize.isChecked(),
+            runtime=self.runtime.currentData(),
+            layout="table" if self.table.isChecked() else "blocks",
+            dedup=self.dedup.currentData(),
+            paste_threshold=self.paste.value(),
+            **self.project_extra,
+        )
+
+    def _apply_settings(self, profile):
+        """Show ``profile``'s hotkeys and options in the widgets."""
+        for name in ("toggle","exit","info"):
+            getattr(self,name).setText(getattr(profile,name))
+            self.mapmodel.set_control(name,getattr(profile,name))
+        self.optimize.setChecked(profile.optimize)
+        self.runtime.setCurrentIndex(max(self.runtime.findData(profile.runtime),0))
+        self.table.setChecked(profile.layout=="table")
+        self.dedup.setCurrentIndex(max(self.dedup.findData(profile.dedup),0))
+        self.paste.setValue(profile.paste_threshold)
+        self.project_extra = {k: getattr(profile,k)
+                              for k in ("exe_path","exe_delay","exe_params","launch")}
+
+    def batch_update(self):
+        """Defer every preview refresh in the block to one at its end."""
+        return self.refresher.batch()
+
+    def _rerender(self):
+        """Optimizer options change every block, so re-render the whole preview."""
+        self.script.compare = self.compare.isChecked()
+        profile = self._profile()
+        self.script.reset(profile)
+        self.mapmodel.set_timing(profile)
+        self._show_savings(profile)
 
     def _refresh(self):
-        if not (self.maps or self.toggle.text().strip() or
-                self.exit.text().strip()):
-            self.preview.clear()
+        profile = self._profile()
+        self.script.refresh(profile)
+        self.mapmodel.set_timing(profile)
+        self._show_savings(profile)
+
+    def _show_savings(self, profile):
+        # two full renders in dedup mode, so size them off the GUI thread
+        if not profile.dedup:
+            self.savings.cancel()
+            self._set_savings(0)
             return
+        snapshot = profile.snapshot()
+        self.savings.submit(lambda cancelled: dedup_savings(snapshot),
+                            self._set_savings)
 
-        lines=[
-            "; generated by KeyMapper",
-            "#Requires AutoHotkey v2.0+",
-            "",
-            "global scriptEnabled := true",
-            "global infoVisible := false",
-            ""
-        ]
-        if t:=self.toggle.text().strip():
-            th=hotkey_to_ahk(t)
-            lines+=[
-                f"{th}:: {{",
-                "    global scriptEnabled",
-                "    scriptEnabled := !scriptEnabled",
-                "    ToolTip(scriptEnabled?\"ENABLED\":\"DISABLED\")",
-                "    SetTimer(() => ToolTip(), -1000)",
-                "}",
-                ""
-            ]
-        if e:=self.exit.text().strip():
-            lines.append(f"{hotkey_to_ahk(e)}::ExitApp")
-            lines.append("")
-        if i:=self.info.text().strip():
-            ih=hotkey_to_ahk(i)
-            info_lines=[]
-            for hk,steps in self.maps:
-                clean=[s[1:-1] if s.startswith('"') and s.endswith('"') else s
-                       for s in steps]
-                info_lines.append(f"{hk} → {', '.join(clean)}")
-            tip="Info:`n"+ "`n".join(info_lines)
-            lines+=[
-                f"{ih}:: {{",
-                "    global infoVisible",
-                "    if infoVisible {",
-                "        ToolTip()",
-                "        infoVisible := false",
-                "    } else {",
-                f'        ToolTip("{tip}")',
-                "        SetTimer(() => ToolTip(), -5000)",
-                "        infoVisible := true",
-                "    }",
-                "}",
-                ""
-            ]
-        lines.append("#HotIf scriptEnabled")
-        for hk,steps in self.maps:
-            ah=hotkey_to_ahk(hk)
-            body=[to_ahk_step(s) for s in steps]
-            if len(body)==1:
-                lines.append(f"{ah}:: {body[0]}")
-            else:
-                lines.append(f"{ah}::")
-                lines.append("{")
-                for b in body:
-                    lines.append(f"    {b}")
-                lines.append("}")
-        lines.append("#HotIf")
-        self.preview.setPlainText("\n".join(lines))
+    def _set_savings(self, saved):
+        self.preview_label.setText(f"AutoHotKey Script — {saved:,} bytes saved by sharing" if saved else "AutoHotKey Script")
 
     def save_ahk(self):
-        if not self.maps and not self.control_items:
+        if not self.maps and not self.mapmodel.controls:
             QMessageBox.warning(self, "Key Map Empty", "You have no mappings defined!")
             return
         p,_=QFileDialog.getSaveFileName(self,"Save AHK","keymap.ahk","AHK (*.ahk)")
         if p:
-            Path(p).write_text(self.preview.toPlainText(),encoding="utf-8")
+            # stream straight from the engine; the preview is display-only
+            save_script(self._profile(), p)
+
+    def open_project(self):
+        p,_=QFileDialog.getOpenFileName(self,"Open Project","",OPEN_FILTER)
+        if not p:
+            return
+        skipped = ()
+        try:
+            if Path(p).suffix.lower() == ".ahk":
+                profile, skipped = import_script(p)
+                maps = profile.maps
+            else:
+                settings, maps = read_project(p)
+                profile = Profile.from_dict(settings)
+            with self.batch_update():
+                self._apply_settings(profile)
+                # maps is a checked list: a bad file has failed before this
+                self.mapmodel.load(maps)
+                self.refresher.request_full()
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            QMessageBox.warning(self, "Open Failed", f"Couldn’t read {Path(p).name}:\n{e}")
+            return
+        if skipped:
+            lines = "\n".join(f"{s.line}: {s.reason}: {s.text}" for s in skipped[:20])
+            if len(skipped) > 20:
+                lines += f"\n… and {len(skipped) - 20:,} more"
+            QMessageBox.information(self, "Script Imported", f"{len(skipped):,} line(s) of {Path(p).name} could not be imported:\n\n" + lines)
+
+    def save_project(self):
+        p,_=QFileDialog.getSaveFileName(self,"Save Project","keymap.pyahk",PROJECT_FILTER)
+        if p:
+            save_project(self._profile(), p)
 
     def build_exe(self):
-        if not self.maps and not self.control_items:
+        if self._building:
+            QMessageBox.information(self, "Build Running", "A build is already in progress.")
+            return
+        if not self.maps and not self.mapmodel.controls:
             QMessageBox.warning(self, "Key Map Empty", "You have no mappings defined!")
             return
 
-        compiler_dir = Path(r"C:\Program Files\AutoHotkey\Compiler")
-        ahk2exe_path = compiler_dir / "Ahk2Exe.exe"
-        installer_ahk = Path(r"C:\Program Files\AutoHotkey\UX\install-ahk2exe.ahk")
+        if ahk2exe_path := find_ahk2exe():
+            self._compile_with(ahk2exe_path)
+            return
 
         # 1) Prompt once if Ahk2Exe.exe is missing
-        if not ahk2exe_path.exists():
-            dlg = QMessageBox(self)
-            dlg.setWindowTitle("Ahk2Exe Not Found")
-            dlg.setText("Ahk2Exe.exe is required to compile your script.")
-            dlg.setInformativeText("Install it, locate it manually, or cancel:")
-            btn_install = dlg.addButton("Install", QMessageBox.ButtonRole.AcceptRole)
-            btn_browse = dlg.addButton("Browse", QMessageBox.ButtonRole.AcceptRole)
-            btn_cancel = dlg.addButton("Cancel", QMessageBox.ButtonRole.RejectRole)
-            dlg.exec()
-
-            # — INSTALL
-            if dlg.clickedButton() == btn_install:
-                if not installer_ahk.exists():
-                    QMessageBox.warning(self, "Installer Missing",
-                                        "install-ahk2exe.ahk wasn’t found in UX folder.")
-                    return
-                try:
-                    subprocess.run(
-                        ["autohotkey.exe", str(installer_ahk)],
-                        stdout=subprocess.DEVNULL,
-                        stderr=subprocess.DEVNULL,
-                        check=True
-                    )
-                except FileNotFoundError:
-                    QMessageBox.warning(self, "AutoHotkey Not Found",
-                                        "Cannot find AutoHotkey.exe in your PATH.")
-                    return
-                except subprocess.CalledProcessError:
-                    QMessageBox.warning(self, "Installer Failed",
-                                        "Ahk2Exe installer didn’t complete successfully.")
-                    return
-
-                # wait & kill installer GUI
-                for _ in range(25):
-                    proc = subprocess.run(
-                        ["tasklist", "/FI", "IMAGENAME eq Ahk2Exe.exe", "/NH"],
-                        capture_output=True, text=True
-                    )
-                    if "Ahk2Exe.exe" in proc.stdout:
-                        subprocess.run(
-                            ["taskkill", "/F", "/IM", "Ahk2Exe.exe"],
-                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-                        )
-                        break
-                    time.sleep(0.2)
-
-                # poll up to 15s for the EXE file to appear
-                timeout, interval, elapsed = 15.0, 0.5, 0.0
-                while elapsed < timeout:
-                    if ahk2exe_path.exists():
-                        break
-                    QCoreApplication.processEvents()
-                    time.sleep(interval)
-                    elapsed += interval
-
-                if not ahk2exe_path.exists():
-                    QMessageBox.warning(self, "Still Missing",
-                                        "Ahk2Exe.exe did not appear after installation.")
-                    return
-                # falls through…
-
-            # — BROWSE
-            elif dlg.clickedButton() == btn_browse:
-                path, _ = QFileDialog.getOpenFileName(
-                    self, "Locate Ahk2Exe.exe", "", "Executable (*.exe)"
-                )
-                if not path or Path(path).name.lower() != "ahk2exe.exe":
-                    QMessageBox.warning(self, "Invalid File", "That isn’t an Ahk2Exe.exe!")
-                    return
-                ahk2exe_path = Path(path)
-
-            # — CANCEL
-            else:
+        dlg = QMessageBox(self)
+        dlg.setWindowTitle("Ahk2Exe Not Found")
+        dlg.setText("Ahk2Exe.exe is required to compile your script.")
+        dlg.setInformativeText("Install it, locate it manually, or cancel:")
+        btn_install = dlg.addButton("Install", QMessageBox.ButtonRole.AcceptRole)
+        btn_browse = dlg.addButton("Browse", QMessageBox.ButtonRole.AcceptRole)
+        btn_cancel = dlg.addButton("Cancel", QMessageBox.ButtonRole.RejectRole)
+        dlg.exec()
+
+        # — INSTALL (continues in _after_install once the installer exits)
+        if dlg.clickedButton() == btn_install:
+            if not INSTALLER_AHK.exists():
+                QMessageBox.warning(self, "Installer Missing",
+                                    "install-ahk2exe.ahk wasn’t found in UX folder.")
                 return
+            # the installer's Ahk2Exe window would inherit output pipes
+            self._run_job(["autohotkey.exe", str(INSTALLER_AHK)],
+                          "Installing Ahk2Exe…",
+                          lambda res: self._after_install(res, AHK2EXE_PATH),
+                          capture=False)
+
+        # — BROWSE
+        elif dlg.clickedButton() == btn_browse:
+            path, _ = QFileDialog.getOpenFileName(
+                self, "Locate Ahk2Exe.exe", "", "Executable (*.exe)"
+            )
+            if not path or Path(path).name.lower() != "ahk2exe.exe":
+                QMessageBox.warning(self, "Invalid File", "That isn’t an Ahk2Exe.exe!")
+                return
+            self._compile_with(Path(path))
+
+        # — CANCEL: nothing to do
+
+    def _run_job(self, args, label, on_done, capture=True):
+        """Run an external command in the background; one job at a time."""
+        def done(res):
+            self._building = False
+            on_done(res)
+        self._building = True
+        run_with_progress(self, args, label, done, capture=capture)
+
+    def _after_install(self, res, ahk2exe_path):
+        if res.returncode is None:
+            QMessageBox.warning(self, "AutoHotkey Not Found",
+                                "Cannot find AutoHotkey.exe in your PATH.")
+            return
+        if not res.ok:
+            if not res.cancelled:
+                QMessageBox.warning(self, "Installer Failed",
+                                    "Ahk2Exe installer didn’t complete successfully.")
+            return
 
+        # poll (without blocking the UI) up to 15s for the EXE file to appear;
+        # no second Build until this hands over to _compile_with
+        self._building = True
+        deadline = time.monotonic() + 15.0
+        timer = QTimer(self)
+
+        def poll():
+            if ahk2exe_path.exists():
+                timer.stop(); timer.deleteLater()
+                # the installer leaves Ahk2Exe's own window open; close it first
+                self._run_job(["taskkill", "/F", "/IM", "Ahk2Exe.exe"],
+                              "Closing Ahk2Exe installer window…",
+                              lambda _: self._compile_with(ahk2exe_path))
+            elif time.monotonic() > deadline:
+                timer.stop(); timer.deleteLater()
+                self._building = False
+                QMessageBox.warning(self, "Still Missing",
+                                    "Ahk2Exe.exe did not appear after installation.")
+
+        timer.timeout.connect(poll)
+        timer.start(500)
+        poll()
+
+    def _compile_with(self, ahk2exe_path):
         # 2) Ask where to save the compiled .exe
         out_file, _ = QFileDialog.getSaveFileName(
             self, "Save EXE", "keymap.exe", "EXE (*.exe)"
@@ -678,47 +704,46 @@ class KeyMapper(QMainWindow):
         if not out_file:
             return
 
-        # 3) Dump preview to a temp .ahk
-        with tempfile.TemporaryDirectory() as tmp:
-            temp_ahk = Path(tmp) / "temp.ahk"
-            temp_ahk.write_text(self.preview.toPlainText(), encoding="utf-8")
-
-            # 4) Auto-pick the correct v2 runtime
-            is_64 = sys.maxsize > 2 ** 32
-            v2dir = Path(r"C:\Program Files\AutoHotkey\v2")
-            ahk64 = v2dir / "AutoHotkey64.exe"
-            ahk32 = v2dir / "AutoHotkey32.exe"
-
-            if is_64 and ahk64.exists():
-                base = ahk64
-            elif ahk32.exists():
-                base = ahk32
-            else:
-                base_path, _ = QFileDialog.getOpenFileName(
-                    self, "Locate AutoHotkey.exe", "", "Executable (*.exe)"
-                )
-                if not base_path:
-                    return
-                base = Path(base_path)
-
-            # 5) Compile, passing /bin for the base
-            try:
-                subprocess.run(
-                    [
-                        str(ahk2exe_path),
-                        "/in", str(temp_ahk),
-                        "/out", out_file,
-                        "/bin", str(base)
-                    ],
-                    check=True,
-                    stdout=subprocess.DEVNULL,
-                    stderr=subprocess.PIPE
-                )
+        # 3) Auto-pick the correct v2 runtime
+        base = find_base_binary()
+        if base is None:
+            base_path, _ = QFileDialog.getOpenFileName(
+                self, "Locate AutoHotkey.exe", "", "Executable (*.exe)"
+            )
+            if not base_path:
+                return
+            base = Path(base_path)
+
+        # 4) Stream the script to a temp .ahk that lives until the job ends
+        tmp = tempfile.TemporaryDirectory()
+        temp_ahk = Path(tmp.name) / "temp.ahk"
+        save_script(self._profile(), temp_ahk)
+
+        # 5) Same script, base and compiler as an earlier build? Reuse it.
+        key = cache_key(temp_ahk, ahk2exe_path, base)
+        if self.compile_cache.get(key, out_file):
+            tmp.cleanup()
+            QMessageBox.information(self, "Success",
+                                    f"Executable created at:\n{out_file}\n\n"
+                                    "(compile cache hit)")
+            return
+
+        def done(res):
+            tmp.cleanup()
+            if res.ok:
+                try:
+                    self.compile_cache.put(key, out_file)
+                except OSError:
+                    pass                    # a cold cache is not a failed build
                 QMessageBox.information(self, "Success",
-                                        f"Executable created at:\n{out_file}")
-            except subprocess.CalledProcessError as e:
-                err = e.stderr.decode(errors="ignore")
-                QMessageBox.critical(self, "Compile Failed", err or "Unknown error.")
+                                        f"Executable created at:\n{out_file}\n\n"
+                                        "(compile cache miss)")
+            elif not res.cancelled:
+                QMessageBox.critical(self, "Compile Failed", res.error_text())
+
+        # 6) Compile in the background, passing /bin for the base
+        self._run_job(compile_command(ahk2exe_path, temp_ahk, out_file, base),
+                      "Compiling…", done)
 
 
 if __name__=="__main__":
@@ -1,51 +1,31 @@
-import sys, re, subprocess, tempfile, shutil, textwrap
+import sys, tempfile, textwrap
 from pathlib import Path
 from PyQt6.QtCore import Qt
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QLineEdit, QPushButton, QListWidget, QListWidgetItem, QTextEdit,
-    QFileDialog, QMessageBox, QGridLayout, QDialog, QCheckBox,
-    QInputDialog, QMenu, QLabel, QFrame, QSizePolicy
+    QLineEdit, QPushButton, QListWidget, QListView, QTextEdit,
+    QFileDialog, QMessageBox, QDialog, QCheckBox,
+    QInputDialog, QMenu, QLabel, QFrame, QSizePolicy, QComboBox, QSpinBox
 )
 
-# ───────── constants ─────────
-MODS = {"ctrl":"^", "alt":"!", "shift":"+", "win":"#"}
-SPECIALS = {
-    "enter","return","tab","esc","escape","space","backspace","bs",
-    "delete","del","home","end","pgup","pgdn","up","down","left","right"
-}
-CLICK_TRIGGERS = {
-    "click":"LButton","left click":"LButton","click left":"LButton",
-    "click right":"RButton","right click":"RButton"
-}
-
-# ───────── helpers ─────────
-def to_ahk_step(token: str) -> str:
-    t = token.strip()
-    if m := re.fullmatch(r"(?i)click\s+x(\d+)", t):
-        return f"Click {int(m.group(1))}"
-    if t.lower().startswith("click"):
-        return t
-    if m := re.fullmatch(r"(\d+(?:\.\d+)?)\s*s", t, re.I):
-        return f"Sleep {int(float(m.group(1))*1000)}"
-    if t.startswith('"') and t.endswith('"'):
-        return f"Send {t}"
-    parts = re.split(r"[+\-\s]+", t)
-    mods = "".join(MODS.get(p.lower(), "") for p in parts[:-1])
-    raw = parts[-1]
-    key = raw.lower() if len(raw)==1 and raw.isalnum() else raw
-    if not (len(key)==1 and key.isalnum()):
-        key = f"{{{key}}}"
-    return f'Send "{mods}{key}"'
-
-def hotkey_to_ahk(raw: str) -> str:
-    r = raw.strip().lower()
-    if r in CLICK_TRIGGERS:
-        return CLICK_TRIGGERS[r]
-    return "".join(
-        MODS.get(t.lower(), t.lower())
-        for t in re.split(r"[+\-\s]+", raw.strip())
-    )
+from pyahk.cache import CompileCache, cache_key
+from pyahk.compiler import compile_command, find_ahk2exe, find_base_binary
+from pyahk.engine import Mapping, Profile, dedup_savings, save_script
+from pyahk.hotkeys import find_duplicates
+from pyahk.importer import import_script
+from pyahk.launcher import Launch
+from pyahk.project import read_project, save_project
+from pyahk.steps import StepKind, intern_tokens, parse_step, repeat_token
+from pyahk.store import MappingStore
+from pyahk.widgets import (
+    LatestJob, LazyTabWidget, MappingListModel, RefreshScheduler,
+    ScriptPreview, fill_key_grid, run_with_progress, runtime_combo, seq_item,
+    seq_token, set_seq_token, toggle_seq_item,
+)
+
+PROJECT_FILTER = "项目 (*.pyahk);;二进制项目 (*.pyahkb)"
+OPEN_FILTER = PROJECT_FILTER + ";;AHK 脚本 (*.ahk)"
+RUNTIME_LABELS = {"low_latency": "低延迟", "compatible": "兼容", "game": "游戏"}
 
 # ───────── small key‐picker ─────────
 class KeyPicker(QDialog):
@@ -99,203 +79,59 @@ class KeyPicker(QDialog):
                        "Numpad5", "Numpad6", "Numpad7", "Numpad8", "Numpad9",
                        "NumpadDot", "NumpadAdd", "NumpadSub", "NumpadMult",
                        "NumpadDiv", "NumpadEnter"]
-
-        grid = QGridLayout()
-        
-        # 功能键行
-        row, col = 0, 0
-        func_label = QLabel("功能键")
-        func_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(func_label, row, 0, 1, 10)
-        row += 1
-        for i in range(1, 13):  # F1-F12
-            btn = QPushButton(f"F{i}")
-            btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, k=f"F{i}": self._picked(k))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 6:  # 每行6个
-                col = 0
-                row += 1
-
-        # 修饰键行
-        row += 1
-        mod_label = QLabel("修饰键")
-        mod_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(mod_label, row, 0, 1, 10)
-        row += 1; col = 0
-        
-        # 左侧修饰键
+        DISPLAY = {"NumpadAdd": "+", "NumpadSub": "-", "NumpadMult": "*",
+                   "NumpadDiv": "/", "NumpadDot": ".", "NumpadEnter": "Enter"}
+        # 左侧修饰键 | 右侧修饰键
         LEFT_MODS = ["Shift", "Ctrl", "Alt", "Tab"]
-        for k in LEFT_MODS:
-            btn = QPushButton(k); btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-        
-        # 分隔符
-        sep = QLabel("|"); sep.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(sep, row, col, 1, 2)
-        col += 2
-        
-        # 右侧修饰键
         RIGHT_MODS = ["Shift", "Ctrl", "Alt"]
-        for k in RIGHT_MODS:
-            btn = QPushButton(k); btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-        
-        row += 1
-
-        # Esc键行
-        row += 1
-        esc_label = QLabel("特殊键")
-        esc_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(esc_label, row, 0, 1, 10)
-        row += 1; col = 4  # 居中显示
-        btn = QPushButton("Esc")
-        btn.setFixedWidth(44)
-        btn.clicked.connect(lambda _, k="Esc": self._picked(k))
-        grid.addWidget(btn, row, col)
-        row += 1
-
-        # 主键盘行
-        row += 1
-        main_label = QLabel("主键盘")
-        main_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(main_label, row, 0, 1, 10)
-        row += 1; col = 0
-        for k in normal_keys:
-            btn = QPushButton(k); btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 10: col = 0; row += 1
-
-        # 方向键行
-        row += 1
-        arrow_label = QLabel("方向键")
-        arrow_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(arrow_label, row, 0, 1, 10)
-        row += 1; col = 3  # 居中显示
         ARROW_KEYS = {
             "Up": "↑", "Down": "↓",
             "Left": "←", "Right": "→"
         }
-        for k, icon in ARROW_KEYS.items():
-            btn = QPushButton(icon)
-            btn.setFixedWidth(44)
-            btn.setToolTip(k)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 7:  # 4个方向键
-                col = 0
-                row += 1
-
-        # 数字小键盘行
-        row += 1
-        num_label = QLabel("数字小键盘")
-        num_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(num_label, row, 0, 1, 10)
-        row += 1; col = 0
-        DISPLAY = {"NumpadAdd": "+", "NumpadSub": "-", "NumpadMult": "*",
-                   "NumpadDiv": "/", "NumpadDot": ".", "NumpadEnter": "Enter"}
-        for k in numpad_keys:
-            face = DISPLAY.get(k, k.replace("Numpad", ""))
-            btn = QPushButton(face); btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 10: col = 0; row += 1
-
-        # 媒体控制键行
-        row += 1
-        media_label = QLabel("媒体控制")
-        media_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(media_label, row, 0, 1, 10)
-        row += 1; col = 0
         MEDIA_DISPLAY = {
             "Volume_Mute": "🔇", "Volume_Down": "🔉", "Volume_Up": "🔊",
             "Media_Play_Pause": "⏯", "Media_Stop": "⏹", "Media_Prev": "⏮",
             "Media_Next": "⏭"
         }
-        for k, icon in MEDIA_DISPLAY.items():
-            btn = QPushButton(icon)
-            btn.setFixedWidth(44)
-            btn.setToolTip(k)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 7:  # 每行7个媒体键
-                col = 0
-                row += 1
-
-        # 标点符号行
-        row += 1
-        punct_label = QLabel("标点符号")
-        punct_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(punct_label, row, 0, 1, 10)
-        row += 1; col = 0
         PUNCTUATIONS = list("~!@#$%^&*()_+{}|:\"<>?`-=[]\\;',./")
-        for p in PUNCTUATIONS:
-            btn = QPushButton(p)
-            btn.setFixedWidth(44)
-            btn.clicked.connect(lambda _, k=p: self._picked(k))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 10:  # 每行10个
-                col = 0
-                row += 1
-
-        # 浏览器控制键行
-        row += 1
-        browser_label = QLabel("浏览器控制")
-        browser_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(browser_label, row, 0, 1, 10)
-        row += 1; col = 0
         BROWSER_KEYS = {
-            "Browser_Back": "←", "Browser_Forward": "→", 
+            "Browser_Back": "←", "Browser_Forward": "→",
             "Browser_Refresh": "↻", "Browser_Stop": "■",
             "Browser_Search": "🔍", "Browser_Favorites": "★",
             "Browser_Home": "⌂"
         }
-        for k, icon in BROWSER_KEYS.items():
-            btn = QPushButton(icon)
-            btn.setFixedWidth(44)
-            btn.setToolTip(k)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 7:  # 每行7个
-                col = 0
-                row += 1
-
-        # 鼠标控制键行
-        row += 1
-        mouse_label = QLabel("鼠标控制")
-        mouse_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        grid.addWidget(mouse_label, row, 0, 1, 10)
-        row += 1; col = 0
         MOUSE_KEYS = {
             "LButton": "🖱", "RButton": "🖱", "MButton": "🖱",
             "WheelUp": "↑", "WheelDown": "↓",
             "WheelLeft": "←", "WheelRight": "→",
             "XButton1": "X1", "XButton2": "X2"
         }
-        for k, icon in MOUSE_KEYS.items():
-            btn = QPushButton(icon)
-            btn.setFixedWidth(44)
-            btn.setToolTip(k)
-            btn.clicked.connect(lambda _, kk=k: self._picked(kk))
-            grid.addWidget(btn, row, col)
-            col += 1
-            if col == 6:  # 每行6个
-                col = 0
-                row += 1
-
-        lay.addLayout(grid)
+
+        # 每个分区一个标签页，按钮在第一次显示时才创建
+        sections = [
+            ("功能键", [f"F{i}" for i in range(1, 13)], 6),
+            ("修饰键", LEFT_MODS + [None] + RIGHT_MODS, 10),
+            ("特殊键", ["Esc"], 10),
+            ("主键盘", normal_keys, 10),
+            ("方向键", [(k, icon, k) for k, icon in ARROW_KEYS.items()], 7),
+            ("数字小键盘", [(k, DISPLAY.get(k, k.replace("Numpad", "")))
+                            for k in numpad_keys], 10),
+            ("媒体控制", [(k, icon, k) for k, icon in MEDIA_DISPLAY.items()], 7),
+            ("标点符号", PUNCTUATIONS, 10),
+            ("浏览器控制", [(k, icon, k) for k, icon in BROWSER_KEYS.items()], 7),
+            ("鼠标控制", [(k, icon, k) for k, icon in MOUSE_KEYS.items()], 6),
+        ]
+        tabs = LazyTabWidget()
+        for title, keys, cols in sections:
+            tabs.addLazyTab(title, lambda page, keys=keys, cols=cols:
+                            fill_key_grid(page, keys, self._picked, cols))
+        lay.addWidget(tabs)
+
+    def reset(self):
+        """复用缓存的选择器前清空上次的状态"""
+        self.result = ""
+        for chk in (self.c, self.a, self.s, self.w):
+            chk.setChecked(False)
 
     def _picked(self,key):
         if key.lower().startswith("click"):
@@ -313,8 +149,12 @@ class KeyMapper(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("pyAHK")
-        self.maps = []
-        self.control_items = {}
+        self.maps = MappingStore()
+        self.mapmodel = MappingListModel(self.maps, self)
+        self._picker = None
+        self._building = False
+        self.compile_cache = CompileCache()
+        self.project_extra = {}         # 载入的、界面无法编辑的设置
 
         root = QWidget(); self.setCentralWidget(root)
         V = QVBoxLayout(root)
@@ -347,6 +187,21 @@ class KeyMapper(QMainWindow):
         self.exe_params = QLineEdit()
         self.exe_params.setPlaceholderText("EXE 启动参数")
         exe_row.addWidget(self.exe_params)
+
+        # 就绪条件：替代固定延迟，超时后再按延迟等待
+        self.exe_wait = QComboBox()
+        for text, wait in (("不等待", ""), ("等待进程", "process"), ("等待窗口", "window"), ("等待文件", "file")):
+            self.exe_wait.addItem(text, wait)
+        self.exe_wait.setToolTip("程序就绪后再启用热键；超时则按启动延迟继续")
+        exe_row.addWidget(self.exe_wait)
+
+        self.exe_target = QLineEdit()
+        self.exe_target.setPlaceholderText("进程名 / 窗口标题 / 文件（留空按 EXE）")
+        exe_row.addWidget(self.exe_target)
+
+        self.exe_timeout = QLineEdit()
+        self.exe_timeout.setPlaceholderText("超时（秒）")
+        exe_row.addWidget(self.exe_timeout)
         V.addLayout(exe_row)
 
         # Sequence builder
@@ -357,6 +212,7 @@ class KeyMapper(QMainWindow):
         self.seq.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
         self.seq.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.seq.customContextMenuRequested.connect(self._seq_context_menu)
+        self.seq.itemDoubleClicked.connect(toggle_seq_item)
         col = QVBoxLayout()
         for lab, fn, tip in [
             ("⌨", self._add_key, "添加按键"),
@@ -413,8 +269,13 @@ class KeyMapper(QMainWindow):
         add.setFixedWidth(100)
         reset = QPushButton("重置", clicked=self._reset_all)
         reset.setFixedWidth(100)
+        self.map_runtime = runtime_combo("跟随全局", RUNTIME_LABELS)
+        self.map_runtime.setToolTip("仅对此映射生效的发送模式和延迟")
+        self.map_chunked = QCheckBox("非阻塞")
+        self.map_chunked.setToolTip("延迟之间的步骤分段由定时器执行，其他热键保持响应\n开关热键可中止正在运行的序列")
         left_ctrl = QHBoxLayout()
-        left_ctrl.addStretch(); left_ctrl.addWidget(add); left_ctrl.addStretch()
+        left_ctrl.addStretch(); left_ctrl.addWidget(add)
+        left_ctrl.addWidget(self.map_runtime); left_ctrl.addWidget(self.map_chunked); left_ctrl.addStretch()
         right_ctrl = QHBoxLayout()
         right_ctrl.addStretch(); right_ctrl.addWidget(reset); right_ctrl.addStretch()
         ctrl = QHBoxLayout()
@@ -424,17 +285,48 @@ class KeyMapper(QMainWindow):
         # Mappings & Preview
         mapping_label = QLabel("按键映射")
         mapping_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        preview_label = QLabel("AutoHotKey 脚本")
-        preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.preview_label = QLabel("AutoHotKey 脚本")
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        self.maplist = QListWidget()
+        self.maplist = QListView()
+        self.maplist.setModel(self.mapmodel)
+        self.maplist.setUniformItemSizes(True)
         self.maplist.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.maplist.customContextMenuRequested.connect(self._maplist_context_menu)
 
         self.preview = QTextEdit(); self.preview.setReadOnly(True)
+        self.script = ScriptPreview(self.preview, LatestJob(self))
+        self.savings = LatestJob(self)
+        self.refresher = RefreshScheduler(self._refresh, self._rerender, self)
 
         left = QVBoxLayout(); left.addWidget(mapping_label); left.addWidget(self.maplist)
-        right = QVBoxLayout(); right.addWidget(preview_label); right.addWidget(self.preview)
+        self.optimize = QCheckBox("优化发送"); self.optimize.setChecked(True)
+        self.optimize.setToolTip("合并相邻的按键/文本发送并折叠 Sleep")
+        self.optimize.toggled.connect(self.refresher.request_full)
+        self.table = QCheckBox("表格输出")
+        self.table.setToolTip("输出一张数据表和一个共享调度函数（适合超大键位表）")
+        self.table.toggled.connect(self.refresher.request_full)
+        self.dedup = QComboBox()
+        for text, mode in (("不共享", ""), ("共享相同序列", "exact"), ("共享前缀", "prefix")):
+            self.dedup.addItem(text, mode)
+        self.dedup.setToolTip("多个热键使用的相同序列只生成一次函数")
+        self.dedup.currentIndexChanged.connect(self.refresher.request_full)
+        self.paste = QSpinBox(); self.paste.setRange(0, 10000)
+        self.paste.setSpecialValueText("从不粘贴"); self.paste.setPrefix("超过 "); self.paste.setSuffix(" 字符时粘贴")
+        self.paste.setToolTip("较长的文本经剪贴板粘贴而不是逐字输入（0 = 从不）")
+        self.paste.valueChanged.connect(self.refresher.request_full)
+        self.compare = QCheckBox("显示优化前后")
+        self.compare.toggled.connect(self.refresher.request_full)
+        self.runtime = runtime_combo("AHK 默认", RUNTIME_LABELS)
+        self.runtime.setToolTip("写入脚本头部的发送模式、延迟、热键限制和进程优先级")
+        self.runtime.currentIndexChanged.connect(self.refresher.request)
+        opts = QHBoxLayout(); opts.addStretch()
+        opts.addWidget(self.optimize); opts.addWidget(self.compare)
+        opts.addWidget(self.table); opts.addWidget(self.dedup); opts.addWidget(self.paste)
+        opts.addWidget(QLabel("运行模式:")); opts.addWidget(self.runtime); opts.addStretch()
+
+        right = QVBoxLayout(); right.addWidget(self.preview_label); right.addWidget(self.preview)
+        right.addLayout(opts)
         disp = QHBoxLayout(); disp.setStretch(0, 1); disp.setStretch(1, 1)
         disp.addLayout(left); disp.addLayout(right)
         V.addLayout(disp)
@@ -449,20 +341,34 @@ class KeyMapper(QMainWindow):
         build.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Fixed)
         hb.addWidget(save, 1); hb.addWidget(build, 1)
         V.addLayout(hb)
+        hb = QHBoxLayout()
+        openp = QPushButton("打开项目…", clicked=self.open_project)
+        openp.setToolTip("从项目文件载入映射、热键和选项")
+        savep = QPushButton("保存项目…", clicked=self.save_project)
+        savep.setToolTip("将映射、热键和选项保存为项目文件")
+        hb.addWidget(openp, 1); hb.addWidget(savep, 1)
+        V.addLayout(hb)
 
         self.resize(500, 500)
 
+    def _key_picker(self):
+        """按需创建一次选择器，之后每次复用"""
+        if self._picker is None:
+            self._picker = KeyPicker(self)
+        self._picker.reset()
+        return self._picker
+
     def _pick_into(self,lineedit):
-        dlg=KeyPicker(self)
+        dlg=self._key_picker()
         if dlg.exec():
             lineedit.setText(dlg.result)
 
     def _add_key(self):
         sel=self.seq.selectedItems()
-        dlg=KeyPicker(self)
+        dlg=self._key_picker()
         if dlg.exec():
             if len(sel)==1:
-                sel[0].setText(dlg.result)
+                set_seq_token(sel[0],dlg.result)
             else:
                 self.seq.addItem(dlg.result)
 
@@ -472,7 +378,7 @@ class KeyMapper(QMainWindow):
         if ok:
             txt=f"{val:g} s"
             if len(sel)==1:
-                sel[0].setText(txt)
+                set_seq_token(sel[0],txt)
             else:
                 self.seq.addItem(txt)
 
@@ -482,7 +388,7 @@ class KeyMapper(QMainWindow):
         if ok and txt:
             lit=f'"{txt}"'
             if len(sel)==1:
-                sel[0].setText(lit)
+                set_seq_token(sel[0],lit)
             else:
                 self.seq.addItem(lit)
 
@@ -494,7 +400,7 @@ class KeyMapper(QMainWindow):
         multi=len(sels)>1
         if not multi:
             editA=menu.addAction("Edit")
-        repA=menu.addAction("Replicate")
+        repA=menu.addAction("Repeat…")
         remA=menu.addAction("Remove")
         act=menu.exec(self.seq.mapToGlobal(pos))
         if act==remA:
@@ -502,89 +408,87 @@ class KeyMapper(QMainWindow):
             for r in rows:
                 self.seq.takeItem(r)
         elif act==repA:
-            for it in sels:
-                self.seq.addItem(it.text())
+            n,ok=QInputDialog.getInt(self,"Repeat","重复次数：",2,0,1_000_000)
+            if ok:
+                # 选中的步骤折叠成一个 Repeat 步骤，放在第一个选中位置
+                rows=sorted(self.seq.row(it) for it in sels)
+                tokens=[seq_token(self.seq.item(r)) for r in rows]
+                for r in reversed(rows):
+                    self.seq.takeItem(r)
+                self.seq.insertItem(rows[0],seq_item(repeat_token(n,tokens)))
         elif not multi and act==editA:
-            it=sels[0]; txt=it.text()
-            # detect type
-            if m:=re.fullmatch(r"(\d+(?:\.\d+)?)\s*s",txt):
-                val=float(m.group(1))
-                new,ok=QInputDialog.getDouble(self,"Edit Delay","Seconds:",val,0.0,3600.0,2)
-                if ok: it.setText(f"{new:g} s")
-            elif txt.startswith('"') and txt.endswith('"'):
-                inner=txt[1:-1]
-                new,ok=QInputDialog.getText(self,"Edit Text","Text to send:",text=inner)
-                if ok: it.setText(f'"{new}"')
+            it=sels[0]; txt=seq_token(it)
+            # 按解析出的步骤类型编辑
+            if (step:=parse_step(txt)).kind is StepKind.REPEAT:
+                new,ok=QInputDialog.getInt(self,"Edit Repeat","重复次数：",step.value,0,1_000_000)
+                if ok: set_seq_token(it,repeat_token(new,step.body))
+            elif step.kind is StepKind.SLEEP:
+                new,ok=QInputDialog.getDouble(self,"Edit Delay","Seconds:",step.value/1000,0.0,3600.0,2)
+                if ok: set_seq_token(it,f"{new:g} s")
+            elif step.kind is StepKind.TEXT:
+                new,ok=QInputDialog.getText(self,"Edit Text","Text to send:",text=step.value)
+                if ok: set_seq_token(it,f'"{new}"')
             else:
-                dlg=KeyPicker(self)
-                if dlg.exec(): it.setText(dlg.result)
+                dlg=self._key_picker()
+                if dlg.exec(): set_seq_token(it,dlg.result)
 
     def add_mapping(self):
-        # toggle control
-        t = self.toggle.text().strip()
-        if t:
-            key = f"Toggle → {t}"
-            if 'toggle' not in self.control_items:
-                item = QListWidgetItem(key)
-                self.maplist.addItem(item)
-                self.control_items['toggle'] = item
-            else:
-                self.control_items['toggle'].setText(key)
-
-        # exit control
-        e = self.exit.text().strip()
-        if e:
-            key = f"Exit → {e}"
-            if 'exit' not in self.control_items:
-                item = QListWidgetItem(key)
-                self.maplist.addItem(item)
-                self.control_items['exit'] = item
-            else:
-                self.control_items['exit'].setText(key)
-
-        # Info control
-        i = self.info.text().strip()
-        if i:
-            key = f"Info → {i}"
-            if 'info' not in self.control_items:
-                item = QListWidgetItem(key)
-                self.maplist.addItem(item)
-                self.control_items['info'] = item
-            else:
-                self.control_items['info'].setText(key)
+        # 热键冲突检查（按规范化后的热键比较，"Ctrl+A" 与 "ctrl-a" 视为同一个）
+        trig = self.trigger.text().strip()
+        controls = [self.toggle.text().strip(), self.exit.text().strip(),
+                    self.info.text().strip()]
+        dupes = find_duplicates([k for k in [trig] + controls if k])
+        if dupes:
+            QMessageBox.warning(self, "热键冲突", f"热键“{dupes[0]}”被重复使用！")
+            return
+        for key in controls:
+            if key and (mid := self.maps.find(key)) is not None:
+                QMessageBox.warning(
+                    self, "热键冲突",
+                    f"热键“{key}”已被映射“{self.maps.get(mid).trigger}”占用！")
+                return
+        if trig and self.seq.count() and (mid := self.maps.find(trig)) is not None:
+            QMessageBox.warning(
+                self, "热键冲突",
+                f"触发热键“{trig}”已映射到其他序列（“{self.maps.get(mid).trigger}”）。")
+            return
+
+        # toggle / exit / info controls
+        for name, key in zip(("toggle", "exit", "info"), controls):
+            if key:
+                self.mapmodel.set_control(name, key)
 
         # normal mapping (only if you actually picked a trigger + built a sequence)
-        trig = self.trigger.text().strip()
-        steps = [self.seq.item(j).text() for j in range(self.seq.count())]
+        steps = [seq_token(self.seq.item(j)) for j in range(self.seq.count())]
         if trig and steps:
-            self.maps.append((trig, steps))
-            self.maplist.addItem(f"{trig} → {', '.join(steps)}")
+            self.mapmodel.append_mapping(
+                Mapping(trig, intern_tokens(steps), self.map_runtime.currentData(),
+                        self.map_chunked.isChecked()))
+            self.script.insert(len(self.maps) - 1, self._profile())
             self.trigger.clear()
             self.seq.clear()
 
         # always refresh the preview, so Toggle/Exit/Info show up immediately
-        self._refresh()
+        self.refresher.request()
 
     def _maplist_context_menu(self,pos):
-        item=self.maplist.itemAt(pos)
-        if not item:
+        index=self.maplist.indexAt(pos)
+        if not index.isValid():
             return
         menu=QMenu(self)
         rem=menu.addAction("Remove mapping")
         act=menu.exec(self.maplist.mapToGlobal(pos))
         if act==rem:
-            row=self.maplist.row(item)
-            if item in self.control_items.values():
-                for k,v in list(self.control_items.items()):
-                    if v is item:
-                        getattr(self,k).clear()
-                        del self.control_items[k]
-                        break
+            row=index.row()
+            if (k:=self.mapmodel.control_at(row)) is not None:
+                getattr(self,k).clear()
+                self.mapmodel.set_control(k,"")
             else:
-                offset=len(self.control_items)
-                self.maps.pop(row-offset)
-            self.maplist.takeItem(row)
-            self._refresh()
+                mid=self.mapmodel.mapping_id(row)
+                idx=self.maps.index_of(mid)
+                self.mapmodel.remove_mapping(mid)
+                self.script.remove(idx, self._profile())
+            self.refresher.request()
 
     def _reset_all(self):
         ans=QMessageBox.question(self,"Confirm Reset",
@@ -595,117 +499,176 @@ class KeyMapper(QMainWindow):
             for fld in (self.trigger,self.toggle,self.exit,self.info):
                 fld.clear()
             self.seq.clear()
-            self.maps.clear()
-            self.control_items.clear()
-            self.maplist.clear()
-            self.preview.clear()
-            self._refresh()
+            self.mapmodel.clear()
+            self.project_extra = {}
+            self.refresher.request_full()
+
+    def _profile(self) -> Profile:
+        """Snapshot of the current widgets as an engine profile."""
+        try:
+            exe_delay = float(self.exe_delay.text().strip() or 0)
+        except ValueError:
+            exe_delay = 0.0
+        exe_path, launch = self.exe_path.text(), []
+        if exe_path.strip() and self.exe_wait.currentData():
+            try:
+                timeout = float(self.exe_timeout.text().strip() or 10)
+            except ValueError:
+                timeout = 10.0
+            launch = [Launch(exe_path.strip(), self.exe_params.text(),
+                             self.exe_wait.currentData(),
+                             self.exe_target.text().strip(), timeout, exe_delay)]
+            exe_path = ""
+        return Profile(
+            maps=self.maps,
+            toggle=self.toggle.text(),
+            exit=self.exit.text(),
+            info=self.info.text(),
+            exe_path=exe_path,
+            exe_delay=exe_delay,
+            exe_params=self.exe_params.text(),
+            optimize=self.optimize.isChecked(),
+            runtime=self.runtime.currentData(),
+            layout="table" if self.table.isChecked() else "blocks",
+            dedup=self.dedup.currentData(),
+            paste_threshold=self.paste.value(),
+            launch=launch + self.project_extra.get("launch", []),
+        )
+
+    def _apply_settings(self, profile):
+        """在控件中显示 profile 的热键和选项"""
+        for name in ("toggle", "exit", "info"):
+            getattr(self, name).setText(getattr(profile, name))
+            self.mapmodel.set_control(name, getattr(profile, name))
+        self.optimize.setChecked(profile.optimize)
+        self.runtime.setCurrentIndex(max(self.runtime.findData(profile.runtime), 0))
+        self.table.setChecked(profile.layout == "table")
+        self.dedup.setCurrentIndex(max(self.dedup.findData(profile.dedup), 0))
+        self.paste.setValue(profile.paste_threshold)
+        # 第一个简单的启动项放进 EXE 一栏，其余原样保留
+        launch = list(profile.launch)
+        first = launch[0] if launch and not profile.exe_path.strip() else None
+        if first and first.wait and first == Launch(*first[:6]):
+            del launch[0]
+            path, params, wait, target, timeout, delay = first[:6]
+        else:
+            path, params, wait, target, timeout, delay = (
+                profile.exe_path, profile.exe_params, "", "", 10.0, profile.exe_delay)
+        self.exe_path.setText(path)
+        self.exe_params.setText(params)
+        self.exe_delay.setText(f"{delay:g}" if delay else "")
+        self.exe_wait.setCurrentIndex(max(self.exe_wait.findData(wait), 0))
+        self.exe_target.setText(target)
+        self.exe_timeout.setText(f"{timeout:g}" if timeout != 10 else "")
+        self.project_extra = {"launch": launch}
+
+    def batch_update(self):
+        """块内的预览刷新全部推迟到结束时执行一次"""
+        return self.refresher.batch()
+
+    def _rerender(self):
+        """优化选项会影响每个映射块，整体重新生成预览"""
+        self.script.compare = self.compare.isChecked()
+        profile = self._profile()
+        self.script.reset(profile)
+        self.mapmodel.set_timing(profile)
+        self._show_savings(profile)
 
     def _refresh(self):
-        if not (self.maps or self.toggle.text().strip() or
-                self.exit.text().strip()):
-            self.preview.clear()
+        profile = self._profile()
+        self.script.refresh(profile)
+        self.mapmodel.set_timing(profile)
+        self._show_savings(profile)
+
+    def _show_savings(self, profile):
+        # two full renders in dedup mode, so size them off the GUI thread
+        if not profile.dedup:
+            self.savings.cancel()
+            self._set_savings(0)
             return
+        snapshot = profile.snapshot()
+        self.savings.submit(lambda cancelled: dedup_savings(snapshot),
+                            self._set_savings)
 
-        lines=[
-            "; generated by KeyMapper",
-            "#Requires AutoHotkey v2.0+",
-            "",
-            "global scriptEnabled := true",
-            "global infoVisible := false",
-            ""
-        ]
-
-        # 修改：改进的EXE启动逻辑
-        exe_path = self.exe_path.text().strip()
-        exe_delay = self.exe_delay.text().strip()
-        exe_params = self.exe_params.text().strip()
-        
-        if exe_path:
-            delay_ms = int(float(exe_delay) * 1000) if exe_delay else 0
-            
-            # 合并路径和参数
-            if exe_params:
-                command_line = f'"{exe_path} {exe_params}"'
-            else:
-                command_line = f'"{exe_path}"'
-                
-            lines.extend([
-                f'Run {command_line}, , "UseErrorLevel"',
-                f"Sleep {delay_ms}",
-                ""
-            ])
-
-        if t:=self.toggle.text().strip():
-            th=hotkey_to_ahk(t)
-            lines+=[
-                f"{th}:: {{",
-                "    global scriptEnabled",
-                "    scriptEnabled := !scriptEnabled",
-                "    ToolTip(scriptEnabled?\"ENABLED\":\"DISABLED\")",
-                "    SetTimer(() => ToolTip(), -1000)",
-                "}",
-                ""
-            ]
-        if e:=self.exit.text().strip():
-            lines.append(f"{hotkey_to_ahk(e)}::ExitApp")
-            lines.append("")
-        if i:=self.info.text().strip():
-            ih=hotkey_to_ahk(i)
-            info_lines=[]
-            for hk,steps in self.maps:
-                clean=[s[1:-1] if s.startswith('"') and s.endswith('"') else s
-                       for s in steps]
-                info_lines.append(f"{hk} → {', '.join(clean)}")
-            tip="Info:`n"+ "`n".join(info_lines)
-            lines+=[
-                f"{ih}:: {{",
-                "    global infoVisible",
-                "    if infoVisible {",
-                "        ToolTip()",
-                "        infoVisible := false",
-                "    } else {",
-                f'        ToolTip("{tip}")',
-                "        SetTimer(() => ToolTip(), -5000)",
-                "        infoVisible := true",
-                "    }",
-                "}",
-                ""
-            ]
-        lines.append("#HotIf scriptEnabled")
-        for hk,steps in self.maps:
-            ah=hotkey_to_ahk(hk)
-            body=[to_ahk_step(s) for s in steps]
-            if len(body)==1:
-                lines.append(f"{ah}:: {body[0]}")
-            else:
-                lines.append(f"{ah}::")
-                lines.append("{")
-                for b in body:
-                    lines.append(f"    {b}")
-                lines.append("}")
-        lines.append("#HotIf")
-        self.preview.setPlainText("\n".join(lines))
+    def _set_savings(self, saved):
+        self.preview_label.setText(f"AutoHotKey 脚本 — 共享序列节省 {saved:,} 字节" if saved else "AutoHotKey 脚本")
 
     def save_ahk(self):
         p,_=QFileDialog.getSaveFileName(self,"Save AHK","keymap.ahk","AHK (*.ahk)")
         if p:
-            Path(p).write_text(self.preview.toPlainText(),encoding="utf-8")
+            # stream straight from the engine; the preview is display-only
+            save_script(self._profile(), p)
+
+    def open_project(self):
+        p, _ = QFileDialog.getOpenFileName(self, "打开项目", "", OPEN_FILTER)
+        if not p:
+            return
+        skipped = ()
+        try:
+            if Path(p).suffix.lower() == ".ahk":
+                profile, skipped = import_script(p)
+                maps = profile.maps
+            else:
+                settings, maps = read_project(p)
+                profile = Profile.from_dict(settings)
+            with self.batch_update():
+                self._apply_settings(profile)
+                # maps 已完整读取并校验：坏文件在此之前就已失败
+                self.mapmodel.load(maps)
+                self.refresher.request_full()
+        except (OSError, ValueError, KeyError, TypeError, IndexError) as e:
+            QMessageBox.warning(self, "打开失败", f"无法读取 {Path(p).name}：\n{e}")
+            return
+        if skipped:
+            lines = "\n".join(f"{s.line}: {s.reason}: {s.text}" for s in skipped[:20])
+            if len(skipped) > 20:
+                lines += f"\n……另有 {len(skipped) - 20:,} 行"
+            QMessageBox.information(self, "脚本已导入", f"{Path(p).name} 中有 {len(skipped):,} 行无法导入：\n\n" + lines)
+
+    def save_project(self):
+        p, _ = QFileDialog.getSaveFileName(self, "保存项目", "keymap.pyahk", PROJECT_FILTER)
+        if p:
+            save_project(self._profile(), p)
 
     def build_exe(self):
-        exe=shutil.which("Ahk2Exe.exe")
+        if self._building:
+            QMessageBox.information(self,"Build Running","构建正在进行中。")
+            return
+        exe=find_ahk2exe()
         if not exe:
             QMessageBox.warning(self,"Ahk2Exe not found",
                                 "Place Ahk2Exe.exe in PATH.")
             return
-        with tempfile.TemporaryDirectory() as tmp:
-            src=Path(tmp)/"temp.ahk"
-            src.write_text(self.preview.toPlainText(),encoding="utf-8")
-            dst,_=QFileDialog.getSaveFileName(self,"Save EXE","keymap.exe","EXE (*.exe)")
-            if dst:
-                subprocess.run([exe,"/in",src,"/out",dst],
-                               stdout=subprocess.DEVNULL,stderr=subprocess.DEVNULL)
-                QMessageBox.information(self,"Done",f"Created {dst}")
+        dst,_=QFileDialog.getSaveFileName(self,"Save EXE","keymap.exe","EXE (*.exe)")
+        if not dst:
+            return
+        tmp=tempfile.TemporaryDirectory()
+        src=Path(tmp.name)/"temp.ahk"
+        save_script(self._profile(),src)
+
+        # 脚本、编译器都没变时直接复用缓存的 exe
+        base=find_base_binary()
+        key=cache_key(src,exe,base)
+        if self.compile_cache.get(key,dst):
+            tmp.cleanup()
+            QMessageBox.information(self,"Done",f"Created {dst}\n(compile cache hit)")
+            return
+
+        def done(res):
+            tmp.cleanup()
+            self._building=False
+            if res.ok:
+                try:
+                    self.compile_cache.put(key,dst)
+                except OSError:
+                    pass
+                QMessageBox.information(self,"Done",f"Created {dst}\n(compile cache miss)")
+            elif not res.cancelled:
+                QMessageBox.critical(self,"Compile Failed",res.error_text())
+
+        # 后台编译，界面保持可用
+        self._building=True
+        run_with_progress(self,compile_command(exe,src,dst,base),"正在编译…",done,"取消")
 
 if __name__=="__main__":
     app=QApplication(sys.argv)
@@ -0,0 +1,10 @@
+"""pyAHK script generation engine, usable without PyQt6."""
+from .engine import (
+    Mapping, Profile, iter_script, render_script, save_script, write_script,
+)
+from .steps import Step, StepKind, hotkey_to_ahk, parse_step, to_ahk_step
+
+__all__ = [
+    "Mapping", "Profile", "Step", "StepKind", "hotkey_to_ahk", "iter_script",
+    "parse_step", "render_script", "save_script", "to_ahk_step", "write_script",
+]
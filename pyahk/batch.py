@@ -0,0 +1,129 @@
+"""Compile many profiles to executables at once.
+
+Each profile is rendered to a temp ``.ahk`` and handed to Ahk2Exe through
+:class:`~pyahk.compiler.ProcessJob`; a bounded thread pool keeps at most
+``workers`` compilers alive (threads are enough, the work happens in the
+child processes).  Runs that time out or never start are retried with
+backoff, since on Windows those are usually a locked file or a busy
+antivirus scan rather than a broken script.
+"""
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from .cache import cache_key
+from .compiler import ProcessJob, compile_command
+from .engine import is_empty, save_script
+from .latency import budget_error, over_budget
+from .project import load_profile
+
+DEFAULT_TIMEOUT = 120.0
+DEFAULT_RETRIES = 2
+RETRY_BACKOFF = 0.5             # seconds, doubled per attempt
+
+@dataclass
+class BuildReport:
+    src: str
+    out: str
+    ok: bool = False
+    cached: bool = False
+    attempts: int = 0
+    elapsed: float = 0.0
+    error: str = ""
+
+def stem_clashes(sources) -> list:
+    """For each source, the earlier source whose output it would overwrite.
+
+    Outputs are named after the file stem, so ``a/x.json`` and ``b/x.json``
+    (or ``X.json``, on Windows' case-insensitive file systems) collide;
+    entries are None where the name is free.
+    """
+    seen, clashes = {}, []
+    for src in sources:
+        stem = Path(src).stem.lower()
+        clashes.append(seen.get(stem))
+        seen.setdefault(stem, src)
+    return clashes
+
+def _transient(res) -> bool:
+    """Worth another try: timed out, or the compiler never started."""
+    return not res.cancelled and (res.timed_out or res.returncode is None)
+
+def compile_one(src, out_dir, ahk2exe, base=None, cache=None,
+                timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, budget=0):
+    """Build ``out_dir/<stem>.exe`` from profile ``src``; never raises.
+
+    With ``budget`` (ms), a profile with any hotkey estimated to block
+    longer fails without running the compiler.
+    """
+    # absolute: the compiler runs with the temp dir as its working directory
+    dst = Path(out_dir).absolute() / (Path(src).stem + ".exe")
+    rep = BuildReport(str(src), str(dst))
+    t0 = time.monotonic()
+    try:
+        profile = load_profile(src)
+        if is_empty(profile):
+            rep.error = "profile has no mappings"
+            return rep
+        if budget and (slow := over_budget(profile, budget)):
+            rep.error = budget_error(slow, budget)
+            return rep
+        with tempfile.TemporaryDirectory() as tmp:
+            script = Path(tmp) / (Path(src).stem + ".ahk")
+            save_script(profile, script)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            key = cache_key(script, ahk2exe, base) if cache is not None else None
+            if key and cache.get(key, dst):
+                rep.ok = rep.cached = True
+                return rep
+            args = compile_command(ahk2exe, script, dst, base)
+            for attempt in range(retries + 1):
+                rep.attempts = attempt + 1
+                res = ProcessJob(args, timeout=timeout, cwd=tmp).start().wait()
+                if res.ok or not _transient(res):
+                    break
+                time.sleep(RETRY_BACKOFF * 2 ** attempt)
+            rep.ok = res.ok
+            if not res.ok:
+                rep.error = res.error_text()
+            elif key:
+                try:
+                    cache.put(key, dst)
+                except OSError:
+                    pass                # a cold cache is not a failed build
+    except Exception as e:              # report, keep the batch going
+        rep.error = f"{type(e).__name__}: {e}"
+    finally:
+        rep.elapsed = time.monotonic() - t0
+    return rep
+
+def compile_profiles(sources, out_dir, ahk2exe, base=None, cache=None,
+                     workers=None, timeout=DEFAULT_TIMEOUT,
+                     retries=DEFAULT_RETRIES, budget=0, on_report=None):
+    """Compile every profile in ``sources``; returns reports in input order.
+
+    ``on_report(report)`` is called from worker threads as each build ends.
+    """
+    sources = list(sources)
+    if not sources:
+        return []
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sources)))
+
+    def run(src, clash):
+        if clash is None:
+            rep = compile_one(src, out_dir, ahk2exe, base, cache, timeout,
+                              retries, budget)
+        else:
+            dst = Path(out_dir).absolute() / (Path(src).stem + ".exe")
+            rep = BuildReport(str(src), str(dst),
+                              error=f"{dst.name} is already built from {clash}")
+        if on_report is not None:
+            on_report(rep)
+        return rep
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, sources, stem_clashes(sources)))
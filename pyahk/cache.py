@@ -0,0 +1,99 @@
+"""On-disk cache of compiled executables.
+
+An Ahk2Exe run costs seconds, yet the same script is often rebuilt with the
+same base binary and compiler.  Artifacts are stored under a key hashed from
+the script bytes, the base binary's identity and the compiler's identity, and
+evicted least-recently-used once the cache grows past ``max_bytes``.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+KEY_VERSION = b"pyahk-compile-1"
+
+def default_cache_dir() -> Path:
+    if base := os.environ.get("LOCALAPPDATA"):
+        return Path(base) / "pyAHK" / "compile-cache"
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "pyahk" / "compile"
+
+def _identity(path) -> bytes:
+    """Path, size and mtime: cheap, and changes whenever the binary does."""
+    if not path:
+        return b"-"
+    p = Path(path)
+    try:
+        st = p.stat()
+    except OSError:
+        return os.fsencode(str(p))
+    return f"{p.resolve()}|{st.st_size}|{st.st_mtime_ns}".encode()
+
+def cache_key(script_path, ahk2exe, base=None) -> str:
+    """Hash of the script file plus compiler and base binary identities."""
+    h = hashlib.sha256(KEY_VERSION)
+    h.update(b"\0" + _identity(ahk2exe) + b"\0" + _identity(base) + b"\0")
+    with open(script_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class CompileCache:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root) if root else default_cache_dir()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _entry(self, key) -> Path:
+        return self.root / f"{key}.exe"
+
+    def get(self, key, dest) -> bool:
+        """Copy the cached artifact to ``dest``; False on a miss."""
+        entry = self._entry(key)
+        try:
+            shutil.copyfile(entry, dest)
+        except OSError:                     # no entry, or dest locked/unwritable
+            self.misses += 1
+            return False
+        try:
+            os.utime(entry)                 # bump for LRU
+        except OSError:
+            pass
+        self.hits += 1
+        return True
+
+    def put(self, key, artifact):
+        """Store a freshly built ``artifact``, then trim the cache."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".part")
+        os.close(fd)
+        try:
+            shutil.copyfile(artifact, tmp)
+            os.replace(tmp, self._entry(key))
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Drop least-recently-used entries until under ``max_bytes``."""
+        entries = []
+        for p in self.root.glob("*.exe"):
+            try:
+                st = p.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        for p in self.root.glob("*.exe"):
+            p.unlink(missing_ok=True)
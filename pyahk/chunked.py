@@ -0,0 +1,106 @@
+"""Run long sequences as timer-driven chunks instead of one blocking thread.
+
+A hotkey body with ``Sleep`` in it holds its thread for the whole macro,
+so the toggle key, the info tooltip and other mappings wait behind it.  A
+chunked mapping instead hands ``RunChunks`` an array of closures and
+delays: each closure is the run of statements between two sleeps, and
+each delay is a one-shot ``SetTimer`` that schedules the rest.  The thread
+ends after every chunk, and the toggle key bumps ``chunkRun`` so pending
+chunks of running macros see they were cancelled and stop.
+
+Repeats are unrolled (a timer cannot resume inside ``Loop``), and the
+per-thread runtime settings are re-applied in every chunk since each one
+runs in a fresh thread.
+"""
+import re
+from functools import lru_cache, partial
+
+from .peephole import optimize_steps
+from .runtime import thread_settings
+from .steps import StepKind, ahk_string, hotkey_to_ahk, parse_step
+
+RUNNER = (
+    "global chunkRun := 0",
+    "",
+    "RunChunks(chunks, i := 1, run := -1) {",
+    "    if run = -1",
+    "        run := chunkRun",
+    "    while i <= chunks.Length {",
+    "        if run != chunkRun || !scriptEnabled",
+    "            return",
+    "        chunk := chunks[i++]",
+    "        if chunk is Integer {",
+    "            SetTimer(RunChunks.Bind(chunks, i, run), -chunk)",
+    "            return",
+    "        }",
+    "        chunk()",
+    "    }",
+    "}",
+    "",
+)
+# appended to the toggle hotkey's body
+CANCEL = ("    global chunkRun", "    chunkRun += 1")
+
+_COMMAND = re.compile(r"(\w+) (.*)")
+
+def step_call(step, paste: int = 0) -> str:
+    """``step`` as a function call, usable inside a ``=>`` closure."""
+    kind = step.kind
+    if kind is StepKind.KEY:
+        return f"Send({ahk_string(step.send)})"
+    if kind is StepKind.TEXT:
+        if paste and len(step.value) > paste:
+            return f"PasteText({ahk_string(step.value)})"
+        return f"SendText({ahk_string(step.value)})"
+    if step.value is not None:
+        return f"Click({step.value})"
+    options = step.key[5:].strip()
+    return f"Click({ahk_string(options)})" if options else "Click()"
+
+def _flat(tokens, expand):
+    steps = expand(tokens) if expand else map(parse_step, tokens)
+    for step in steps:
+        if step.kind is StepKind.REPEAT:
+            for _ in range(step.value):
+                yield from _flat(step.body, expand)
+        else:
+            yield step
+
+def chunks(tokens, expand=None, paste: int = 0) -> list:
+    """Call tuples for the runs between sleeps, with each sleep's ms between."""
+    out, run = [], []
+    for step in _flat(tokens, expand):
+        if step.kind is StepKind.SLEEP:
+            if run:
+                out.append(tuple(run))
+                run = []
+            out.append(max(step.value, 1))  # SetTimer -0 would not fire once
+        else:
+            run.append(step_call(step, paste))
+    if run:
+        out.append(tuple(run))
+    while out and isinstance(out[-1], int):
+        out.pop()                       # nothing left to wait for
+    return out
+
+@lru_cache(maxsize=65536)
+def render_chunked(trigger: str, steps: tuple, optimize: bool = False,
+                   runtime: str = "", paste: int = 0):
+    """Lines of one chunked ``hotkey::`` block; None if nothing waits mid-way."""
+    expand = partial(optimize_steps, paste=paste) if optimize else None
+    items = chunks(steps, expand, paste)
+    if not any(isinstance(item, int) for item in items):
+        return None
+    settings = tuple(_COMMAND.sub(r"\1(\2)", s) for s in thread_settings(runtime))
+    entries = []
+    for item in items:
+        if isinstance(item, int):
+            entries.append(str(item))
+            continue
+        calls = (*settings, *item)
+        entries.append("() => " + (calls[0] if len(calls) == 1
+                                   else f"({', '.join(calls)})"))
+    body = [f"        {e}," for e in entries]
+    body[-1] = body[-1][:-1]
+    return (f"{hotkey_to_ahk(trigger)}::", "{", "    RunChunks([", *body,
+            "    ])", "}")
@@ -0,0 +1,237 @@
+"""``python -m pyahk`` – headless batch tools.
+
+    python -m pyahk build profiles/*.json -o out/ [-j N] [--budget MS]
+    python -m pyahk compile profiles/*.json -o out/ [-j N] [--timeout S] [--budget MS]
+    python -m pyahk import scripts/ -o out/ [-j N] [--binary]
+
+Never imports PyQt6, so it can run on build servers without a display.
+"""
+import argparse
+import dataclasses
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .batch import (
+    DEFAULT_RETRIES, DEFAULT_TIMEOUT, compile_profiles, stem_clashes,
+)
+from .cache import CompileCache
+from .compiler import find_ahk2exe, find_base_binary
+from .engine import dedup_savings, save_script
+from .importer import import_script
+from .latency import budget_error, over_budget
+from .project import BINARY_SUFFIX, load_profile, save_project
+
+
+def _expand(patterns):
+    # cmd.exe/PowerShell don't expand globs for us
+    for pat in patterns:
+        hits = sorted(glob.glob(pat)) if glob.has_magic(pat) else [pat]
+        yield from hits
+
+
+def _build_one(job):
+    src, out_dir, budget, clash = job
+    try:
+        dst = Path(out_dir) / (Path(src).stem + ".ahk")
+        if clash is not None:
+            return src, None, f"{dst.name} is already built from {clash}", 0
+        profile = load_profile(src)
+        if budget and (slow := over_budget(profile, budget)):
+            return src, None, budget_error(slow, budget), 0
+        save_script(profile, dst)
+        return src, str(dst), None, dedup_savings(profile)
+    except Exception as e:                      # report, keep the batch going
+        return src, None, f"{type(e).__name__}: {e}", 0
+
+
+def cmd_build(args) -> int:
+    sources = list(_expand(args.profiles))
+    if not sources:
+        print("no profiles matched", file=sys.stderr)
+        return 2
+    out_dir = Path(args.output)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = [(s, str(out_dir), args.budget, clash)
+            for s, clash in zip(sources, stem_clashes(sources))]
+    workers = min(args.jobs or os.cpu_count() or 1, len(jobs))
+    failed = saved = 0
+
+    def report(results):
+        nonlocal failed, saved
+        for src, dst, err, shared in results:
+            saved += shared
+            if err:
+                failed += 1
+                print(f"FAIL {src}: {err}", file=sys.stderr)
+            elif args.verbose:
+                note = f" ({shared:,} bytes saved by sharing)" if shared else ""
+                print(f"{src} -> {dst}{note}")
+
+    if workers == 1:
+        report(map(_build_one, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # each job is tiny, so hand work out in chunks to keep IPC cheap
+            chunk = max(1, len(jobs) // (workers * 8))
+            report(pool.map(_build_one, jobs, chunksize=chunk))
+    note = f", {saved:,} bytes saved by sharing" if saved else ""
+    print(f"built {len(jobs) - failed}/{len(jobs)} profiles into {out_dir}{note}")
+    return 1 if failed else 0
+
+
+def _scripts(patterns):
+    for src in _expand(patterns):
+        if os.path.isdir(src):
+            yield from sorted(map(str, Path(src).rglob("*.ahk")))
+        else:
+            yield src
+
+
+def _import_one(job):
+    src, out_dir, binary, clash = job
+    try:
+        dst = Path(out_dir) / (Path(src).stem + (BINARY_SUFFIX if binary
+                                                 else ".pyahk"))
+        if clash is not None:
+            return src, None, f"{dst.name} is already imported from {clash}", 0, []
+        profile, skipped = import_script(src)
+        save_project(profile, dst, binary)
+        return src, str(dst), None, len(profile.maps), skipped
+    except Exception as e:                      # report, keep the batch going
+        return src, None, f"{type(e).__name__}: {e}", 0, []
+
+
+def cmd_import(args) -> int:
+    sources = list(_scripts(args.scripts))
+    if not sources:
+        print("no scripts matched", file=sys.stderr)
+        return 2
+    out_dir = Path(args.output)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    jobs = [(s, str(out_dir), args.binary, clash)
+            for s, clash in zip(sources, stem_clashes(sources))]
+    workers = min(args.jobs or os.cpu_count() or 1, len(jobs))
+    failed = mapped = dropped = 0
+
+    def report(results):
+        nonlocal failed, mapped, dropped
+        for src, dst, err, n, skipped in results:
+            mapped += n
+            dropped += len(skipped)
+            if err:
+                failed += 1
+                print(f"FAIL {src}: {err}", file=sys.stderr)
+                continue
+            if args.verbose:
+                print(f"{src} -> {dst} ({n:,} mappings)")
+                for line, text, reason in skipped:
+                    print(f"{src}:{line}: {reason}: {text}", file=sys.stderr)
+            elif skipped:
+                print(f"{src}: {len(skipped):,} lines skipped (-v lists them)",
+                      file=sys.stderr)
+
+    t0 = time.monotonic()
+    if workers == 1:
+        report(map(_import_one, jobs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk = max(1, len(jobs) // (workers * 8))
+            report(pool.map(_import_one, jobs, chunksize=chunk))
+    print(f"imported {len(jobs) - failed}/{len(jobs)} scripts into {out_dir} "
+          f"({mapped:,} mappings, {dropped:,} lines skipped, "
+          f"{time.monotonic() - t0:.1f} s)")
+    return 1 if failed else 0
+
+
+def cmd_compile(args) -> int:
+    sources = list(_expand(args.profiles))
+    if not sources:
+        print("no profiles matched", file=sys.stderr)
+        return 2
+    ahk2exe = find_ahk2exe(args.ahk2exe)
+    if ahk2exe is None:
+        print("Ahk2Exe.exe not found (use --ahk2exe)", file=sys.stderr)
+        return 2
+    base = find_base_binary(args.bin)
+    if args.bin and base is None:
+        print(f"base binary not found: {args.bin}", file=sys.stderr)
+        return 2
+    cache = None if args.no_cache else CompileCache()
+
+    def report(rep):
+        if not rep.ok:
+            print(f"FAIL {rep.src}: {rep.error}", file=sys.stderr)
+        elif args.verbose:
+            how = "cached" if rep.cached else f"{rep.elapsed:.1f} s"
+            print(f"{rep.src} -> {rep.out} ({how})")
+
+    t0 = time.monotonic()
+    reports = compile_profiles(sources, args.output, ahk2exe, base, cache,
+                               workers=args.jobs, timeout=args.timeout,
+                               retries=args.retries, budget=args.budget,
+                               on_report=report)
+    ok = sum(r.ok for r in reports)
+    cached = sum(r.cached for r in reports)
+    retried = sum(r.attempts > 1 for r in reports)
+    print(f"compiled {ok}/{len(reports)} profiles into {args.output} "
+          f"({cached} cached, {retried} retried, "
+          f"{time.monotonic() - t0:.1f} s)")
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            json.dump([dataclasses.asdict(r) for r in reports], fh, indent=2)
+    return 0 if ok == len(reports) else 1
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="pyahk")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="generate .ahk scripts from JSON profiles")
+    b.add_argument("profiles", nargs="+", help="profile files or glob patterns")
+    b.add_argument("-o", "--output", default=".", help="output directory")
+    b.add_argument("-j", "--jobs", type=int, default=0,
+                   help="worker processes (default: CPU count)")
+    b.add_argument("--budget", type=int, default=0, metavar="MS",
+                   help="fail profiles with a hotkey estimated to block longer")
+    b.add_argument("-v", "--verbose", action="store_true")
+    b.set_defaults(func=cmd_build)
+
+    c = sub.add_parser("compile", help="compile JSON profiles to .exe with Ahk2Exe")
+    c.add_argument("profiles", nargs="+", help="profile files or glob patterns")
+    c.add_argument("-o", "--output", default=".", help="output directory")
+    c.add_argument("-j", "--jobs", type=int, default=0,
+                   help="concurrent compilers (default: CPU count)")
+    c.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                   help="seconds per compiler run (default: %(default)s)")
+    c.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                   help="retries after a timeout or failed start (default: %(default)s)")
+    c.add_argument("--ahk2exe", help="Ahk2Exe executable (default: auto-detect)")
+    c.add_argument("--bin", help="AutoHotkey base binary (default: auto-detect)")
+    c.add_argument("--no-cache", action="store_true", help="skip the compile cache")
+    c.add_argument("--report", help="write a per-profile JSON report here")
+    c.add_argument("--budget", type=int, default=0, metavar="MS",
+                   help="fail profiles with a hotkey estimated to block longer")
+    c.add_argument("-v", "--verbose", action="store_true")
+    c.set_defaults(func=cmd_compile)
+
+    i = sub.add_parser("import", help="read .ahk scripts back into project files")
+    i.add_argument("scripts", nargs="+",
+                   help="scripts, directories (searched for *.ahk) or glob patterns")
+    i.add_argument("-o", "--output", default=".", help="output directory")
+    i.add_argument("-j", "--jobs", type=int, default=0,
+                   help="worker processes (default: CPU count)")
+    i.add_argument("--binary", action="store_true",
+                   help=f"write binary {BINARY_SUFFIX} projects")
+    i.add_argument("-v", "--verbose", action="store_true",
+                   help="list every skipped line")
+    i.set_defaults(func=cmd_import)
+
+    args = ap.parse_args(argv)
+    return args.func(args)
@@ -0,0 +1,172 @@
+"""Running Ahk2Exe (and friends) off the GUI thread.
+
+:class:`ProcessJob` runs one external command on a worker thread, streams
+its output lines to a progress callback, captures stdout/stderr and the exit
+code, and supports cancellation and a timeout.  It has no Qt dependency, so
+it can be driven by a stub compiler script on any platform; the GUIs wrap it
+in :class:`pyahk.widgets.ProcessRunner` to get Qt signals.
+"""
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+AHK_DIR = Path(r"C:\Program Files\AutoHotkey")
+AHK2EXE_PATH = AHK_DIR / "Compiler" / "Ahk2Exe.exe"
+INSTALLER_AHK = AHK_DIR / "UX" / "install-ahk2exe.ahk"
+# how long output may keep trickling in after the process exits: a child it
+# started (the installer opens Ahk2Exe) can hold the pipes open for good
+PUMP_GRACE = 1.0
+
+# ───────── discovery ─────────
+def find_ahk2exe(explicit=None):
+    """Ahk2Exe.exe from ``explicit``, the default install, or PATH; else None."""
+    if explicit:
+        return Path(explicit) if Path(explicit).exists() else None
+    if AHK2EXE_PATH.exists():
+        return AHK2EXE_PATH
+    found = shutil.which("Ahk2Exe.exe") or shutil.which("Ahk2Exe")
+    return Path(found) if found else None
+
+def find_base_binary(explicit=None):
+    """The v2 runtime matching this Python's bitness (else the 32-bit one)."""
+    if explicit:
+        return Path(explicit) if Path(explicit).exists() else None
+    v2dir = AHK_DIR / "v2"
+    ahk64 = v2dir / "AutoHotkey64.exe"
+    ahk32 = v2dir / "AutoHotkey32.exe"
+    is_64 = sys.maxsize > 2 ** 32
+    if is_64 and ahk64.exists():
+        return ahk64
+    if ahk32.exists():
+        return ahk32
+    return None
+
+# ───────── jobs ─────────
+@dataclass
+class ProcessResult:
+    args: list
+    returncode: object = None       # None if the process never ran
+    stdout: str = ""
+    stderr: str = ""
+    cancelled: bool = False
+    timed_out: bool = False
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not (self.cancelled or self.timed_out)
+
+    def error_text(self) -> str:
+        """Best human-readable reason for a failure."""
+        if self.cancelled:
+            return "Cancelled."
+        if self.timed_out:
+            return f"Timed out after {self.elapsed:.1f} s."
+        text = (self.stderr or self.stdout).strip()
+        if self.returncode is None:
+            return text or "Could not start process."
+        return text or f"Exited with code {self.returncode}."
+
+def compile_command(ahk2exe, src, out, base=None) -> list:
+    """Ahk2Exe command line, passing ``/bin`` only when a base is known."""
+    args = [str(ahk2exe), "/in", str(src), "/out", str(out)]
+    if base:
+        args += ["/bin", str(base)]
+    return args
+
+class ProcessJob:
+    """One external command on a worker thread.
+
+    ``on_progress(line)`` is called for every stdout/stderr line and
+    ``on_finished(result)`` exactly once; both run on worker threads.  With
+    ``capture=False`` the output goes to DEVNULL and nothing is read.
+    """
+    def __init__(self, args, on_progress=None, on_finished=None,
+                 timeout=None, cwd=None, capture=True):
+        self.args = [str(a) for a in args]
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.timeout = timeout
+        self.cwd = cwd
+        self.capture = capture
+        self.result = None
+        self._proc = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Kill the process (if still running); the result is marked cancelled."""
+        self._cancelled.set()
+        if self._proc is not None and self._proc.poll() is None:
+            self._proc.kill()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until finished; returns the :class:`ProcessResult` or None."""
+        self._done.wait(timeout)
+        return self.result
+
+    # -- worker side -------------------------------------------------------
+    def _progress(self, line):
+        if self.on_progress is not None:
+            self.on_progress(line)
+
+    def _pump(self, stream, sink):
+        for line in stream:
+            sink.append(line)
+            self._progress(line.rstrip("\r\n"))
+        stream.close()
+
+    def _run(self):
+        result = ProcessResult(self.args)
+        t0 = time.monotonic()
+        try:
+            if self._cancelled.is_set():
+                result.cancelled = True
+                return
+            out = subprocess.PIPE if self.capture else subprocess.DEVNULL
+            try:
+                self._proc = subprocess.Popen(
+                    self.args, cwd=self.cwd, stdin=subprocess.DEVNULL,
+                    stdout=out, stderr=out, text=True, errors="replace")
+            except OSError as e:
+                result.stderr = str(e)
+                return
+            if self._cancelled.is_set():    # cancel() raced with Popen
+                self._proc.kill()
+            out, err = [], []
+            pumps = [threading.Thread(target=self._pump, args=(s, sink), daemon=True)
+                     for s, sink in ((self._proc.stdout, out),
+                                     (self._proc.stderr, err)) if s is not None]
+            for p in pumps:
+                p.start()
+            try:
+                result.returncode = self._proc.wait(self.timeout)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                result.timed_out = True
+                result.returncode = self._proc.wait()
+            grace = time.monotonic() + PUMP_GRACE
+            for p in pumps:
+                p.join(max(grace - time.monotonic(), 0))
+            result.stdout = "".join(out)
+            result.stderr = "".join(err)
+            result.cancelled = self._cancelled.is_set()
+        finally:
+            result.elapsed = time.monotonic() - t0
+            self.result = result
+            self._done.set()
+            if self.on_finished is not None:
+                self.on_finished(result)
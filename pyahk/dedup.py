@@ -0,0 +1,53 @@
+"""Emit repeated step sequences once, as shared functions.
+
+The same macro often sits on several hotkeys (a key and a mouse side
+button, say).  :class:`SharedBodies` counts rendered bodies in one hashed
+pass; every body used more than once becomes ``SeqN()`` and its hotkeys
+become one-line calls.  In ``prefix`` mode a body that starts with another
+mapping's whole body calls that function first and only spells out the
+rest.  Single-statement bodies are left alone, since a call is no shorter.
+"""
+from collections import Counter
+
+DEDUP_MODES = ("", "exact", "prefix")
+MIN_SHARED = 2          # statements; shorter bodies are cheaper inline
+
+class SharedBodies:
+    def __init__(self, bodies, prefixes=False):
+        """``bodies``: every mapping's statement tuple, in script order."""
+        counts = Counter(b for b in bodies if len(b) >= MIN_SHARED)
+        shared = {b for b, n in counts.items() if n > 1}
+        self.prefix = {}            # body → longest shared proper prefix
+        if prefixes:
+            for body in counts:
+                for k in range(len(body) - 1, MIN_SHARED - 1, -1):
+                    if body[:k] in counts:
+                        self.prefix[body] = body[:k]
+                        shared.add(body[:k])
+                        break
+        self.names = {}             # body → function name, first-use order
+        for body in counts:
+            if body in shared:
+                self.names[body] = f"Seq{len(self.names) + 1}"
+
+    def _statements(self, body):
+        if (pre := self.prefix.get(body)) is not None:
+            return (f"{self.names[pre]}()", *body[len(pre):])
+        return body
+
+    def block(self, hotkey, body) -> tuple:
+        """Lines for ``hotkey`` running ``body``; a call when it is shared."""
+        if (name := self.names.get(body)) is not None:
+            return (f"{hotkey}:: {name}()",)
+        body = self._statements(body)
+        if len(body) == 1:
+            return (f"{hotkey}:: {body[0]}",)
+        return (f"{hotkey}::", "{", *(f"    {b}" for b in body), "}")
+
+    def functions(self) -> list:
+        """Definitions of every shared body, to go after the hotkeys."""
+        lines = []
+        for body, name in self.names.items():
+            lines += ["", f"{name}() {{",
+                      *(f"    {b}" for b in self._statements(body)), "}"]
+        return lines
@@ -0,0 +1,133 @@
+"""Table-driven output for very large keymaps.
+
+Instead of one ``hotkey::`` block per mapping, every sequence becomes one
+tab-separated line of a continuation-section string::
+
+    ^a	s^c	w500	shello
+
+and a fixed dispatcher registers each hotkey with ``Hotkey()`` and runs its
+ops.  The script then grows by one short line per mapping, and AHK parses
+a single string instead of thousands of functions.  Op codes: ``s`` Send,
+``t`` SendText, ``p`` PasteText, ``w`` Sleep, ``c`` Click, ``lN:K`` to run
+the next K ops N times, and ``m``/``k``/``d`` for a mapping's own
+SendMode/SetKeyDelay/SetMouseDelay.  An op whose argument holds a tab, CR
+or LF (which would split the row) is written as ``e`` plus the op with
+those and ``%`` percent-encoded, and decoded before it runs.
+"""
+from functools import lru_cache, partial
+
+from .peephole import optimize_steps
+from .runtime import runtime_profile
+from .steps import StepKind, ahk_escape, hotkey_to_ahk, parse_step
+
+# RTrim0 keeps trailing spaces of text steps; comments stay off, escapes on
+TABLE_OPEN = ('KeyMapTable := "', "(RTrim0")
+# ops are AHK-escaped, since escape sequences stay on inside the section
+TABLE_CLOSE = (
+    ')"',
+    "KeyMap := Map()",
+    "HotIf (*) => scriptEnabled",
+    "Loop Parse KeyMapTable, \"`n\" {",
+    "    if A_LoopField = \"\"",
+    "        continue",
+    "    ops := StrSplit(A_LoopField, \"`t\")",
+    "    hk := ops.RemoveAt(1)",
+    "    KeyMap[hk] := ops",
+    "    Hotkey hk, RunKeyMap",
+    "}",
+    "HotIf",
+    "",
+    "RunKeyMap(hk) {",
+    "    RunOps(KeyMap[hk], 1, KeyMap[hk].Length)",
+    "}",
+    "",
+    "RunOps(ops, first, last) {",
+    "    i := first",
+    "    while i <= last {",
+    "        op := ops[i]",
+    "        if SubStr(op, 1, 1) = \"e\"",
+    "            op := StrReplace(StrReplace(StrReplace(StrReplace(SubStr(op, 2), "
+    "\"%09\", \"`t\"), \"%0A\", \"`n\"), \"%0D\", \"`r\"), \"%25\", \"%\")",
+    "        arg := SubStr(op, 2)",
+    "        switch SubStr(op, 1, 1) {",
+    "            case \"s\": Send arg",
+    "            case \"t\": SendText arg",
+    "            case \"w\": Sleep arg",
+    "            case \"c\": Click arg",
+    "            case \"m\": SendMode arg",
+    "            case \"k\": SetKeyDelay StrSplit(arg, \",\")*",
+    "            case \"d\": SetMouseDelay arg",
+    "            case \"l\":",
+    "                n := StrSplit(arg, \":\")",
+    "                Loop n[1]",
+    "                    RunOps(ops, i + 1, i + n[2])",
+    "                i += n[2]",
+    "        }",
+    "        i++",
+    "    }",
+    "}",
+)
+
+# only emitted with a paste threshold, when PasteText() exists
+PASTE_CASE = '            case "p": PasteText(arg)'
+
+def table_close(paste: int = 0) -> tuple:
+    """:data:`TABLE_CLOSE`, plus the ``p`` op when text may be pasted."""
+    if not paste:
+        return TABLE_CLOSE
+    at = TABLE_CLOSE.index('            case "t": SendText arg') + 1
+    return (*TABLE_CLOSE[:at], PASTE_CASE, *TABLE_CLOSE[at:])
+
+def step_op(step, paste: int = 0) -> str:
+    kind = step.kind
+    if kind is StepKind.KEY:
+        return f"s{step.send}"
+    if kind is StepKind.TEXT:
+        if paste and len(step.value) > paste:
+            return f"p{step.value}"
+        return f"t{step.value}"
+    if kind is StepKind.SLEEP:
+        return f"w{step.value}"
+    if step.value is not None:
+        return f"c{step.value}"
+    return f"c{step.key[5:].strip()}"       # "Click right" → "cright"
+
+def encode_op(op: str) -> str:
+    """``op`` safe inside a tab-separated row (see the ``e`` op)."""
+    if "\t" not in op and "\n" not in op and "\r" not in op:
+        return op
+    return "e" + (op.replace("%", "%25").replace("\t", "%09")
+                  .replace("\n", "%0A").replace("\r", "%0D"))
+
+def decode_op(op: str) -> str:
+    """Undo :func:`encode_op`, as ``RunOps`` does."""
+    if not op.startswith("e"):
+        return op
+    return (op[1:].replace("%09", "\t").replace("%0A", "\n")
+            .replace("%0D", "\r").replace("%25", "%"))
+
+def steps_ops(tokens, expand=None, paste: int = 0):
+    """Ops for ``tokens``; a repeat is ``lN:K`` followed by its K body ops."""
+    steps = expand(tokens) if expand else map(parse_step, tokens)
+    for step in steps:
+        if step.kind is StepKind.REPEAT:
+            body = list(steps_ops(step.body, expand, paste))
+            yield f"l{step.value}:{len(body)}"
+            yield from body
+        else:
+            yield encode_op(step_op(step, paste))
+
+def runtime_ops(name) -> list:
+    if not name:
+        return []
+    rt = runtime_profile(name)
+    return [f"m{rt.send_mode}", f"k{rt.key_delay},{rt.key_duration}",
+            f"d{rt.mouse_delay}"]
+
+@lru_cache(maxsize=65536)
+def render_entry(trigger: str, steps: tuple, optimize: bool = False,
+                 runtime: str = "", paste: int = 0) -> tuple:
+    """The single table line for one mapping (a 1-tuple, like a block)."""
+    expand = partial(optimize_steps, paste=paste) if optimize else None
+    ops = [*runtime_ops(runtime), *steps_ops(steps, expand, paste)]
+    return (ahk_escape("\t".join([hotkey_to_ahk(trigger), *ops])),)
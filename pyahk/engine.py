@@ -0,0 +1,361 @@
+"""Qt-free AutoHotkey v2 script generation.
+
+The GUIs in ``main.py``/``main_zhcn.py`` and the batch CLI both build a
+:class:`Profile` and hand it to :func:`iter_script`/:func:`render_script`;
+nothing in here may import PyQt6.
+"""
+import json
+import os
+from dataclasses import dataclass, field, replace
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+from .chunked import CANCEL, RUNNER, render_chunked
+from .dedup import DEDUP_MODES, SharedBodies
+from .dispatch import TABLE_OPEN, render_entry, table_close
+from .launcher import Launch, launch_lines
+from .peephole import optimize_steps
+from .runtime import runtime_header, thread_settings
+from .steps import (
+    ahk_escape, hotkey_to_ahk, intern_tokens, step_label, step_lines,
+)
+
+# ───────── data model ─────────
+class Mapping(NamedTuple):
+    """One ``trigger → steps`` entry, in the GUI's display notation.
+
+    ``runtime`` names a :data:`~pyahk.runtime.RUNTIME_PROFILES` entry whose
+    send mode and delays apply to this hotkey only ("" → the profile's).
+    ``chunked`` runs it as timer-driven chunks (see :mod:`pyahk.chunked`).
+    """
+    trigger: str
+    steps: tuple
+    runtime: str = ""
+    chunked: bool = False
+
+@dataclass
+class Profile:
+    """Everything ``_refresh`` used to read out of the widgets."""
+    maps: list = field(default_factory=list)
+    toggle: str = ""
+    exit: str = ""
+    info: str = ""
+    exe_path: str = ""
+    exe_delay: float = 0.0
+    exe_params: str = ""
+    optimize: bool = True           # coalesce Send/Sleep/Click steps
+    runtime: str = ""               # RUNTIME_PROFILES key, "" → AHK defaults
+    layout: str = "blocks"          # one of LAYOUTS
+    dedup: str = ""                 # one of dedup.DEDUP_MODES ("blocks" only)
+    paste_threshold: int = 0        # paste text longer than this; 0 → never
+    launch: list = field(default_factory=list)  # launcher.Launch entries
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Profile":
+        maps = [_map_from_dict(m) for m in data.get("maps", ())]
+        return cls(
+            maps=maps,
+            toggle=data.get("toggle", ""),
+            exit=data.get("exit", ""),
+            info=data.get("info", ""),
+            exe_path=data.get("exe_path", ""),
+            exe_delay=float(data.get("exe_delay") or 0),
+            exe_params=data.get("exe_params", ""),
+            optimize=bool(data.get("optimize", True)),
+            runtime=data.get("runtime", ""),
+            layout=data.get("layout", "blocks"),
+            dedup=data.get("dedup", ""),
+            paste_threshold=int(data.get("paste_threshold") or 0),
+            launch=[Launch(**{**l, "after": tuple(l.get("after", ()))})
+                    for l in data.get("launch", ())],
+        )
+
+    @classmethod
+    def load(cls, path) -> "Profile":
+        """Read a JSON profile as written by :meth:`to_dict`."""
+        with open(path, encoding="utf-8") as fh:
+            return cls.from_dict(json.load(fh))
+
+    def snapshot(self) -> "Profile":
+        """A copy whose mappings can't change under a worker thread."""
+        return replace(self, maps=tuple(self.maps), launch=tuple(self.launch))
+
+    def to_dict(self) -> dict:
+        return {
+            "maps": [_map_dict(m) for m in self.maps],
+            "toggle": self.toggle,
+            "exit": self.exit,
+            "info": self.info,
+            "exe_path": self.exe_path,
+            "exe_delay": self.exe_delay,
+            "exe_params": self.exe_params,
+            "optimize": self.optimize,
+            "runtime": self.runtime,
+            "layout": self.layout,
+            "dedup": self.dedup,
+            "paste_threshold": self.paste_threshold,
+            "launch": [_launch_dict(l) for l in self.launch],
+        }
+
+def _map_from_dict(d: dict) -> Mapping:
+    return Mapping(d["trigger"], intern_tokens(d["steps"]),
+                   d.get("runtime", ""), bool(d.get("chunked", False)))
+
+def _map_dict(m: Mapping) -> dict:
+    d = {"trigger": m.trigger, "steps": list(m.steps)}
+    if m.runtime:
+        d["runtime"] = m.runtime
+    if m.chunked:
+        d["chunked"] = True
+    return d
+
+def _launch_dict(l: Launch) -> dict:
+    d = {k: v for k, v in l._asdict().items() if v != Launch._field_defaults.get(k)}
+    if l.after:
+        d["after"] = list(l.after)
+    return d
+
+# ───────── emission ─────────
+FOOTER = "#HotIf"
+# "blocks": one hotkey:: block per mapping; "table": see pyahk.dispatch
+LAYOUTS = ("blocks", "table")
+# long text: put it on the clipboard, paste, then restore the old clipboard
+PASTE_HELPER = (
+    "",
+    "PasteText(text) {",
+    "    saved := ClipboardAll()",
+    "    A_Clipboard := \"\"",
+    "    A_Clipboard := text",
+    "    if ClipWait(1)",
+    "        Send \"^v\"",
+    "    else",
+    "        SendText text",
+    "    Sleep 100",
+    "    A_Clipboard := saved",
+    "}",
+)
+
+def is_empty(profile: Profile) -> bool:
+    """An empty profile renders to an empty script (info alone isn't enough)."""
+    return not (profile.maps or profile.toggle.strip() or profile.exit.strip())
+
+def header_lines(profile: Profile) -> list:
+    """Everything above the first mapping block, ending in ``#HotIf scriptEnabled``."""
+    toggle = profile.toggle.strip()
+    exit_ = profile.exit.strip()
+    info = profile.info.strip()
+    lines = [
+        "; generated by KeyMapper",
+        "#Requires AutoHotkey v2.0+",
+        *runtime_header(profile.runtime),
+        "",
+        "global scriptEnabled := true",
+        "global infoVisible := false",
+        ""
+    ]
+
+    if exe_path := profile.exe_path.strip():
+        # the single-program setting: a launch without a wait condition
+        lines += launch_lines([Launch(exe_path, profile.exe_params,
+                                      delay=profile.exe_delay)])
+    lines += launch_lines(profile.launch)
+    chunked = profile.layout == "blocks" and any(m.chunked for m in profile.maps)
+    if chunked:
+        lines += RUNNER
+
+    if toggle:
+        lines += [
+            f"{hotkey_to_ahk(toggle)}:: {{",
+            "    global scriptEnabled",
+            "    scriptEnabled := !scriptEnabled",
+            *(CANCEL if chunked else ()),
+            "    ToolTip(scriptEnabled?\"ENABLED\":\"DISABLED\")",
+            "    SetTimer(() => ToolTip(), -1000)",
+            "}",
+            ""
+        ]
+    if exit_:
+        lines.append(f"{hotkey_to_ahk(exit_)}::ExitApp")
+        lines.append("")
+    if info:
+        info_lines = []
+        for hk, steps, *_ in profile.maps:
+            clean = [step_label(s, quotes=False) for s in steps]
+            info_lines.append(ahk_escape(f"{hk} → {', '.join(clean)}"))
+        tip = "Info:`n" + "`n".join(info_lines)
+        lines += [
+            f"{hotkey_to_ahk(info)}:: {{",
+            "    global infoVisible",
+            "    if infoVisible {",
+            "        ToolTip()",
+            "        infoVisible := false",
+            "    } else {",
+            f'        ToolTip("{tip}")',
+            "        SetTimer(() => ToolTip(), -5000)",
+            "        infoVisible := true",
+            "    }",
+            "}",
+            ""
+        ]
+    lines.append("#HotIf scriptEnabled")
+    if profile.layout == "table":
+        lines += TABLE_OPEN
+    return lines
+
+def footer_lines(profile: Profile) -> tuple:
+    """Everything below the last mapping block."""
+    helper = PASTE_HELPER if profile.paste_threshold > 0 else ()
+    if profile.layout == "table":
+        return (*table_close(profile.paste_threshold), FOOTER, *helper)
+    return (FOOTER, *helper)
+
+def _body_lines(steps: tuple, optimize: bool = False, runtime: str = "",
+                paste: int = 0) -> tuple:
+    expand = partial(optimize_steps, paste=paste) if optimize else None
+    body = step_lines(steps, expand, paste)
+    return (*thread_settings(runtime), *body)
+
+@lru_cache(maxsize=65536)
+def body_lines(steps: tuple, optimize: bool = False, runtime: str = "",
+               paste: int = 0) -> tuple:
+    """The statements of one hotkey body, unindented; memoised."""
+    return _body_lines(steps, optimize, runtime, paste)
+
+@lru_cache(maxsize=65536)
+def render_mapping(trigger: str, steps: tuple, optimize: bool = False,
+                   compare: bool = False, runtime: str = "",
+                   paste: int = 0) -> tuple:
+    """Lines of one ``hotkey::`` block; memoised on its arguments.
+
+    ``optimize`` runs the steps through :func:`~pyahk.peephole.optimize_steps`;
+    ``compare`` then adds a ``; before:`` comment when that changed anything.
+    ``runtime`` prefixes the body with that profile's per-thread settings;
+    text longer than ``paste`` characters is pasted (see :data:`PASTE_HELPER`).
+    """
+    return _render_mapping(trigger, steps, optimize, compare, runtime, paste,
+                           body_lines)
+
+def _render_mapping(trigger, steps, optimize, compare, runtime, paste,
+                    body_lines=_body_lines):
+    ah = hotkey_to_ahk(trigger)
+    body = body_lines(steps, optimize, runtime, paste)
+    note = ()
+    if compare and optimize:
+        plain = body_lines(steps, False, runtime, paste)
+        if body != plain:
+            note = (f"; before: {' | '.join(plain)}",)
+    if len(body) == 1:
+        return (*note, f"{ah}:: {body[0]}")
+    return (*note, f"{ah}::", "{", *(f"    {b}" for b in body), "}")
+
+def mapping_lines(m: Mapping, profile: Profile, compare: bool = False,
+                  memo: bool = True) -> tuple:
+    """Lines for mapping ``m`` in ``profile``'s layout.
+
+    ``memo=False`` renders without filling the per-mapping memos, for
+    one-pass output that should not keep every block alive afterwards.
+    """
+    if profile.layout == "table":
+        entry = render_entry if memo else render_entry.__wrapped__
+        return entry(m.trigger, tuple(m.steps), profile.optimize,
+                     m.runtime, profile.paste_threshold)
+    if profile.layout != "blocks":
+        raise ValueError(f"unknown layout {profile.layout!r}")
+    chunked = render_chunked if memo else render_chunked.__wrapped__
+    if m.chunked and (lines := chunked(
+            m.trigger, tuple(m.steps), profile.optimize, m.runtime,
+            profile.paste_threshold)) is not None:
+        return lines
+    if memo:
+        return render_mapping(m.trigger, tuple(m.steps), profile.optimize,
+                              compare, m.runtime, profile.paste_threshold)
+    return _render_mapping(m.trigger, tuple(m.steps), profile.optimize,
+                           compare, m.runtime, profile.paste_threshold)
+
+def shared_bodies(profile: Profile, memo: bool = True):
+    """The :class:`~pyahk.dedup.SharedBodies` plan, or None without dedup."""
+    if not profile.dedup or profile.layout != "blocks":
+        return None
+    if profile.dedup not in DEDUP_MODES:
+        raise ValueError(f"unknown dedup mode {profile.dedup!r}")
+    body = body_lines if memo else _body_lines
+    bodies = (body(tuple(m.steps), profile.optimize, m.runtime,
+                   profile.paste_threshold)
+              for m in profile.maps if not m.chunked)
+    return SharedBodies(bodies, prefixes=profile.dedup == "prefix")
+
+def iter_script(profile: Profile, memo: bool = True) -> Iterator[str]:
+    """Yield the script line by line; yields nothing for an empty profile.
+
+    ``memo`` as for :func:`mapping_lines`.
+    """
+    if is_empty(profile):
+        return
+    yield from header_lines(profile)
+    if (shared := shared_bodies(profile, memo)) is not None:
+        body = body_lines if memo else _body_lines
+        for m in profile.maps:
+            if m.chunked:
+                yield from mapping_lines(m, profile, memo=memo)
+                continue
+            yield from shared.block(
+                hotkey_to_ahk(m.trigger),
+                body(tuple(m.steps), profile.optimize, m.runtime,
+                     profile.paste_threshold))
+        yield from footer_lines(profile)
+        yield from shared.functions()
+        return
+    for m in profile.maps:
+        yield from mapping_lines(m, profile, memo=memo)
+    yield from footer_lines(profile)
+
+def render_script(profile: Profile) -> str:
+    return "\n".join(iter_script(profile))
+
+def script_size(profile: Profile) -> int:
+    """UTF-8 byte size of the rendered script, without building it."""
+    size = sum(len(line.encode("utf-8")) + 1
+               for line in iter_script(profile, memo=False))
+    return max(size - 1, 0)             # no newline after the last line
+
+def dedup_savings(profile: Profile) -> int:
+    """Bytes saved by ``profile.dedup`` compared with no deduplication."""
+    if not profile.dedup:
+        return 0
+    return script_size(replace(profile, dedup="")) - script_size(profile)
+
+def write_script(profile: Profile, fh, chunk_size: int = 1 << 16) -> int:
+    """Stream the script into text file ``fh`` in ~``chunk_size`` pieces.
+
+    Produces exactly :func:`render_script`'s text without ever holding more
+    than one chunk (or one mapping block) in memory: the per-mapping memos
+    the preview uses are bypassed, so nothing outlives the call.  Returns
+    chars written.
+    """
+    buf, size, total = [], 0, 0
+    sep = ""
+    for line in iter_script(profile, memo=False):
+        buf.append(sep); buf.append(line)
+        size += len(line) + 1
+        sep = "\n"
+        if size >= chunk_size:
+            total += fh.write("".join(buf))
+            buf, size = [], 0
+    if buf:
+        total += fh.write("".join(buf))
+    return total
+
+def save_script(profile: Profile, path) -> int:
+    """Write the script to ``path`` via a temp file, so a failed save
+    never leaves a truncated script behind."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp, "w", encoding="utf-8") as fh:
+            written = write_script(profile, fh)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return written
@@ -0,0 +1,122 @@
+"""Canonical hotkeys and the conflict index.
+
+``Ctrl+A``, ``ctrl-a``, ``Ctrl A``, ``^a`` and ``~^a`` all fire on the same
+keystroke, so conflicts are checked on a canonical ``(modifier bitmask, key)``
+pair rather than on the text the user picked.
+"""
+from functools import lru_cache
+from typing import NamedTuple
+
+from .steps import ALT, CLICK_TRIGGERS, CTRL, PARSE_CACHE_SIZE, SHIFT, WIN, _SEP
+
+# ───────── modifiers ─────────
+MOD_BITS = {
+    "ctrl": CTRL, "control": CTRL, "lctrl": CTRL, "rctrl": CTRL,
+    "alt": ALT, "lalt": ALT, "ralt": ALT,
+    "shift": SHIFT, "lshift": SHIFT, "rshift": SHIFT,
+    "win": WIN, "lwin": WIN, "rwin": WIN,
+}
+SYMBOL_BITS = {"^": CTRL, "!": ALT, "+": SHIFT, "#": WIN}
+# hotkey prefixes that change how a hotkey fires but not which keys fire it
+PASSTHROUGH = "~*$<>"
+KEY_ALIASES = {
+    "return": "enter", "escape": "esc", "del": "delete", "bs": "backspace",
+    "ins": "insert",
+}
+
+class Hotkey(NamedTuple):
+    mods: int
+    key: str
+
+    def ahk(self) -> str:
+        """Normalised AHK spelling: modifiers always in ``^!+#`` order."""
+        return "".join(sym for sym, bit in SYMBOL_BITS.items()
+                       if self.mods & bit) + self.key
+
+def _display_mods(names) -> int:
+    mods = 0
+    for name in names:
+        mods |= MOD_BITS.get(name.lstrip(PASSTHROUGH), 0)
+    return mods
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def canonical_hotkey(raw: str) -> Hotkey:
+    """Reduce display (``Shift+Ctrl+X``) or AHK (``~+^x``) notation to a key."""
+    r = raw.strip().lower()
+    if r in CLICK_TRIGGERS:
+        return Hotkey(0, CLICK_TRIGGERS[r].lower())
+    if len(r) > 1 and r[-1] in "+-" and r[-2] in "+- ":
+        # the key itself is a separator character: "Ctrl++", "Alt+-"
+        return Hotkey(_display_mods(_SEP.split(r[:-2])), r[-1])
+    parts = _SEP.split(r)
+    if len(parts) > 1 and parts[-1] and all(
+            p.lstrip(PASSTHROUGH) in MOD_BITS for p in parts[:-1]):
+        # display notation: every token but the last names a modifier
+        mods = _display_mods(parts[:-1])
+        key = parts[-1]
+    else:
+        # AHK notation: optional ~*$<> prefixes, modifier symbols, then the key
+        body = r.lstrip(PASSTHROUGH)
+        mods = 0
+        while len(body) > 1 and body[0] in SYMBOL_BITS:
+            mods |= SYMBOL_BITS[body[0]]
+            body = body[1:].lstrip("<>")
+        key = body or r
+    key = KEY_ALIASES.get(key, key)
+    return Hotkey(mods, key)
+
+# ───────── conflict index ─────────
+class HotkeyIndex:
+    """``canonical hotkey → owner`` map with O(1) conflict checks."""
+    def __init__(self):
+        self._owners = {}
+
+    def __len__(self):
+        return len(self._owners)
+
+    def __contains__(self, raw):
+        return canonical_hotkey(raw) in self._owners
+
+    def owner(self, raw, default=None):
+        """Whoever already holds ``raw`` (in any spelling), else ``default``."""
+        return self._owners.get(canonical_hotkey(raw), default)
+
+    def add(self, raw, owner=None):
+        """Claim ``raw`` for ``owner``; returns the previous owner on conflict."""
+        hk = canonical_hotkey(raw)
+        if hk in self._owners:
+            return self._owners[hk]
+        self._owners[hk] = raw if owner is None else owner
+        return None
+
+    def discard(self, raw, owner=None):
+        """Release ``raw``; with ``owner`` given, only if it still holds it."""
+        hk = canonical_hotkey(raw)
+        if owner is None or self._owners.get(hk) == owner:
+            self._owners.pop(hk, None)
+
+    def clear(self):
+        self._owners.clear()
+
+    def update(self, raws):
+        """Bulk-add hotkeys; returns ``[(raw, previous owner), …]`` conflicts."""
+        owners = self._owners
+        conflicts = []
+        for raw in raws:
+            hk = canonical_hotkey(raw)
+            if hk in owners:
+                conflicts.append((raw, owners[hk]))
+            else:
+                owners[hk] = raw
+        return conflicts
+
+def find_duplicates(raws):
+    """Hotkeys in ``raws`` that collide with an earlier entry once normalised."""
+    seen = set()
+    dupes = []
+    for raw in raws:
+        hk = canonical_hotkey(raw)
+        if hk in seen:
+            dupes.append(raw)
+        seen.add(hk)
+    return dupes
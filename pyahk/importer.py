@@ -0,0 +1,722 @@
+"""Read AHK v2 scripts back into profiles.
+
+The reverse of :mod:`pyahk.engine`, in one streaming pass over a script's
+lines: ``hotkey::`` one-liners and ``{}`` blocks whose bodies are
+``Send``/``SendText``/``Sleep``/``Click``/``Loop`` statements become
+mappings, and the toggle, exit and info hotkeys, ``#HotIf scriptEnabled``,
+runtime settings, shared ``SeqN()`` bodies, chunked and table-layout
+mappings the engine emits are recognised as such.  Hand-written scripts
+import as far as they use the same vocabulary.
+
+Anything else is skipped and reported as a :class:`Skipped` line, never
+guessed at: a statement the model can't express drops out of its mapping,
+and a hotkey with nothing left, an unsupported trigger or a ``#HotIf``
+condition other than ``scriptEnabled`` is dropped whole.  Sequences are
+usually shared, so ``Send`` strings are tokenized once per distinct string.
+"""
+import re
+import sys
+from functools import lru_cache, partial
+from typing import NamedTuple
+
+from .chunked import RUNNER
+from .dispatch import decode_op, table_close
+from .engine import PASTE_HELPER, Mapping, Profile
+from .hotkeys import HotkeyIndex
+from .peephole import optimize_steps
+from .runtime import RUNTIME_PROFILES, runtime_header, thread_settings
+from .steps import (
+    ALT, CTRL, MOD_PREFIX, PARSE_CACHE_SIZE, SHIFT, WIN, StepKind, hotkey_to_ahk,
+    parse_step, repeat_token,
+)
+
+class Skipped(NamedTuple):
+    line: int
+    text: str
+    reason: str
+
+# ───────── AHK lexical bits ─────────
+_STATEMENT = re.compile(r"(\w+)(?:\((.*)\)|[ \t]+(.*))?", re.S)
+_STRING = re.compile(r'"((?:[^"`]|`.)*)"|\'((?:[^\'`]|`.)*)\'', re.S)
+_ESCAPE = re.compile(r"`(.)", re.S)
+_SPACING = re.compile(r'"(?:[^"`]|`.)*"|\'(?:[^\'`]|`.)*\'|\s+', re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "s": " ", "b": "\b", "f": "\f",
+            "v": "\v", "a": "\a"}
+_HOTKEY = re.compile(r"([^\s\"'(:;,][^\s\"'(,]*?(?: & [^\s\"'(,]+)?(?: up)?)::(.*)",
+                     re.I | re.S)
+_FUNCTION = re.compile(r"(\w+)\(([^()]*)\)\s*(\{?)")
+_LOOP = re.compile(r"loop\s+(\d+)\s*(\{?)", re.I)
+_ASSIGN_SECTION = re.compile(r"(\w+)\s*:=\s*\"")
+_RUN = re.compile(r'run\s+("(?:[^"`]|`.)*")\s*,\s*,\s*"UseErrorLevel"', re.I)
+_TRY_RUN = re.compile(r'try\s+run\s+("(?:[^"`]|`.)*")', re.I)
+_COMMAND_LINE = re.compile(r'"([^"]*)"\s*(.*)', re.S)
+_KEYSTROKE = re.compile(r"([\^!+#]*)(\{[{}]\}|\{[^}]*\}|.)", re.S)
+_SEQ = re.compile(r"Seq\d+")
+_CODE = re.compile(r"(?:sc|vk)[0-9a-f]+", re.I)     # SC1F, vk41
+
+_SYMBOL_BITS = {"^": CTRL, "!": ALT, "+": SHIFT, "#": WIN}
+_MOD_NAMES = (("Ctrl", CTRL), ("Alt", ALT), ("Shift", SHIFT), ("Win", WIN))
+_CLICK_KEYS = {"lbutton": "Click", "rbutton": "Right click"}
+_LITERAL = {"{{}": "{", "{}}": "}", "{^}": "^", "{+}": "+", "{!}": "!", "{#}": "#"}
+_SEND = {"send", "sendinput", "sendevent", "sendplay"}
+# generated support code that carries no mapping data
+_HELPERS = {"RunChunks", "PasteText", "RunKeyMap", "RunOps"}
+_GENERATED = {"global scriptEnabled := true", "global infoVisible := false",
+              "global chunkRun := 0", "KeyMap := Map()",
+              "HotIf (*) => scriptEnabled", "HotIf"}
+_HEADER = {"#singleinstance", "#maxthreadsperhotkey", "sendmode", "setkeydelay",
+           "setmousedelay", "a_hotkeyinterval", "a_maxhotkeysperinterval",
+           "processsetpriority"}
+
+def _unescape(s: str) -> str:
+    return _ESCAPE.sub(lambda m: _ESCAPES.get(m[1], m[1]), s) if "`" in s else s
+
+def _string(arg: str):
+    """The value of one AHK string literal, or None."""
+    m = _STRING.fullmatch(arg.strip())
+    if m is None:
+        return None
+    return _unescape(m[1] if m[1] is not None else m[2])
+
+def _command(s: str):
+    """``(name, args)`` of ``Name args`` or ``Name(args)``, name lowercased."""
+    m = _STATEMENT.fullmatch(s)
+    if m is None:
+        return None
+    args = m[2] if m[2] is not None else m[3] or ""
+    # whitespace runs collapse to one space, except inside string literals
+    return m[1].lower(), _SPACING.sub(lambda w: " " if w[0].isspace() else w[0],
+                                      args.strip())
+
+# per-thread runtime settings, as (name, args) in emission order
+_THREAD = {name: tuple(map(_command, thread_settings(name)))
+           for name in RUNTIME_PROFILES}
+
+def _strip_comment(s: str) -> str:
+    """``s`` without a trailing ``;`` comment, quotes respected."""
+    quote = None
+    i = 0
+    while i < len(s):
+        c = s[i]
+        if quote:
+            if c == "`":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c == ";" and s[i - 1] in " \t":
+            return s[:i].rstrip()
+        i += 1
+    return s
+
+class _Section(NamedTuple):
+    """A ``name := "`` continuation section; ``rows`` are raw lines."""
+    name: str
+    options: str
+    rows: list
+
+class _Lines:
+    """``(line number, statement)`` for every line with code on it.
+
+    Comments are dropped and continuation sections come out whole as a
+    :class:`_Section`.  :meth:`push` puts one item back.
+    """
+    def __init__(self, src):
+        self._items = self._read(iter(src))
+        self._back = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        return self._back.pop() if self._back else next(self._items)
+
+    def push(self, item):
+        self._back.append(item)
+
+    @staticmethod
+    def _read(src):
+        no = 0
+        comment = False
+        pending = None                  # ``x := "`` awaiting its section
+        for raw in src:
+            no += 1
+            s = raw.strip()
+            if comment:
+                comment = not (s.startswith("*/") or s.endswith("*/"))
+                continue
+            if pending is not None:
+                if s.startswith("("):
+                    rows = []
+                    for raw in src:
+                        no += 1
+                        if raw.lstrip().startswith(")"):
+                            break
+                        rows.append((no, raw.rstrip("\r\n")))
+                    yield pending[0], _Section(pending[1], s[1:].strip(), rows)
+                    pending = None
+                    continue
+                yield pending[0], pending[2]
+                pending = None
+            if not s or s[0] == ";":
+                continue
+            if s.startswith("/*"):
+                comment = not s.endswith("*/")
+                continue
+            if ";" in s:
+                s = _strip_comment(s)
+            if s.endswith('"') and (m := _ASSIGN_SECTION.fullmatch(s)):
+                pending = (no, m[1], s)
+                continue
+            yield no, s
+        if pending is not None:
+            yield pending[0], pending[2]
+
+def _block(lines, opened: bool):
+    """The statements of a ``{}`` block; ``opened`` once ``{`` was read.
+
+    Returns ``(statements, closed)``; braces are matched by the usual
+    one-true-brace layout (``{`` ending a line, ``}`` starting one).
+    """
+    if not opened:
+        item = next(lines, None)
+        if item is None or item[1] != "{":
+            if item is not None:
+                lines.push(item)
+            return [], False
+    body, depth = [], 1
+    for no, s in lines:
+        if isinstance(s, _Section):
+            body.append((no, f"{s.name} := ..."))
+            continue
+        if s[0] == "}":
+            depth -= 1
+            if not depth:
+                if len(s) > 1:
+                    lines.push((no, s[1:].strip()))
+                return body, True
+        if s[-1] == "{":
+            depth += 1
+        body.append((no, s))
+    return body, False
+
+def _nested(stmts, i):
+    """``(inner, next i)`` for the block opened just before ``stmts[i]``."""
+    depth = 1
+    for j in range(i, len(stmts)):
+        s = stmts[j][1]
+        if s[0] == "}":
+            depth -= 1
+            if not depth:
+                return stmts[i:j], j + 1
+        if s[-1] == "{":
+            depth += 1
+    return stmts[i:], len(stmts)
+
+def _helper_bodies():
+    """name → statements of every generated helper, as :class:`_Lines` reads
+    them; a function of the same name with another body is the user's."""
+    bodies = {}
+    for src in (PASTE_HELPER, RUNNER, table_close(), table_close(1)):
+        lines = _Lines(src)
+        for _, s in lines:
+            if (m := _FUNCTION.fullmatch(s)) is not None and m[1] in _HELPERS:
+                body, _ = _block(lines, bool(m[3]))
+                bodies.setdefault(m[1], set()).add(tuple(s for _, s in body))
+    return bodies
+
+_HELPER_BODIES = _helper_bodies()
+
+# ───────── steps ─────────
+def _text(value: str) -> str:
+    return f'"{value}"'
+
+def _sleep(ms: int) -> str:
+    token = f"{ms / 1000:g} s"
+    if parse_step(token).value != ms:   # float rounding or too many digits
+        token = f"{(ms + 0.5) / 1000:.4f} s"
+    return token
+
+def _key_token(mods: str, key: str):
+    bits = 0
+    for sym in mods:
+        bits |= _SYMBOL_BITS[sym]
+    name = key[1:-1] if len(key) > 2 and key[0] == "{" else key
+    single = len(name) == 1 and name.isalnum()
+    if single and name != name.lower():
+        return None                     # "^A" sends Shift too
+    token = "+".join([*(n for n, bit in _MOD_NAMES if bits & bit),
+                      name.upper() if single else name])
+    step = parse_step(token)
+    want = name if single else f"{{{name}}}"
+    if step.kind is not StepKind.KEY or step.send != MOD_PREFIX[bits] + want:
+        return None
+    return token
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def send_tokens(keys: str):
+    """Step tokens typing the ``Send`` string ``keys``, or None.
+
+    Keystrokes with modifiers or ``{Name}`` become key steps, runs of plain
+    characters become one text step (a lone lowercase letter or digit, as
+    a single-key ``Send`` is emitted, stays a key).
+    """
+    head = keys[:6].lower()
+    if head == "{text}" or head[:5] == "{raw}":
+        rest = keys[6:] if head == "{text}" else keys[5:]
+        return (_text(rest),) if rest else ()
+    tokens, text = [], []
+
+    def flush():
+        run = "".join(text)
+        text.clear()
+        if len(run) == 1 and run.isalnum() and run == run.lower():
+            tokens.append(run.upper())
+        else:
+            tokens.append(_text(run))
+
+    for mods, key in _KEYSTROKE.findall(keys):
+        if not mods and (len(key) == 1 or key in _LITERAL):
+            text.append(_LITERAL.get(key, key))
+            continue
+        if text:
+            flush()
+        if (token := _key_token(mods, key)) is None:
+            return None
+        tokens.append(token)
+    if text:
+        flush()
+    return tuple(tokens)
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def trigger_name(hotkey: str):
+    """Display notation for the AHK ``hotkey``, or None if it has none."""
+    i = 0
+    while i < len(hotkey) - 1 and hotkey[i] in _SYMBOL_BITS:
+        i += 1
+    mods, key = hotkey[:i], hotkey[i:]
+    if not mods and key.lower() in _CLICK_KEYS:
+        return _CLICK_KEYS[key.lower()]
+    bits = 0
+    for sym in mods:
+        bits |= _SYMBOL_BITS[sym]
+    pretty = key.upper() if _CODE.fullmatch(key) else key[:1].upper() + key[1:]
+    name = "+".join([*(n for n, bit in _MOD_NAMES if bits & bit), pretty])
+    return name if hotkey_to_ahk(name) == MOD_PREFIX[bits] + key.lower() else None
+
+class _Call(str):
+    """A ``Name()`` call in a sequence, inlined once the file is read."""
+
+# ───────── reader ─────────
+class _Reader:
+    def __init__(self):
+        self.profile = Profile(maps=[])
+        self.skipped = []
+        self.hotkeys = HotkeyIndex()
+        self.functions = {}             # name → (line, runtime, statements)
+        self.bodies = {}                # name → tokens, parsed on first call
+        self.calls = {}                 # maps index → line, for Seq calls
+        self.header = []                # top-level runtime settings
+        self.hotif = ""                 # #HotIf condition; "" or scriptEnabled
+        self.pasted = set()             # texts that were pasted
+        self.used = set()
+        self.memo = {}                  # statement → its tokens
+
+    def skip(self, no, text, reason):
+        self.skipped.append(Skipped(no, text, reason))
+
+    # -- top level ---------------------------------------------------------
+    def read(self, src):
+        lines = _Lines(src)
+        for no, s in lines:
+            if isinstance(s, _Section):
+                self.section(no, s)
+            elif (m := _HOTKEY.fullmatch(s)) is not None:   # "#f1::" too
+                self.hotkey(no, m[1], m[2].strip(), lines)
+            elif s[0] == "#":
+                self.directive(no, s)
+            elif (m := _FUNCTION.fullmatch(s)) is not None and \
+                    m[1].lower() not in ("if", "while", "loop", "for"):
+                self.function(no, m[1], bool(m[3]), lines)
+            else:
+                self.statement(no, s, lines)
+        return self.finish()
+
+    def directive(self, no, s):
+        name, _, arg = s.partition(" ")
+        low = name.lower()
+        if low == "#hotif":
+            self.hotif = arg.strip()
+        elif low == "#requires":
+            pass
+        elif low in _HEADER:
+            self.header.append((no, s))
+        else:
+            self.skip(no, s, "unsupported directive")
+
+    def statement(self, no, s, lines):
+        if s in _GENERATED:
+            return
+        if s[-1] == "{":
+            _block(lines, True)
+            if not s.startswith("Loop Parse KeyMapTable"):
+                self.skip(no, s, "top-level block")
+            return
+        if s[0] == ":" and "::" in s[1:]:
+            self.skip(no, s, "hotstrings are not supported")
+            return
+        cmd = _command(s)
+        name = cmd[0] if cmd else ""
+        p = self.profile
+        if name in _HEADER or s.split(" ", 1)[0].lower() in _HEADER:
+            self.header.append((no, s))
+        elif (m := _RUN.fullmatch(s)) is not None and not p.exe_path:
+            p.exe_path = _string(m[1])
+        elif (m := _TRY_RUN.fullmatch(s)) is not None and not p.exe_path and \
+                (run := _COMMAND_LINE.fullmatch(_string(m[1]) or "")):
+            p.exe_path, p.exe_params = run[1], run[2]
+        elif name == "sleep" and p.exe_path and not p.exe_delay \
+                and cmd[1].isdigit():
+            p.exe_delay = int(cmd[1]) / 1000
+        else:
+            self.skip(no, s, "top-level statement")
+
+    def section(self, no, sec):
+        if sec.name != "KeyMapTable":
+            self.skip(no, f"{sec.name} := (...)", "continuation section")
+            return
+        self.profile.layout = "table"
+        for row_no, row in sec.rows:
+            if not row:
+                continue
+            hotkey, *ops = _unescape(row).split("\t")
+            runtime = ""
+            if ops and ops[0][:1] == "m" and len(ops) >= 3:
+                settings = (("sendmode", f'"{ops[0][1:]}"'),
+                            ("setkeydelay", ops[1][1:].replace(",", ", ")),
+                            ("setmousedelay", ops[2][1:]))
+                runtime = next((n for n, t in _THREAD.items() if t == settings), "")
+                if runtime:
+                    ops = ops[3:]
+            tokens = self.ops(row_no, row, ops)
+            if tokens is not None:
+                self.mapping(row_no, hotkey, tokens, runtime, False, row)
+
+    def ops(self, no, row, ops):
+        tokens, i = [], 0
+        while i < len(ops):
+            op = decode_op(ops[i])
+            code, arg = op[:1], op[1:]
+            i += 1
+            if code == "s":
+                keys = send_tokens(arg)
+                if keys is None:
+                    self.skip(no, row, f"unsupported keys {arg!r}")
+                    return None
+                tokens += keys
+            elif code and code in "tp":
+                if code == "p":
+                    self.pasted.add(arg)
+                tokens.append(_text(arg))
+            elif code == "w" and arg.isdigit():
+                tokens.append(_sleep(int(arg)))
+            elif code == "c":
+                tokens.append(f"Click x{arg}" if arg.isdigit()
+                              else f"Click {arg}".rstrip())
+            elif code == "l" and (m := re.fullmatch(r"(\d+):(\d+)", arg)):
+                n = int(m[2])
+                body = self.ops(no, row, ops[i:i + n])
+                if body is None:
+                    return None
+                if body:
+                    tokens.append(repeat_token(int(m[1]), body))
+                i += n
+            else:
+                self.skip(no, row, f"unknown table op {op!r}")
+                return None
+        return tokens
+
+    # -- hotkeys -----------------------------------------------------------
+    def hotkey(self, no, hotkey, rest, lines):
+        text = f"{hotkey}::{rest}"
+        if rest in ("", "{"):
+            body, closed = _block(lines, rest == "{")
+            if not closed:
+                self.skip(no, text, "hotkey without a body")
+                return
+        else:
+            body = [(no, rest)]
+        stmts = [s for _, s in body]
+        if "scriptEnabled := !scriptEnabled" in stmts:
+            self.control(no, "toggle", hotkey, text)
+        elif stmts[:1] == ["global infoVisible"]:
+            self.control(no, "info", hotkey, text)
+        elif [s.lower() for s in stmts] == ["exitapp"]:
+            self.control(no, "exit", hotkey, text)
+        elif self.hotif not in ("", "scriptEnabled"):
+            self.skip(no, text, f"under #HotIf {self.hotif}")
+        elif stmts[:1] == ["RunChunks(["] and stmts[-1:] == ["])"]:
+            tokens, runtime = self.chunks(body[1:-1])
+            self.mapping(no, hotkey, tokens, runtime, True, text)
+        else:
+            runtime, body = self.runtime(body)
+            self.mapping(no, hotkey, self.steps(body), runtime, False, text)
+
+    def control(self, no, name, hotkey, text):
+        if self.hotif:
+            self.skip(no, text, f"{name} hotkey under #HotIf {self.hotif}")
+        elif (trigger := trigger_name(hotkey)) is None:
+            self.skip(no, text, "unsupported hotkey")
+        else:
+            setattr(self.profile, name, trigger)
+
+    def mapping(self, no, hotkey, tokens, runtime, chunked, text):
+        trigger = trigger_name(hotkey)
+        if trigger is None:
+            self.skip(no, text, "unsupported hotkey")
+        elif not tokens:
+            self.skip(no, text, "no steps left to import")
+        elif self.hotkeys.add(trigger, no) is not None:
+            self.skip(no, text, "duplicate hotkey")
+        else:
+            maps = self.profile.maps
+            if any(type(t) is _Call for t in tokens):
+                self.calls[len(maps)] = no
+            maps.append(Mapping(trigger, tuple(tokens), runtime, chunked))
+
+    def runtime(self, body):
+        """``(runtime name, rest of body)``, from leading thread settings."""
+        if len(body) >= 3 and body[0][1][:8].lower() == "sendmode":
+            head = tuple(_command(s) for _, s in body[:3])
+            for name, settings in _THREAD.items():
+                if head == settings:
+                    return name, body[3:]
+        return "", body
+
+    def steps(self, stmts):
+        tokens, i, memo = [], 0, self.memo
+        while i < len(stmts):
+            no, s = stmts[i]
+            i += 1
+            if (m := _LOOP.fullmatch(s)) is not None:
+                if not m[2]:
+                    if i < len(stmts) and stmts[i][1] == "{":
+                        i += 1
+                    else:
+                        self.skip(no, s, "loop without a block")
+                        continue
+                inner, i = _nested(stmts, i)
+                if body := self.steps(inner):
+                    tokens.append(repeat_token(int(m[1]), body))
+                continue
+            if s[-1] == "{":            # some other block: skip it whole
+                inner, i = _nested(stmts, i)
+                self.skip(no, s, "unsupported block")
+                continue
+            step = memo.get(s, memo)
+            if step is memo:
+                step = memo[s] = self.statement_steps(s)
+            if step is None:
+                self.skip(no, s, "unsupported statement")
+            else:
+                tokens += step
+        return tokens
+
+    def statement_steps(self, s, chunk=False):
+        """Tokens for one statement, or None if the model can't express it."""
+        cmd = _command(s)
+        if cmd is None:
+            return None
+        name, args = cmd
+        if name in _SEND:
+            keys = _string(args)
+            return None if keys is None else send_tokens(keys)
+        if name in ("sendtext", "pastetext"):
+            if (text := _string(args)) is None:
+                return None
+            if name == "pastetext":
+                self.pasted.add(text)
+            return (_text(text),)
+        if name == "sleep":
+            return (_sleep(int(args)),) if args.isdigit() else None
+        if name == "click":
+            if not args:
+                return ("Click",)
+            if args.isdigit():
+                return (f"Click x{args}",)
+            if chunk:
+                option = _string(args)
+                return None if option is None else (f"Click {option}",)
+            return (s if s[5:6] == " " else f"Click {args}",)
+        if not args and s.endswith("()") and name not in ("exitapp", "reload"):
+            return (_Call(s[:-2]),)
+        return None
+
+    def chunks(self, entries):
+        """Tokens and runtime of a ``RunChunks([...])`` body."""
+        tokens, runtime = [], None
+        for no, entry in entries:
+            entry = entry.rstrip(",").strip()
+            if entry.isdigit():
+                tokens.append(_sleep(int(entry)))
+                continue
+            if not entry.startswith("() =>"):
+                self.skip(no, entry, "unsupported chunk")
+                continue
+            calls = entry[5:].strip()
+            if calls[:1] == "(" and calls[-1:] == ")":
+                calls = [(no, c) for c in _split_args(calls[1:-1])]
+            else:
+                calls = [(no, calls)]
+            # every chunk repeats the mapping's settings; the first one counts
+            rt, body = self.runtime(calls)
+            if runtime is None:
+                runtime = rt
+            for _, c in body if rt == runtime else calls:
+                step = self.statement_steps(c, chunk=True)
+                if step is None:
+                    self.skip(no, c, "unsupported statement")
+                else:
+                    tokens += step
+        return tokens, runtime or ""
+
+    # -- shared functions --------------------------------------------------
+    def function(self, no, name, opened, lines):
+        body, closed = _block(lines, opened)
+        if not closed:
+            self.skip(no, f"{name}()", "function without a body")
+        elif name in _HELPERS:
+            if tuple(s for _, s in body) not in _HELPER_BODIES[name]:
+                self.skip(no, f"{name}()", "differs from the generated helper")
+        else:
+            self.functions[name] = (no, *self.runtime(body))
+
+    def inline(self, tokens, seen=()):
+        """``(tokens, runtime)`` with every call spliced in, or None.
+
+        A shared body starts with its hotkeys' thread settings, so a call
+        in front of the sequence supplies the mapping's runtime.
+        """
+        out, runtime = [], ""
+        for i, t in enumerate(tokens):
+            if type(t) is not _Call:
+                out.append(t)
+                continue
+            if t in seen or t not in self.functions:
+                return None
+            self.used.add(t)
+            _, own, body = self.functions[t]
+            if t not in self.bodies:
+                self.bodies[t] = self.steps(body)
+            inlined = self.inline(self.bodies[t], (*seen, t))
+            if inlined is None:
+                return None
+            if i == 0:
+                runtime = own or inlined[1]
+            out += inlined[0]
+        return out, runtime
+
+    # -- result ------------------------------------------------------------
+    def finish(self):
+        p = self.profile
+        for i, no in self.calls.items():
+            m = p.maps[i]
+            inlined = self.inline(m.steps)
+            if not inlined or not inlined[0]:
+                self.skip(no, m.trigger, "calls an unknown function")
+                p.maps[i] = None
+                continue
+            p.maps[i] = m._replace(steps=tuple(inlined[0]),
+                                   runtime=m.runtime or inlined[1])
+        if self.calls:
+            p.maps = [m for m in p.maps if m is not None]
+        if self.used and all(_SEQ.fullmatch(name) for name in self.used):
+            prefix = any(type(t) is _Call for name in self.used
+                         for t in self.bodies[name][:1])
+            p.dedup = "prefix" if prefix else "exact"
+        for name, (no, *_) in self.functions.items():
+            if name not in self.used:
+                self.skip(no, f"{name}()", "function not called by any hotkey")
+        p.maps = [m._replace(steps=tuple([sys.intern(t) for t in m.steps]))
+                  for m in p.maps]
+        self.paste_threshold()
+        self.header_runtime()
+        self.skipped.sort()
+        return p, self.skipped
+
+    def paste_threshold(self):
+        """Paste text longer than the shortest pasted text, unless typed
+        text would then be pasted too.
+
+        If the peephole pass would join typed text into something that
+        long, ``optimize`` is turned off; if typed text is that long on its
+        own, the threshold stays 0 (pasted text is typed instead).
+        """
+        p = self.profile
+        if not self.pasted:
+            return
+        limit = min(map(len, self.pasted)) - 1
+        if limit < 1:
+            return
+        if not self.typed_over(limit, partial(optimize_steps, paste=limit)):
+            p.paste_threshold = limit
+        elif not self.typed_over(limit, None):
+            p.paste_threshold, p.optimize = limit, False
+
+    def typed_over(self, limit, expand):
+        """Whether any typed text, as ``expand`` emits it, is over ``limit``."""
+        def over(tokens):
+            for step in expand(tokens) if expand else map(parse_step, tokens):
+                if step.kind is StepKind.REPEAT:
+                    if over(step.body):
+                        return True
+                elif step.kind is StepKind.TEXT and len(step.value) > limit \
+                        and step.value not in self.pasted:
+                    return True
+            return False
+        return any(over(m.steps) for m in self.profile.maps)
+
+    def header_runtime(self):
+        if not self.header:
+            return
+        found = [s for _, s in self.header]
+        for name in RUNTIME_PROFILES:
+            if sorted(found) == sorted(runtime_header(name)):
+                self.profile.runtime = name
+                return
+        for no, s in self.header:
+            self.skip(no, s, "runtime setting outside a runtime profile")
+
+def _split_args(s: str) -> list:
+    """Split ``s`` on top-level commas, quotes and brackets respected."""
+    parts, depth, quote, start, i = [], 0, None, 0, 0
+    while i < len(s):
+        c = s[i]
+        if quote:
+            if c == "`":
+                i += 1
+            elif c == quote:
+                quote = None
+        elif c in "\"'":
+            quote = c
+        elif c in "([":
+            depth += 1
+        elif c in ")]":
+            depth -= 1
+        elif c == "," and not depth:
+            parts.append(s[start:i].strip())
+            start = i + 1
+        i += 1
+    parts.append(s[start:].strip())
+    return parts
+
+# ───────── entry points ─────────
+def parse_script(lines):
+    """``(profile, skipped)`` for an iterable of script lines."""
+    return _Reader().read(lines)
+
+def import_script(path):
+    """:func:`parse_script` for the file at ``path``, streamed from disk."""
+    with open(path, encoding="utf-8-sig", errors="replace") as fh:
+        return parse_script(fh)
@@ -0,0 +1,100 @@
+"""Static worst-case duration of each hotkey's sequence.
+
+The estimate is what the hotkey thread spends before it returns: every
+``Sleep``, plus each keystroke at the effective ``SetKeyDelay`` (delay and
+press duration, as if ``SendInput`` fell back to ``SendEvent``), each click
+at ``SetMouseDelay``, and each pasted text at its worst-case clipboard wait.
+A chunked mapping only blocks for its longest chunk.  Costs are memoised
+per distinct sequence, so thousands of mappings are estimated at once.
+"""
+import re
+from functools import lru_cache, partial
+
+from .peephole import optimize_steps
+from .runtime import runtime_profile
+from .steps import StepKind, parse_step
+
+DEFAULT_DELAYS = (10, -1, 10)   # AHK v2: SetKeyDelay 10, -1 / SetMouseDelay 10
+PASTE_COST = 1100               # ClipWait(1) timing out, then Sleep 100
+
+# one keystroke each: "{}}" / "{{}", "{Name}", a modifier symbol or a char
+_KEYSTROKE = re.compile(r"\{[{}]\}|\{[^}]+\}|.", re.S)
+
+def keystrokes(send: str) -> int:
+    """Keys pressed by a ``Send`` string (modifier symbols count as one)."""
+    return len(_KEYSTROKE.findall(send))
+
+def _delays(runtime: str) -> tuple:
+    if not runtime:
+        return DEFAULT_DELAYS
+    rt = runtime_profile(runtime)
+    return rt.key_delay, rt.key_duration, rt.mouse_delay
+
+def _costs(tokens, expand, per_key, per_click, paste):
+    """(ms, is_sleep) per step, repeats multiplied out lazily."""
+    steps = expand(tokens) if expand else map(parse_step, tokens)
+    for step in steps:
+        kind = step.kind
+        if kind is StepKind.REPEAT:
+            body = list(_costs(step.body, expand, per_key, per_click, paste))
+            for _ in range(step.value):
+                yield from body
+        elif kind is StepKind.SLEEP:
+            yield step.value, True
+        elif kind is StepKind.KEY:
+            yield keystrokes(step.send) * per_key, False
+        elif kind is StepKind.TEXT:
+            if paste and len(step.value) > paste:
+                yield PASTE_COST, False
+            else:
+                yield len(step.value) * per_key, False
+        else:
+            yield (step.value or 1) * per_click, False
+
+@lru_cache(maxsize=65536)
+def sequence_ms(steps: tuple, optimize: bool = False, runtime: str = "",
+                paste: int = 0, chunked: bool = False) -> int:
+    """Worst-case milliseconds the hotkey running ``steps`` blocks for."""
+    key_delay, key_duration, mouse_delay = _delays(runtime)
+    per_key = max(key_delay, 0) + max(key_duration, 0)
+    expand = partial(optimize_steps, paste=paste) if optimize else None
+    costs = _costs(steps, expand, per_key, max(mouse_delay, 0), paste)
+    if not chunked:
+        return sum(ms for ms, _ in costs)
+    # chunked: the longest run between two sleeps, unless nothing waits
+    # mid-way (then the mapping is emitted as an ordinary block)
+    total = longest = run = 0
+    waited = pending = False
+    for ms, is_sleep in costs:
+        total += ms
+        if is_sleep:
+            pending = True
+            continue
+        if pending:
+            waited = True
+            longest = max(longest, run)
+            run = 0
+        pending = False
+        run += ms
+    return max(longest, run) if waited else total
+
+def mapping_ms(m, profile) -> int:
+    """:func:`sequence_ms` for mapping ``m`` as ``profile`` emits it."""
+    return sequence_ms(tuple(m.steps), profile.optimize,
+                       m.runtime or profile.runtime, profile.paste_threshold,
+                       m.chunked and profile.layout == "blocks")
+
+def over_budget(profile, budget_ms: int) -> list:
+    """``(mapping, ms)`` for every mapping estimated above ``budget_ms``."""
+    return [(m, ms) for m in profile.maps
+            if (ms := mapping_ms(m, profile)) > budget_ms]
+
+def budget_error(slow, budget_ms: int) -> str:
+    """One-line failure message for :func:`over_budget`'s result."""
+    shown = ", ".join(f"{m.trigger} ({format_ms(ms)})" for m, ms in slow[:5])
+    more = f" and {len(slow) - 5} more" if len(slow) > 5 else ""
+    return (f"{len(slow)} mapping(s) over the {format_ms(budget_ms)} budget: "
+            f"{shown}{more}")
+
+def format_ms(ms: int) -> str:
+    return f"{ms} ms" if ms < 1000 else f"{ms / 1000:.1f} s"
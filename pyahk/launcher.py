@@ -0,0 +1,120 @@
+"""Start programs from the script and wait until they are actually ready.
+
+A fixed ``Sleep`` after ``Run`` is either too long or too short.  Each
+:class:`Launch` names a readiness condition instead (the process exists, a
+window matching a WinTitle exists, or a file appears), with a timeout and
+a fallback for when it never happens.  Launches may depend on others by
+name; :func:`launch_levels` orders them so that every program of a level
+is started before any of them is waited for.
+"""
+from pathlib import PureWindowsPath
+from typing import NamedTuple
+
+from .steps import ahk_string
+
+WAITS = ("", "process", "window", "file")
+FALLBACKS = ("continue", "exit")
+
+class Launch(NamedTuple):
+    path: str
+    params: str = ""
+    wait: str = ""              # one of WAITS; "" → only sleep ``delay``
+    target: str = ""            # process name / WinTitle / file; "" → from path
+    timeout: float = 10.0       # seconds to wait for the condition
+    delay: float = 0.0          # seconds slept after Run when there is no
+                                # wait, else on timeout with "continue"
+    fallback: str = "continue"  # on timeout: sleep ``delay`` or ExitApp
+    name: str = ""              # referenced by ``after``; "" → file name
+    after: tuple = ()           # names that must be ready first
+
+# FileExist has no built-in wait; only emitted when a launch needs it
+WAIT_FILE = (
+    "",
+    "WaitFile(path, timeout) {",
+    "    deadline := A_TickCount + timeout * 1000",
+    "    while !FileExist(path) {",
+    "        if A_TickCount >= deadline",
+    "            return false",
+    "        Sleep 50",
+    "    }",
+    "    return true",
+    "}",
+)
+
+def launch_name(launch: Launch) -> str:
+    return launch.name or PureWindowsPath(launch.path).name
+
+def wait_target(launch: Launch) -> str:
+    """``launch.target``, or what to wait for when it is left empty."""
+    if launch.target:
+        return launch.target
+    exe = PureWindowsPath(launch.path).name
+    if launch.wait == "window":
+        return f"ahk_exe {exe}"
+    return exe if launch.wait == "process" else launch.path
+
+def launch_levels(launches) -> list:
+    """``launches`` grouped so each group only depends on earlier ones.
+
+    Input order is kept inside a group.  Raises :class:`ValueError` for
+    duplicate names, unknown dependencies and cycles.
+    """
+    names = {}
+    for launch in launches:
+        if launch.wait not in WAITS:
+            raise ValueError(f"unknown wait condition {launch.wait!r}")
+        if launch.fallback not in FALLBACKS:
+            raise ValueError(f"unknown fallback {launch.fallback!r}")
+        if (name := launch_name(launch)) in names:
+            raise ValueError(f"duplicate launch name {name!r}")
+        names[name] = launch
+    for launch in launches:
+        for dep in launch.after:
+            if dep not in names:
+                raise ValueError(f"{launch_name(launch)!r} waits for unknown {dep!r}")
+    levels, ready = [], set()
+    pending = list(launches)
+    while pending:
+        level = [l for l in pending if ready.issuperset(l.after)]
+        if not level:
+            raise ValueError("launch dependencies form a cycle: "
+                             + ", ".join(launch_name(l) for l in pending))
+        levels.append(level)
+        ready.update(launch_name(l) for l in level)
+        pending = [l for l in pending if l not in level]
+    return levels
+
+def _wait_lines(launch: Launch) -> list:
+    delay = [f"Sleep {int(launch.delay * 1000)}"] if launch.delay else []
+    if not launch.wait:
+        return delay
+    target = ahk_string(wait_target(launch))
+    timeout = f"{launch.timeout:g}"
+    cond = {"process": f"ProcessWait({target}, {timeout})",
+            "window": f"WinWait({target}, , {timeout})",
+            "file": f"WaitFile({target}, {timeout})"}[launch.wait]
+    if launch.fallback == "exit":
+        name = ahk_string(f"{launch_name(launch)} did not start")
+        return [f"if !{cond} {{", f"    MsgBox({name})", "    ExitApp 1", "}"]
+    if delay:
+        return [f"if !{cond}", f"    {delay[0]}"]
+    return [f"{cond}"]
+
+def launch_lines(launches) -> list:
+    """Auto-execute lines starting ``launches`` level by level."""
+    if not launches:
+        return []
+    lines = []
+    for level in launch_levels(launches):
+        lines.append("; launch: " + ", ".join(launch_name(l) for l in level))
+        for launch in level:
+            command = f'"{launch.path}"'
+            if params := launch.params.strip():
+                command += f" {params}"
+            lines.append(f"try Run {ahk_string(command)}")
+        for launch in level:
+            lines += _wait_lines(launch)
+    if any(l.wait == "file" for l in launches):
+        lines += WAIT_FILE
+    lines.append("")
+    return lines
@@ -0,0 +1,83 @@
+"""Peephole pass over a mapping's steps before emission.
+
+Every ``Send`` is a separate trip through AHK's keyboard hook, so
+``a, b, c, "hello", Enter`` costs five sends where one would do.
+:func:`optimize_steps` rewrites a step list into fewer AHK statements:
+
+* adjacent key and text steps share one ``Send`` (text runs alone share
+  one ``SendText``), with text escaped so it is still typed literally;
+* adjacent sleeps are added together, zero-length ones dropped;
+* adjacent ``Click xN`` steps become one ``Click`` with the summed count;
+* ``Repeat 1`` is inlined, and ``Repeat 0`` and empty repeats are dropped.
+
+Text longer than ``paste`` characters is left on its own so it can take
+the clipboard path instead of being typed.
+"""
+from .steps import Step, StepKind, parse_step, send_escape
+
+def _unrolled(tokens):
+    for token in tokens:
+        step = parse_step(token)
+        if step.kind is StepKind.REPEAT and (step.value <= 1 or not step.body):
+            if step.value == 1:
+                yield from _unrolled(step.body)
+        else:
+            yield step
+
+def optimize_steps(tokens, paste: int = 0) -> tuple:
+    """Coalesced :class:`~pyahk.steps.Step` tuple for ``tokens``.
+
+    Merged text-only runs come back as ``TEXT`` steps and mixed runs as
+    ``KEY`` steps holding the whole escaped Send string; summed sleeps and
+    clicks as ``SLEEP``/``CLICK`` steps.  :func:`~pyahk.steps.step_to_ahk`
+    renders them like any other step.
+    """
+    out = []
+    send = []           # pending (is_text, piece) pairs
+    sleep = 0           # pending Sleep milliseconds
+    clicks = 0          # pending Click count
+
+    def flush():
+        nonlocal sleep, clicks
+        if send:
+            if all(is_text for is_text, _ in send):
+                out.append(Step(StepKind.TEXT, value="".join(p for _, p in send)))
+            else:
+                key = "".join(send_escape(p) if is_text else p
+                              for is_text, p in send)
+                out.append(Step(StepKind.KEY, key=key))
+            send.clear()
+        if sleep:
+            out.append(Step(StepKind.SLEEP, value=sleep))
+            sleep = 0
+        if clicks:
+            out.append(Step(StepKind.CLICK, value=clicks))
+            clicks = 0
+
+    for step in _unrolled(tokens):
+        kind = step.kind
+        if kind is StepKind.SLEEP:
+            if not step.value:
+                continue
+            if send or clicks:
+                flush()
+            sleep += step.value
+        elif kind is StepKind.CLICK and step.value is not None:
+            if send or sleep:
+                flush()
+            clicks += step.value
+        elif kind is StepKind.TEXT and paste and len(step.value) > paste:
+            flush()
+            out.append(step)
+        elif kind is StepKind.KEY or kind is StepKind.TEXT:
+            if sleep or clicks:
+                flush()
+            if kind is StepKind.KEY:
+                send.append((False, step.send))
+            elif step.value:
+                send.append((True, step.value))
+        else:
+            flush()
+            out.append(step)
+    flush()
+    return tuple(out)
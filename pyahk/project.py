@@ -0,0 +1,203 @@
+"""Project files: everything needed to reopen a keymap, not just its script.
+
+Two variants of the same versioned data, told apart by their first bytes:
+
+* JSON (``.pyahk``): :meth:`Profile.to_dict` plus a ``format``/``version``
+  tag; human-readable and diffable.  A bare profile JSON as used by the CLI
+  reads as version 0.
+* binary (``.pyahkb``): ``MAGIC``, a version, the settings as JSON, then a
+  zlib-compressed columnar body.  Every distinct string (trigger, step
+  token, runtime name) is stored once and mappings refer to it by index, so
+  a 100k-mapping project is a handful of flat integer arrays.
+
+:func:`read_project` reads and checks the whole file before it returns, so
+a bad mapping near the end can't leave a half-loaded keymap behind.
+"""
+import json
+import os
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+
+from .engine import Mapping, Profile, _map_dict, _map_from_dict
+from .hotkeys import HotkeyIndex
+from .steps import StepKind, parse_step
+
+FORMAT = "pyahk-project"
+VERSION = 1
+MAGIC = b"PYAHKPRJ"
+BINARY_SUFFIX = ".pyahkb"
+_HEADER = struct.Struct("<8sHI")        # magic, version, settings length
+_COUNTS = struct.Struct("<III")         # strings, mappings, steps
+CHUNKED = 1                             # mapping flag bits
+
+# ───────── saving ─────────
+def save_project(profile: Profile, path, binary=None) -> None:
+    """Write ``profile`` to ``path``; binary when the suffix is ``.pyahkb``.
+
+    Goes through a temp file like :func:`~pyahk.engine.save_script`.
+    """
+    path = Path(path)
+    if binary is None:
+        binary = path.suffix.lower() == BINARY_SUFFIX
+    data = _binary(profile) if binary else _json(profile)
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+def _settings(profile: Profile) -> dict:
+    data = profile.to_dict()
+    del data["maps"]
+    return data
+
+def _json(profile: Profile) -> bytes:
+    # settings indented, then one mapping per line: ``indent`` for the whole
+    # document would force the pure-Python encoder
+    head = json.dumps({"format": FORMAT, "version": VERSION,
+                       **_settings(profile)}, ensure_ascii=False, indent=1)
+    dump = json.JSONEncoder(ensure_ascii=False).encode
+    maps = ",\n  ".join([dump(_map_dict(m)) for m in profile.maps])
+    body = f'{head[:-2]},\n "maps": [\n  {maps}\n ]\n}}\n' if maps \
+        else f'{head[:-2]},\n "maps": []\n}}\n'
+    return body.encode("utf-8")
+
+def _column(code, values) -> bytes:
+    col = array(code, values)
+    if sys.byteorder == "big":
+        col.byteswap()
+    return col.tobytes()
+
+def _binary(profile: Profile) -> bytes:
+    index = {}                          # string → position in the table
+
+    def ref(s):
+        if (i := index.get(s)) is None:
+            i = index[s] = len(index)
+        return i
+
+    triggers, runtimes, flags, counts, steps = [], [], [], [], []
+    for m in profile.maps:
+        triggers.append(ref(m.trigger))
+        runtimes.append(ref(m.runtime))
+        flags.append(CHUNKED if m.chunked else 0)
+        counts.append(len(m.steps))
+        steps.extend(map(ref, m.steps))
+    body = b"".join((
+        _COUNTS.pack(len(index), len(triggers), len(steps)),
+        _column("I", map(len, index)),
+        _column("I", triggers), _column("I", runtimes),
+        _column("B", flags), _column("I", counts), _column("I", steps),
+        "".join(index).encode("utf-8"),
+    ))
+    settings = json.dumps(_settings(profile), ensure_ascii=False).encode("utf-8")
+    return b"".join((_HEADER.pack(MAGIC, VERSION, len(settings)), settings,
+                     zlib.compress(body, 1)))
+
+# ───────── loading ─────────
+def read_project(path):
+    """``(settings, mappings)``: the profile fields without ``maps``, and a
+    list of the mappings in order.
+
+    Raises :class:`ValueError` for files written by a newer version, that
+    are not project files at all, or that hold a step that does not parse
+    or a hotkey mapped twice.
+    """
+    data = Path(path).read_bytes()
+    try:
+        if data.startswith(MAGIC):
+            settings, maps = _read_binary(data)
+        else:
+            settings, maps = _read_json(json.loads(data.decode("utf-8")))
+        return settings, _checked(maps)
+    except KeyError as e:
+        raise ValueError(f"corrupt project file: missing {e}") from None
+    except (struct.error, zlib.error, TypeError, IndexError, AttributeError) as e:
+        raise ValueError(f"corrupt project file: {e}") from None
+
+def _checked(maps) -> list:
+    """``maps`` read in full; every step (repeat bodies too) must parse and
+    a hotkey may only be mapped once."""
+    maps = list(maps)
+    hotkeys, parsed = HotkeyIndex(), set()
+
+    def check(tokens):
+        for t in tokens:
+            if t not in parsed:
+                parsed.add(t)
+                if (step := parse_step(t)).kind is StepKind.REPEAT:
+                    check(step.body)
+
+    for m in maps:
+        if not isinstance(m.trigger, str) or not isinstance(m.runtime, str):
+            raise TypeError(f"bad mapping {m!r}")
+        if hotkeys.add(m.trigger) is not None:
+            raise ValueError(f"hotkey {m.trigger!r} is mapped twice")
+        check(m.steps)
+    return maps
+
+def _check_version(version):
+    if version > VERSION:
+        raise ValueError(f"project version {version} is newer than this "
+                         f"program supports ({VERSION})")
+
+def _read_json(data: dict):
+    if data.get("format", FORMAT) != FORMAT:
+        raise ValueError(f"not a {FORMAT} file")
+    _check_version(int(data.get("version", 0)))
+    maps = data.pop("maps", ())
+    settings = {k: v for k, v in data.items() if k not in ("format", "version")}
+    return settings, map(_map_from_dict, maps)
+
+def _read_binary(data: bytes):
+    _, version, size = _HEADER.unpack_from(data)
+    _check_version(version)
+    start = _HEADER.size
+    settings = json.loads(data[start:start + size].decode("utf-8"))
+    body = zlib.decompress(data[start + size:])
+    n_strings, n_maps, n_steps = _COUNTS.unpack_from(body)
+    pos = _COUNTS.size
+
+    def column(code, n):
+        nonlocal pos
+        col = array(code)
+        end = pos + col.itemsize * n
+        col.frombytes(body[pos:end])
+        if sys.byteorder == "big":
+            col.byteswap()
+        pos = end
+        return col
+
+    lengths = column("I", n_strings)
+    triggers, runtimes = column("I", n_maps), column("I", n_maps)
+    flags, counts = column("B", n_maps), column("I", n_maps)
+    steps = column("I", n_steps)
+    blob = body[pos:].decode("utf-8")
+    strings, at = [], 0
+    for n in lengths:
+        strings.append(sys.intern(blob[at:at + n]))
+        at += n
+    return settings, _binary_maps(strings, triggers, runtimes, flags,
+                                  counts, steps)
+
+def _binary_maps(strings, triggers, runtimes, flags, counts, steps):
+    get = strings.__getitem__
+    tokens = list(map(get, steps))
+    at = 0
+    for trigger, runtime, flag, n in zip(map(get, triggers), map(get, runtimes),
+                                         flags, counts):
+        yield Mapping(trigger, tuple(tokens[at:at + n]), runtime,
+                      bool(flag & CHUNKED))
+        at += n
+
+def load_profile(path) -> Profile:
+    """A whole :class:`Profile` from a project or plain profile file."""
+    settings, maps = read_project(path)
+    profile = Profile.from_dict(settings)
+    profile.maps = maps
+    return profile
@@ -0,0 +1,59 @@
+"""Runtime performance profiles emitted into the script header.
+
+AHK's defaults (``SendMode "Input"`` falling back to event delays, 70
+hotkeys per 2 s before the "too many hotkeys" warning, one thread per
+hotkey) suit typing macros but not high-rate ones.  A profile spells the
+relevant settings out explicitly; a mapping may override the per-thread
+part (send mode and delays) for its own hotkey.
+"""
+from typing import NamedTuple
+
+class RuntimeProfile(NamedTuple):
+    label: str
+    send_mode: str              # "Input", "Event" or "Play"
+    key_delay: int              # SetKeyDelay delay, press duration
+    key_duration: int
+    mouse_delay: int
+    hotkey_interval: int        # A_HotkeyInterval; 0 disables the limit
+    max_hotkeys: int            # A_MaxHotkeysPerInterval
+    max_threads: int            # #MaxThreadsPerHotkey
+    priority: str = ""          # ProcessSetPriority; "" leaves it alone
+    single_instance: str = "Force"
+
+RUNTIME_PROFILES = {
+    "low_latency": RuntimeProfile(
+        "Low latency", "Input", -1, -1, -1, 0, 1000, 1, "High"),
+    "compatible": RuntimeProfile(
+        "Compatible", "Event", 10, 10, 10, 2000, 70, 1),
+    "game": RuntimeProfile(
+        "Game", "Event", 20, 30, 20, 2000, 500, 2, "High"),
+}
+
+def runtime_profile(name) -> RuntimeProfile:
+    try:
+        return RUNTIME_PROFILES[name]
+    except KeyError:
+        raise ValueError(f"unknown runtime profile {name!r}") from None
+
+def runtime_header(name: str) -> list:
+    """Directives and auto-execute settings for profile ``name`` ("" → none)."""
+    if not name:
+        return []
+    rt = runtime_profile(name)
+    lines = [f"#SingleInstance {rt.single_instance}",
+             f"#MaxThreadsPerHotkey {rt.max_threads}",
+             *thread_settings(name),
+             f"A_HotkeyInterval := {rt.hotkey_interval}",
+             f"A_MaxHotkeysPerInterval := {rt.max_hotkeys}"]
+    if rt.priority:
+        lines.append(f'ProcessSetPriority "{rt.priority}"')
+    return lines
+
+def thread_settings(name: str) -> list:
+    """The per-thread part of ``name``; valid inside a hotkey body."""
+    if not name:
+        return []
+    rt = runtime_profile(name)
+    return [f'SendMode "{rt.send_mode}"',
+            f"SetKeyDelay {rt.key_delay}, {rt.key_duration}",
+            f"SetMouseDelay {rt.mouse_delay}"]
@@ -0,0 +1,206 @@
+"""Step and hotkey grammar.
+
+Sequence steps are written in the GUI's display notation (``Ctrl+C``,
+``0.05 s``, ``"text"``, ``Click x2``, ``Repeat 3 ["a", "0.1 s"]``).  :func:`parse_step` turns one token
+into a typed :class:`Step` with a single precompiled pattern and memoises the
+result, since real profiles reuse a few hundred tokens over and over.  Steps
+are compact: modifiers are a bitmask and key names are interned, and
+:func:`intern_tokens` shares one string per distinct token across a profile.
+"""
+import json
+import re
+import sys
+from enum import Enum
+from functools import lru_cache
+from typing import NamedTuple
+
+# ───────── constants ─────────
+MODS = {"ctrl":"^", "alt":"!", "shift":"+", "win":"#"}
+CTRL, ALT, SHIFT, WIN = 1, 2, 4, 8
+_MOD_BITS = dict(zip(MODS, (CTRL, ALT, SHIFT, WIN)))
+# AHK prefix for every bitmask, always in ^!+# order
+MOD_PREFIX = tuple("".join(sym for name, sym in MODS.items() if i & _MOD_BITS[name])
+                   for i in range(16))
+SPECIALS = {
+    "enter","return","tab","esc","escape","space","backspace","bs",
+    "delete","del","home","end","pgup","pgdn","up","down","left","right"
+}
+CLICK_TRIGGERS = {
+    "click":"LButton","left click":"LButton","click left":"LButton",
+    "click right":"RButton","right click":"RButton"
+}
+PARSE_CACHE_SIZE = 65536
+
+# One alternation, tried in the same order the old if-chain used (repeat,
+# whose body is a JSON list of tokens, was added in front of it).
+_TOKEN = re.compile(r"""
+      (?P<repeat> [rR][eE][pP][eE][aA][tT] \s+ (?P<times>\d+) \s* (?P<body>\[.*\]) )
+    | (?P<clicks> [cC][lL][iI][cC][kK] \s+ [xX] (?P<n>\d+) )
+    | (?P<click>  [cC][lL][iI][cC][kK] .* )
+    | (?P<sleep>  \d+ (?:\.\d+)? ) \s* [sS]
+    | (?P<text>   ".*" )
+    | (?P<key>    .* )
+""", re.X | re.S)
+_SEP = re.compile(r"[+\-\s]+")
+_SEND_SPECIAL = re.compile(r"[\^+!#{}]")
+
+# ───────── typed steps ─────────
+class StepKind(Enum):
+    KEY = "key"
+    CLICK = "click"
+    SLEEP = "sleep"
+    TEXT = "text"
+    REPEAT = "repeat"
+
+class Step(NamedTuple):
+    """A parsed sequence step.
+
+    ``KEY``: ``mods`` is a ``CTRL|ALT|SHIFT|WIN`` bitmask, ``key`` the interned
+    AHK key (``c``, ``{Enter}``); :attr:`send` joins them (``^+c``).
+    ``SLEEP``: ``value`` is milliseconds.  ``TEXT``: ``value`` is the
+    literal without its quotes.  ``CLICK``: ``value`` is the repeat
+    count for ``Click xN``, otherwise ``key`` holds the token verbatim.
+    ``REPEAT``: ``value`` is the count and ``body`` the repeated tokens.
+    """
+    kind: StepKind
+    mods: int = 0
+    key: str = ""
+    value: object = None
+    body: tuple = ()
+
+    @property
+    def send(self) -> str:
+        """``KEY``: the ``Send`` string, modifier prefix included."""
+        return MOD_PREFIX[self.mods] + self.key
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_step(token: str) -> Step:
+    t = token.strip()
+    m = _TOKEN.fullmatch(t)
+    group = m.lastgroup
+    if group == "repeat":
+        body = json.loads(m.group("body"))
+        if not all(isinstance(b, str) for b in body):
+            raise ValueError(f"repeat body must be a list of steps: {token!r}")
+        return Step(StepKind.REPEAT, value=int(m.group("times")), body=tuple(body))
+    if group == "clicks":
+        return Step(StepKind.CLICK, value=int(m.group("n")))
+    if group == "click":
+        return Step(StepKind.CLICK, key=t)
+    if group == "sleep":
+        return Step(StepKind.SLEEP, value=int(float(m.group("sleep"))*1000))
+    if group == "text":
+        return Step(StepKind.TEXT, value=t[1:-1])
+    parts = _SEP.split(t)
+    mods = 0
+    for p in parts[:-1]:
+        mods |= _MOD_BITS.get(p.lower(), 0)
+    raw = parts[-1]
+    key = raw.lower() if len(raw)==1 and raw.isalnum() else raw
+    if not (len(key)==1 and key.isalnum()):
+        key = f"{{{key}}}"
+    return Step(StepKind.KEY, mods=mods, key=sys.intern(key))
+
+def intern_tokens(tokens) -> tuple:
+    """``tokens`` parsed once (so bad ones fail here) and interned.
+
+    Profiles repeat a handful of tokens thousands of times; interning keeps
+    one string per distinct token instead of one per step.
+    """
+    out = tuple([sys.intern(t) for t in tokens])   # exact-size tuple
+    for t in out:
+        parse_step(t)
+    return out
+
+def parse_stats():
+    """``(hits, misses, maxsize, currsize)`` of the step memo table."""
+    return parse_step.cache_info()
+
+def repeat_token(times: int, tokens) -> str:
+    """The ``Repeat N [...]`` token running ``tokens`` ``times`` times."""
+    return f"Repeat {int(times)} {json.dumps(list(tokens), ensure_ascii=False)}"
+
+def step_label(token: str, quotes: bool = True) -> str:
+    """Short human-readable form; spells repeat bodies out as ``{a, b}``.
+
+    With ``quotes=False`` text steps lose their quotes (for AHK strings).
+    """
+    step = parse_step(token) if token[:6].lower() == "repeat" else None
+    if step is None or step.kind is not StepKind.REPEAT:
+        if not quotes and token.startswith('"') and token.endswith('"'):
+            return token[1:-1]
+        return token
+    inner = ", ".join(step_label(t, quotes) for t in step.body)
+    return f"Repeat {step.value} {{{inner}}}"
+
+# ───────── emission ─────────
+def ahk_escape(text: str) -> str:
+    """``text`` escaped for the inside of an AHK v2 ``"..."`` string.
+
+    Line breaks become ```n``/```r``: a quoted string can't span lines.
+    """
+    text = text.replace("`", "``").replace('"', '`"')
+    if "\n" in text or "\r" in text:
+        text = text.replace("\n", "`n").replace("\r", "`r")
+    return text
+
+def ahk_string(text: str) -> str:
+    return f'"{ahk_escape(text)}"'
+
+def send_escape(text: str) -> str:
+    """``text`` as Send keys that type it literally (``a+b`` → ``a{+}b``)."""
+    return _SEND_SPECIAL.sub(lambda m: f"{{{m.group()}}}", text)
+
+def step_to_ahk(step: Step, paste: int = 0) -> str:
+    """The one-line statement for ``step``.
+
+    Text longer than ``paste`` characters (when non-zero) goes through the
+    script's ``PasteText`` clipboard helper instead of being typed.  A
+    ``REPEAT`` is a block, not a statement: raises :class:`ValueError`
+    (use :func:`step_lines`).
+    """
+    kind = step.kind
+    if kind is StepKind.KEY:
+        return f"Send {ahk_string(step.send)}"
+    if kind is StepKind.SLEEP:
+        return f"Sleep {step.value}"
+    if kind is StepKind.TEXT:
+        if paste and len(step.value) > paste:
+            return f"PasteText({ahk_string(step.value)})"
+        return f"SendText {ahk_string(step.value)}"
+    if kind is StepKind.REPEAT:
+        raise ValueError("a repeat renders as several lines; use step_lines")
+    if step.value is not None:
+        return f"Click {step.value}"
+    return step.key
+
+def to_ahk_step(token: str) -> str:
+    """AHK code for one token; a repeat comes out as its ``Loop`` block."""
+    step = parse_step(token)
+    if step.kind is StepKind.REPEAT:
+        return "\n".join(step_lines((token,)))
+    return step_to_ahk(step)
+
+def step_lines(tokens, expand=None, paste: int = 0, indent: str = "    "):
+    """Statements for ``tokens``, with repeats as nested ``Loop N`` blocks.
+
+    ``expand(tokens)`` turns a token list (the top level and every repeat
+    body) into :class:`Step` objects; it defaults to plain parsing.
+    """
+    steps = expand(tokens) if expand else map(parse_step, tokens)
+    for step in steps:
+        if step.kind is StepKind.REPEAT:
+            yield f"Loop {step.value} {{"
+            for line in step_lines(step.body, expand, paste, indent):
+                yield indent + line
+            yield "}"
+        else:
+            yield step_to_ahk(step, paste)
+
+# ───────── hotkeys ─────────
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def hotkey_to_ahk(raw: str) -> str:
+    r = raw.strip().lower()
+    if r in CLICK_TRIGGERS:
+        return CLICK_TRIGGERS[r]
+    return "".join(MODS.get(t, t) for t in _SEP.split(r))
@@ -0,0 +1,232 @@
+"""Ordered mapping store with stable IDs.
+
+Every mapping gets an integer ID that never changes while it lives in the
+store, so views and the preview can refer to it without recomputing list
+offsets.  Order is kept in a slot array with gaps plus a Fenwick tree over
+slot occupancy, which gives O(log n) ``row ↔ ID`` translation, insert, move
+and remove; appends (the common case) never shift anything.
+
+Triggers are unique: adding a mapping whose hotkey (in any spelling) is
+already mapped raises :class:`ValueError` and leaves the store unchanged.
+
+The store is also a read-only sequence of :class:`~pyahk.engine.Mapping`,
+so it can be handed to the engine as ``Profile.maps`` directly.
+"""
+from operator import add
+
+from .hotkeys import HotkeyIndex
+
+GAP = 8          # slot spacing after a respace; room for mid-list inserts
+
+class MappingStore:
+    def __init__(self, mappings=()):
+        self._next_id = 1
+        self._maps = {}         # id → Mapping
+        self._slot = {}         # id → slot
+        self._ids = []          # slot → id or None
+        self._tree = [0]        # Fenwick tree over slot occupancy (1-based)
+        self._tail = 0          # first slot after the last one used
+        self.hotkeys = HotkeyIndex()    # canonical trigger → id
+        if mappings:
+            self.extend(mappings)
+
+    # -- sequence protocol -------------------------------------------------
+    def __len__(self):
+        return len(self._maps)
+
+    def __iter__(self):
+        maps = self._maps
+        for mid in self._ids:
+            if mid is not None:
+                yield maps[mid]
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self._maps)
+        return self._maps[self.id_at(row)]
+
+    def __contains__(self, mid):
+        return mid in self._maps
+
+    # -- lookup ------------------------------------------------------------
+    def get(self, mid):
+        return self._maps[mid]
+
+    def ids(self):
+        """IDs in display order."""
+        return (mid for mid in self._ids if mid is not None)
+
+    def id_at(self, row):
+        if not 0 <= row < len(self._maps):
+            raise IndexError(row)
+        return self._ids[self._kth(row)]
+
+    def index_of(self, mid):
+        return self._prefix(self._slot[mid]) - 1
+
+    def find(self, hotkey):
+        """ID of the mapping triggered by ``hotkey`` in any spelling, or None."""
+        return self.hotkeys.owner(hotkey)
+
+    # -- mutation ----------------------------------------------------------
+    def append(self, mapping):
+        mid = self._new_id(mapping)
+        if self._tail >= len(self._ids):
+            self._respace(extra=1)
+        self._place(mid, self._tail)
+        return mid
+
+    def extend(self, mappings):
+        """Append many mappings with a single O(n) re-layout.
+
+        All or nothing: ``mappings`` is read in full and every trigger
+        claimed before the store changes, so an error leaves it as it was.
+        """
+        mappings = list(mappings)
+        first = self._next_id
+        claimed = []
+        try:
+            for mid, m in enumerate(mappings, first):
+                self._claim(m.trigger, mid)
+                claimed.append(m.trigger)
+        except ValueError:
+            for mid, trigger in enumerate(claimed, first):
+                self.hotkeys.discard(trigger, mid)
+            raise
+        new = list(range(first, first + len(mappings)))
+        self._maps.update(zip(new, mappings))
+        self._next_id += len(new)
+        self._respace(live=[*self.ids(), *new])
+        return new
+
+    def insert(self, row, mapping):
+        """Insert before ``row``; returns the new ID."""
+        if row >= len(self._maps):
+            return self.append(mapping)
+        mid = self._new_id(mapping)
+        self._place(mid, self._free_slot_before(max(row, 0)))
+        return mid
+
+    def remove(self, mid):
+        """Drop ``mid`` and return its mapping."""
+        mapping = self._maps.pop(mid)
+        self.hotkeys.discard(mapping.trigger, mid)
+        self._unplace(mid)
+        if len(self._ids) > 64 and len(self._maps) * GAP * 4 < len(self._ids):
+            self._respace()
+        return mapping
+
+    def move(self, mid, row):
+        """Move ``mid`` so it ends up at ``row``."""
+        self._unplace(mid)
+        if row >= len(self._maps) - 1:
+            if self._tail >= len(self._ids):
+                self._respace(extra=1)
+            self._place(mid, self._tail)
+        else:
+            self._place(mid, self._free_slot_before(max(row, 0)))
+
+    def replace(self, mid, mapping):
+        """Swap the mapping stored under ``mid`` without moving it."""
+        old = self._maps[mid]
+        if old.trigger != mapping.trigger:
+            if self.hotkeys.owner(mapping.trigger, mid) != mid:
+                raise ValueError(f"hotkey {mapping.trigger!r} is already mapped")
+            self.hotkeys.discard(old.trigger, mid)
+            self.hotkeys.add(mapping.trigger, mid)
+        self._maps[mid] = mapping
+
+    def clear(self):
+        self._maps.clear()
+        self._slot.clear()
+        self._ids = []
+        self._tree = [0]
+        self._tail = 0
+        self.hotkeys.clear()
+
+    # -- internals ---------------------------------------------------------
+    def _new_id(self, mapping):
+        mid = self._next_id
+        self._claim(mapping.trigger, mid)
+        self._next_id += 1
+        self._maps[mid] = mapping
+        return mid
+
+    def _claim(self, trigger, mid):
+        """Index ``trigger`` for ``mid``; one mapping per hotkey."""
+        if self.hotkeys.add(trigger, mid) is not None:
+            raise ValueError(f"hotkey {trigger!r} is already mapped")
+
+    def _place(self, mid, slot):
+        self._ids[slot] = mid
+        self._slot[mid] = slot
+        self._fenwick_add(slot, 1)
+        self._tail = max(self._tail, slot + 1)
+
+    def _unplace(self, mid):
+        slot = self._slot.pop(mid)
+        self._ids[slot] = None
+        self._fenwick_add(slot, -1)
+
+    def _free_slot_before(self, row):
+        """A free slot between the items at ``row - 1`` and ``row``."""
+        nxt = self._slot[self._ids[self._kth(row)]]
+        prev = self._slot[self._ids[self._kth(row - 1)]] if row else -1
+        if nxt - prev > 1:
+            return (prev + nxt) // 2
+        self._respace()
+        return self._free_slot_before(row)
+
+    def _respace(self, extra=0, live=None):
+        """Re-lay live items ``GAP`` slots apart; O(n), amortised by doubling."""
+        if live is None:
+            live = [mid for mid in self._ids if mid is not None]
+        size = max(64, 2 * GAP * (len(live) + extra))
+        ids = [None] * size
+        slots = range(GAP // 2, GAP // 2 + GAP * len(live), GAP)
+        ids[GAP // 2:slots.stop:GAP] = live
+        self._slot.update(zip(live, slots))
+        self._ids = ids
+        self._tail = slots[-1] + 1 if live else 0
+        # linear-time Fenwick build, one slice per level: every node whose
+        # lowest set bit is ``step`` adds into the node ``step`` above it
+        tree = [0] * (size + 1)
+        tree[GAP // 2 + 1:slots.stop + 1:GAP] = [1] * len(live)
+        step = 1
+        while step <= size:
+            tree[2 * step::2 * step] = map(add, tree[2 * step::2 * step],
+                                           tree[step::2 * step])
+            step *= 2
+        self._tree = tree
+
+    def _fenwick_add(self, slot, delta):
+        tree = self._tree
+        size = len(tree)
+        i = slot + 1
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, slot):
+        """Number of occupied slots in ``[0, slot]``."""
+        tree = self._tree
+        i = slot + 1
+        total = 0
+        while i:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def _kth(self, row):
+        """Slot holding the ``row``-th live item (0-based)."""
+        tree = self._tree
+        size = len(tree)
+        pos = 0
+        bit = 1 << (size - 1).bit_length()
+        while bit:
+            nxt = pos + bit
+            if nxt < size and tree[nxt] <= row:
+                pos = nxt
+                row -= tree[nxt]
+            bit >>= 1
+        return pos
@@ -0,0 +1,590 @@
+"""Qt helpers shared by ``main.py`` and ``main_zhcn.py``.
+
+Unlike the rest of the package this module needs PyQt6; the engine and the
+CLI never import it.
+"""
+import sys
+from contextlib import contextmanager
+from functools import partial
+
+from PyQt6.QtCore import (
+    QAbstractListModel, QCoreApplication, QModelIndex, QObject, QRunnable, Qt,
+    QThreadPool, QTimer, pyqtSignal,
+)
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtWidgets import (
+    QComboBox, QGridLayout, QLabel, QListWidgetItem, QProgressDialog,
+    QPushButton, QTabWidget, QWidget,
+)
+
+from .compiler import ProcessJob
+from .engine import (
+    footer_lines, header_lines, is_empty, iter_script, mapping_lines,
+)
+from .latency import format_ms, mapping_ms
+from .runtime import RUNTIME_PROFILES
+from .steps import StepKind, parse_step, step_label
+
+# ───────── incremental script preview ─────────
+class ScriptPreview:
+    """Keeps a ``QTextEdit`` in sync with a profile by patching line ranges.
+
+    The document is laid out as ``header | block 0 … block n-1 | footer``.
+    Only the line count of every mapping block is remembered, so appending a
+    mapping touches one block of text no matter how large the script is, and
+    the view's scroll position is left alone.  :meth:`insert`/:meth:`remove`
+    only touch the mapping blocks; follow them with :meth:`refresh` so the
+    header (whose info tooltip lists every mapping) catches up.  While the
+    document needs a full render anyway (it is empty, or in dedup mode)
+    they do nothing and leave that render to the follow-up :meth:`refresh`.
+
+    With ``compare`` set, optimised blocks also show the unoptimised
+    statements as a comment; call :meth:`reset` after changing it.  Shared
+    functions (``profile.dedup``) tie blocks together, so in that mode every
+    call re-renders the whole script.
+    """
+    def __init__(self, edit, jobs=None):
+        self.edit = edit
+        self.compare = False
+        self.jobs = jobs                # LatestJob → generate off the GUI thread
+        self._header = None             # None ⇔ document needs a full render
+        self._blocks = []               # line count per mapping block
+        self._block_lines = 0           # sum(self._blocks)
+
+    # -- public API --------------------------------------------------------
+    def reset(self, profile):
+        """Full re-render; used for resets and empty ↔ non-empty transitions.
+
+        With ``jobs`` the text is generated from a snapshot of ``profile`` on
+        a worker thread and swapped in when that generation is the newest.
+        Until then the document counts as stale: :meth:`insert` and
+        :meth:`remove` leave it alone and the next :meth:`refresh` starts
+        over from a fresh snapshot, cancelling this one.
+        """
+        self._header = None
+        self._blocks = []
+        self._block_lines = 0
+        if self.jobs is None:
+            self._show(_plan(profile, self.compare))
+        else:
+            self.jobs.submit(partial(_plan, profile.snapshot(), self.compare),
+                             self._show)
+
+    def refresh(self, profile):
+        """Re-render the header only (toggle/exit/info/exe changed)."""
+        if is_empty(profile) or self._header is None \
+                or len(self._blocks) != len(profile.maps):
+            self.reset(profile)
+            return
+        if self.jobs is None:
+            self._patch_header(header_lines(profile))
+        else:
+            snapshot = profile.snapshot()
+            self.jobs.submit(lambda cancelled: header_lines(snapshot),
+                             self._patch_header)
+
+    @property
+    def busy(self):
+        """True while a generation is still running in the background."""
+        return self.jobs is not None and self.jobs.pending
+
+    def wait(self):
+        """Block until the newest generation is on screen (for benchmarks)."""
+        if self.jobs is not None:
+            self.jobs.wait()
+
+    def insert(self, index, profile):
+        """``profile.maps[index]`` was just inserted."""
+        if self._header is None:
+            return                      # refresh() will render everything
+        block = self._render(profile.maps[index], profile)
+        self._replace(self._offset(index), 0, block)
+        self._blocks.insert(index, len(block))
+        self._block_lines += len(block)
+
+    def remove(self, index, profile):
+        """The mapping at ``index`` was just removed from ``profile.maps``."""
+        if self._header is None:
+            return                      # refresh() will render everything
+        if is_empty(profile):
+            self.reset(profile)
+            return
+        first = self._offset(index)
+        count = self._blocks.pop(index)
+        self._block_lines -= count
+        self._replace(first, count, ())
+
+    # -- internals ---------------------------------------------------------
+    def _render(self, m, profile):
+        return mapping_lines(m, profile, self.compare)
+
+    def _show(self, plan):
+        self._header, self._blocks, text = plan
+        self._block_lines = sum(self._blocks)
+        self.edit.setPlainText(text)
+
+    def _patch_header(self, header):
+        if self._header is None:
+            return                      # a full render has started since
+        if header != self._header:
+            self._replace(0, len(self._header), header)
+            self._header = header
+
+    def _offset(self, index):
+        # appending is the hot path and needs no prefix sum
+        if index == len(self._blocks):
+            return len(self._header) + self._block_lines
+        return len(self._header) + sum(self._blocks[:index])
+
+    def _replace(self, first, count, lines):
+        """Replace document lines ``[first, first+count)`` with ``lines``."""
+        doc = self.edit.document()
+        cur = QTextCursor(doc)
+        cur.beginEditBlock()
+        start = doc.findBlockByNumber(first).position()
+        if count:
+            last = doc.findBlockByNumber(first + count - 1)
+            end = last.position() + last.length() - 1
+            if not lines:
+                # swallow the separator too; a footer always follows
+                end += 1
+            cur.setPosition(start)
+            cur.setPosition(end, QTextCursor.MoveMode.KeepAnchor)
+            cur.insertText("\n".join(lines))
+        elif lines:
+            cur.setPosition(start)
+            cur.insertText("\n".join(lines) + "\n")
+        cur.endEditBlock()
+
+def _checked(lines, cancelled, every=1024):
+    for i, line in enumerate(lines):
+        if not i % every and cancelled():
+            raise JobCancelled
+        yield line
+
+def _plan(profile, compare, cancelled=lambda: False):
+    """``(header, block line counts, text)`` of a full render.
+
+    The header is None when the document has no incremental layout (an
+    empty profile, or shared functions in dedup mode).  Safe to run on a
+    worker thread as long as ``profile`` is a snapshot.
+    """
+    if is_empty(profile) or profile.dedup:
+        return None, [], "\n".join(_checked(iter_script(profile), cancelled))
+    header = header_lines(profile)
+    lines = list(header)
+    blocks = []
+    for m in _checked(profile.maps, cancelled):
+        block = mapping_lines(m, profile, compare)
+        blocks.append(len(block))
+        lines += block
+    lines += footer_lines(profile)
+    return header, blocks, "\n".join(lines)
+
+# ───────── background generation ─────────
+class JobCancelled(Exception):
+    """Raised inside a job whose result nobody is waiting for any more."""
+
+class _JobSignals(QObject):
+    done = pyqtSignal(object, object)   # job, result; sent once run() is over
+
+class _Job(QRunnable):
+    def __init__(self, fn, on_done):
+        super().__init__()
+        self.setAutoDelete(False)       # Python owns it; LatestJob keeps it
+                                        # until ``done`` says run() is over
+        self.fn = fn
+        self.on_done = on_done
+        self.cancelled = False
+        self.error = None
+        self.signals = _JobSignals()
+
+    def run(self):
+        result = None
+        try:
+            if not self.cancelled:
+                result = self.fn(lambda: self.cancelled)
+        except JobCancelled:
+            pass
+        except Exception:
+            self.error = sys.exc_info()
+        self.signals.done.emit(self, result)
+
+class LatestJob(QObject):
+    """Runs ``fn(cancelled)`` on a worker thread; only the newest job counts.
+
+    :meth:`submit` supersedes the previous job: it is taken back off the
+    pool if it has not started, otherwise its ``cancelled()`` turns true so
+    it can stop at its next check, and its result is dropped either way.
+    ``on_done(result)`` runs on the GUI thread.  One worker thread, so a
+    stale job never competes with its successor for the GIL.  A job that
+    has started stays referenced until it reports back, since the pool
+    still runs it after it has been superseded.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+        self._job = None
+        self._live = set()              # submitted jobs not yet reported back
+
+    @property
+    def pending(self):
+        return self._job is not None
+
+    def submit(self, fn, on_done):
+        self.cancel()
+        job = self._job = _Job(fn, on_done)
+        self._live.add(job)
+        # a bound slot, so Qt drops the delivery if this object is gone
+        job.signals.done.connect(self._finished, Qt.ConnectionType.QueuedConnection)
+        self.pool.start(job)
+
+    def cancel(self):
+        if self._job is not None:
+            self._job.cancelled = True
+            if self.pool.tryTake(self._job):
+                self._live.discard(self._job)   # never started
+            self._job = None
+
+    def wait(self):
+        """Block until the newest job's result has been delivered."""
+        while self._job is not None:
+            self.pool.waitForDone()
+            QCoreApplication.processEvents()
+
+    def _finished(self, job, result):
+        self._live.discard(job)
+        if job is not self._job:
+            return                      # superseded while it ran
+        self._job = None
+        if job.error is not None:
+            sys.excepthook(*job.error)
+            return
+        job.on_done(result)
+
+# ───────── coalesced refresh ─────────
+class RefreshScheduler(QObject):
+    """Runs the window's preview refresh at most once per event-loop turn.
+
+    :meth:`request` (header refresh) and :meth:`request_full` (re-render)
+    arm a zero-delay single-shot timer, so a burst of mutations such as a
+    pasted or scripted import costs one refresh instead of one per mapping.
+    A pending re-render absorbs header refreshes.  Inside :meth:`batch`
+    nothing runs until the outermost block exits, which flushes at once.
+    """
+    def __init__(self, refresh, rerender, parent=None):
+        super().__init__(parent)
+        self._refresh = refresh
+        self._rerender = rerender
+        self._dirty = self._full = False
+        self._depth = 0
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self.flush)
+
+    def request(self):
+        self._schedule(False)
+
+    def request_full(self):
+        self._schedule(True)
+
+    def _schedule(self, full):
+        self._full = self._full or full
+        if not self._dirty:
+            self._dirty = True
+            if not self._depth:
+                self._timer.start()
+
+    def flush(self):
+        """Run the pending refresh now; a no-op if none is pending."""
+        self._timer.stop()
+        if self._depth or not self._dirty:
+            return
+        full = self._full
+        self._dirty = self._full = False
+        (self._rerender if full else self._refresh)()
+
+    @contextmanager
+    def batch(self):
+        self._depth += 1
+        try:
+            yield self
+        finally:
+            self._depth -= 1
+            self.flush()
+
+# ───────── mapping list model ─────────
+def _timing_options(profile):
+    if profile is None:
+        return None
+    return profile.optimize, profile.runtime, profile.paste_threshold, profile.layout
+
+class MappingListModel(QAbstractListModel):
+    """Rows for the toggle/exit/info controls, then one row per mapping.
+
+    The model reads straight from the window's
+    :class:`~pyahk.store.MappingStore`; display strings are only formatted
+    for the rows the view actually paints.  Mutate the store through
+    :meth:`append_mapping`/:meth:`remove_mapping` so views are notified with
+    row-level signals instead of full resets.  After :meth:`set_timing`
+    every mapping row ends in its estimated worst-case blocking time.
+    """
+    CONTROL_LABELS = {"toggle": "Toggle", "exit": "Exit", "info": "Info"}
+
+    def __init__(self, maps, parent=None):
+        super().__init__(parent)
+        self._maps = maps
+        self.controls = {}              # name → hotkey, in CONTROL_LABELS order
+        self._timing = None             # profile the latency is estimated for
+
+    # -- Qt model interface ------------------------------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.controls) + len(self._maps)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role not in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole) \
+                or not index.isValid():
+            return None
+        row = index.row()
+        if (name := self.control_at(row)) is not None:
+            return f"{self.CONTROL_LABELS[name]} → {self.controls[name]}"
+        m = self._maps[row - len(self.controls)]
+        text = f"{m.trigger} → {', '.join(map(step_label, m.steps))}"
+        tags = [t for t in (m.runtime, "timer" if m.chunked else "") if t]
+        if tags:
+            text += f"  [{', '.join(tags)}]"
+        if self._timing is not None:
+            text += f"  ≈ {format_ms(mapping_ms(m, self._timing))}"
+        return text
+
+    # -- row bookkeeping ---------------------------------------------------
+    def set_timing(self, profile):
+        """Estimate latencies with ``profile``'s options; repaints on change."""
+        changed = _timing_options(profile) != _timing_options(self._timing)
+        self._timing = profile
+        if changed and len(self._maps):
+            self.dataChanged.emit(self.index(len(self.controls)),
+                                  self.index(self.rowCount() - 1))
+
+    def control_at(self, row):
+        """Control name shown at ``row``, or ``None`` for a mapping row."""
+        if 0 <= row < len(self.controls):
+            return list(self.controls)[row]
+        return None
+
+    def mapping_id(self, row):
+        """Store ID of the mapping shown at ``row``, or ``None``."""
+        idx = row - len(self.controls)
+        return self._maps.id_at(idx) if 0 <= idx < len(self._maps) else None
+
+    def set_control(self, name, hotkey):
+        """Show, update or (with an empty ``hotkey``) drop a control row."""
+        order = list(self.CONTROL_LABELS)
+        if hotkey:
+            if name in self.controls:
+                self.controls[name] = hotkey
+                row = list(self.controls).index(name)
+                self.dataChanged.emit(self.index(row), self.index(row))
+                return
+            row = sum(1 for n in self.controls if order.index(n) < order.index(name))
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.controls[name] = hotkey
+            self.controls = {n: self.controls[n] for n in order if n in self.controls}
+            self.endInsertRows()
+        elif name in self.controls:
+            row = list(self.controls).index(name)
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.controls[name]
+            self.endRemoveRows()
+
+    def append_mapping(self, mapping):
+        """Append to the store; returns the new mapping's ID."""
+        row = len(self.controls) + len(self._maps)
+        self.beginInsertRows(QModelIndex(), row, row)
+        mid = self._maps.append(mapping)
+        self.endInsertRows()
+        return mid
+
+    def remove_mapping(self, mid):
+        """Remove ``mid`` from the store and return its mapping."""
+        row = len(self.controls) + self._maps.index_of(mid)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        mapping = self._maps.remove(mid)
+        self.endRemoveRows()
+        return mapping
+
+    def clear(self):
+        self.beginResetModel()
+        self._maps.clear()
+        self.controls.clear()
+        self.endResetModel()
+
+    def load(self, mappings):
+        """Replace every mapping with ``mappings``; all or nothing."""
+        mappings = list(mappings)
+        old = list(self._maps)
+        self.beginResetModel()
+        try:
+            self._maps.clear()
+            try:
+                self._maps.extend(mappings)
+            except ValueError:
+                self._maps.extend(old)
+                raise
+        finally:
+            self.endResetModel()
+
+# ───────── key picker building blocks ─────────
+class LazyTabWidget(QTabWidget):
+    """Tabs whose pages are only filled the first time they are shown."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._builders = {}
+        self.currentChanged.connect(self._populate)
+
+    def addLazyTab(self, title, build):
+        """Add an empty page; ``build(page)`` runs on its first view."""
+        page = QWidget()
+        self._builders[page] = build
+        index = self.addTab(page, title)
+        if index == self.currentIndex():
+            self._populate(index)
+        return page
+
+    def _populate(self, index):
+        page = self.widget(index)
+        if (build := self._builders.pop(page, None)) is not None:
+            build(page)
+
+def fill_key_grid(page, keys, on_pick, cols=10):
+    """Lay out one button per key on ``page``.
+
+    ``keys`` holds plain key names, ``(key, face)`` or ``(key, face, tooltip)``
+    tuples, or ``None`` for a ``|`` separator cell.
+    """
+    grid = QGridLayout(page)
+    for n, entry in enumerate(keys):
+        row, col = divmod(n, cols)
+        if entry is None:
+            sep = QLabel("|"); sep.setAlignment(Qt.AlignmentFlag.AlignCenter)
+            grid.addWidget(sep, row, col)
+            continue
+        if isinstance(entry, str):
+            entry = (entry, entry)
+        key, face, tip = (*entry, None)[:3]
+        btn = QPushButton(face); btn.setFixedWidth(44)
+        if tip:
+            btn.setToolTip(tip)
+        btn.clicked.connect(lambda _, k=key: on_pick(k))
+        grid.addWidget(btn, row, col)
+    grid.setRowStretch(grid.rowCount(), 1)
+
+
+# ───────── sequence editor items ─────────
+TOKEN_ROLE = Qt.ItemDataRole.UserRole           # the step token, if not text()
+EXPANDED_ROLE = Qt.ItemDataRole.UserRole + 1
+
+def _is_repeat(token):
+    return token[:6].lower() == "repeat" and \
+        parse_step(token).kind is StepKind.REPEAT
+
+def _outline(token, depth=0):
+    step = parse_step(token)
+    lines = [f"{'    ' * depth}▾ Repeat {step.value}"]
+    for t in step.body:
+        if _is_repeat(t):
+            lines += _outline(t, depth + 1)
+        else:
+            lines.append(f"{'    ' * (depth + 1)}{t}")
+    return lines
+
+def set_seq_token(item, token, expanded=False):
+    """Show ``token`` on a sequence item; repeats collapse to one line."""
+    item.setData(TOKEN_ROLE, token)
+    item.setData(EXPANDED_ROLE, expanded)
+    if not _is_repeat(token):
+        item.setText(token)
+    elif expanded:
+        item.setText("\n".join(_outline(token)))
+    else:
+        step = parse_step(token)
+        body = ", ".join(map(step_label, step.body))
+        item.setText(f"▸ Repeat {step.value} × {{{body}}}")
+    return item
+
+def seq_item(token):
+    return set_seq_token(QListWidgetItem(), token)
+
+def seq_token(item) -> str:
+    return item.data(TOKEN_ROLE) or item.text()
+
+def toggle_seq_item(item):
+    """Expand or collapse a repeat item (other items are left alone)."""
+    token = seq_token(item)
+    if _is_repeat(token):
+        set_seq_token(item, token, not item.data(EXPANDED_ROLE))
+
+
+# ───────── runtime profiles ─────────
+def runtime_combo(none_label, labels=None, parent=None):
+    """Combo box over :data:`~pyahk.runtime.RUNTIME_PROFILES`.
+
+    ``currentData()`` is the profile key, or "" for the ``none_label`` entry;
+    ``labels`` optionally maps keys to translated names.
+    """
+    combo = QComboBox(parent)
+    combo.addItem(none_label, "")
+    for key, rt in RUNTIME_PROFILES.items():
+        combo.addItem((labels or {}).get(key, rt.label), key)
+    return combo
+
+
+# ───────── background processes ─────────
+class ProcessRunner(QObject):
+    """:class:`~pyahk.compiler.ProcessJob` with Qt signals.
+
+    The job's callbacks fire on worker threads; emitting them as signals
+    queues them onto the GUI thread, so slots may touch widgets freely.
+    """
+    progress = pyqtSignal(str)
+    finished = pyqtSignal(object)       # ProcessResult
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.job = None
+
+    def start(self, args, timeout=None, cwd=None, capture=True):
+        self.job = ProcessJob(args, self.progress.emit, self.finished.emit,
+                              timeout=timeout, cwd=cwd, capture=capture).start()
+
+    def cancel(self):
+        if self.job is not None:
+            self.job.cancel()
+
+    def is_running(self):
+        return self.job is not None and not self.job.done
+
+def run_with_progress(parent, args, label, on_done, cancel_text="Cancel",
+                      timeout=None, capture=True):
+    """Run ``args`` in the background behind a non-modal, cancellable
+    progress dialog; ``on_done(result)`` runs on the GUI thread."""
+    dlg = QProgressDialog(label, cancel_text, 0, 0, parent)
+    dlg.setWindowTitle(parent.windowTitle())
+    dlg.setMinimumDuration(0)
+    runner = ProcessRunner(parent)
+    runner.progress.connect(lambda line: line and dlg.setLabelText(f"{label}\n{line}"))
+    dlg.canceled.connect(runner.cancel)
+
+    def finished(result):
+        dlg.canceled.disconnect(runner.cancel)
+        dlg.close()
+        dlg.deleteLater()
+        runner.deleteLater()
+        on_done(result)
+
+    runner.finished.connect(finished)
+    runner.start(args, timeout=timeout, capture=capture)
+    dlg.show()
+    return runner
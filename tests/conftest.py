@@ -0,0 +1,81 @@
+import json
+import os
+import stat
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from pyahk.engine import Mapping, Profile
+
+FAKE_AHK2EXE = '''\
+import pathlib, sys, time
+args = sys.argv[1:]
+src, out = args[args.index("/in") + 1], args[args.index("/out") + 1]
+here = pathlib.Path(__file__).parent
+with open(here / "calls.log", "a", encoding="utf-8") as fh:
+    fh.write(src + "\\n")
+hang = here / "hang"
+if hang.exists() and int(hang.read_text()) > 0:
+    hang.write_text(str(int(hang.read_text()) - 1))
+    time.sleep(60)
+pathlib.Path(out).write_bytes(b"MZ" + pathlib.Path(src).read_bytes())
+'''
+
+
+class FakeCompiler:
+    """An Ahk2Exe stand-in that logs every run; ``hang(n)`` makes the next
+    ``n`` runs sleep until killed."""
+    def __init__(self, root):
+        root.mkdir()
+        self.root = root
+        self.path = root / "Ahk2Exe"
+        self.path.write_text(f"#!{sys.executable}\n{FAKE_AHK2EXE}", encoding="utf-8")
+        self.path.chmod(self.path.stat().st_mode | stat.S_IEXEC)
+
+    @property
+    def calls(self) -> int:
+        log = self.root / "calls.log"
+        return len(log.read_text().splitlines()) if log.exists() else 0
+
+    def hang(self, n):
+        (self.root / "hang").write_text(str(n))
+
+
+@pytest.fixture
+def fake_ahk2exe(tmp_path):
+    if sys.platform == "win32":
+        pytest.skip("the fake compiler is a shebang script")
+    return FakeCompiler(tmp_path / "compiler")
+
+
+@pytest.fixture
+def write_profile():
+    """``write(path, *steps)``: a one-mapping profile JSON at ``path``."""
+    def write(path, *steps):
+        profile = Profile(maps=[Mapping("F1", steps or ("A",))])
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(profile.to_dict()), encoding="utf-8")
+        return path
+    return write
+
+
+GOLDEN = Path(__file__).resolve().parent / "golden"
+
+
+@pytest.fixture
+def golden():
+    """``check(name, text)``: compare with ``tests/golden/<name>``.
+
+    ``PYAHK_UPDATE_GOLDEN=1`` rewrites the files instead; review the diff.
+    """
+    def check(name, text):
+        path = GOLDEN / name
+        if os.environ.get("PYAHK_UPDATE_GOLDEN"):
+            path.parent.mkdir(exist_ok=True)
+            path.write_text(text, encoding="utf-8", newline="\n")
+        assert text == path.read_text(encoding="utf-8")
+    return check
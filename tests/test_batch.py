@@ -0,0 +1,57 @@
+import os
+
+from pyahk import batch
+from pyahk.batch import compile_one, compile_profiles, stem_clashes
+from pyahk.cli import main as cli
+
+
+def test_a_timed_out_run_is_retried(tmp_path, fake_ahk2exe, write_profile, monkeypatch):
+    monkeypatch.setattr(batch, "RETRY_BACKOFF", 0.01)
+    src = write_profile(tmp_path / "keymap.json")
+    fake_ahk2exe.hang(1)
+    rep = compile_one(src, tmp_path / "out", fake_ahk2exe.path, timeout=2, retries=2)
+    assert rep.ok and rep.attempts == 2 and fake_ahk2exe.calls == 2
+    assert (tmp_path / "out" / "keymap.exe").read_bytes().startswith(b"MZ")
+
+
+def test_retries_give_up_after_the_last_attempt(tmp_path, fake_ahk2exe,
+                                                write_profile, monkeypatch):
+    monkeypatch.setattr(batch, "RETRY_BACKOFF", 0.01)
+    src = write_profile(tmp_path / "keymap.json")
+    fake_ahk2exe.hang(5)
+    rep = compile_one(src, tmp_path / "out", fake_ahk2exe.path, timeout=0.5, retries=1)
+    assert not rep.ok and rep.attempts == 2 and fake_ahk2exe.calls == 2
+    assert rep.error.startswith("Timed out")
+
+
+def test_relative_output_dir(tmp_path, fake_ahk2exe, write_profile, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_profile(tmp_path / "keymap.json")
+    rep = compile_one("keymap.json", "out", fake_ahk2exe.path, timeout=30)
+    assert rep.ok and (tmp_path / "out" / "keymap.exe").exists()
+
+
+def test_stem_clashes():
+    assert stem_clashes(["a/x.json", "b/y.json", "b/x.json", "c/X.pyahk"]) == \
+        [None, None, "a/x.json", "a/x.json"]
+
+
+def test_same_stem_in_one_batch_fails_instead_of_overwriting(
+        tmp_path, fake_ahk2exe, write_profile):
+    a = write_profile(tmp_path / "a" / "x.json", "Ctrl+C")
+    b = write_profile(tmp_path / "b" / "x.json", "Ctrl+V")
+    reports = compile_profiles([a, b], tmp_path / "out", fake_ahk2exe.path,
+                               workers=2, timeout=30)
+    assert [r.ok for r in reports] == [True, False]
+    assert str(a) in reports[1].error
+    assert fake_ahk2exe.calls == 1
+
+
+def test_build_reports_same_stem_sources(tmp_path, write_profile, capsys):
+    a = write_profile(tmp_path / "a" / "x.json", "Ctrl+C")
+    b = write_profile(tmp_path / "b" / "x.json", "Ctrl+V")
+    out = tmp_path / "out"
+    assert cli(["build", str(a), str(b), "-o", str(out), "-j", "1"]) == 1
+    assert os.listdir(out) == ["x.ahk"]
+    assert "^c" in (out / "x.ahk").read_text(encoding="utf-8")
+    assert f"FAIL {b}" in capsys.readouterr().err
@@ -0,0 +1,80 @@
+import os
+import shutil
+
+from pyahk.batch import compile_one
+from pyahk.cache import CompileCache, cache_key
+
+
+def build(src, out, compiler, cache, base=None):
+    return compile_one(src, out, compiler, base, cache, timeout=30, retries=0)
+
+
+def test_hit_miss_and_invalidation(tmp_path, fake_ahk2exe, write_profile):
+    cache = CompileCache(tmp_path / "cache")
+    src = write_profile(tmp_path / "keymap.json", "Ctrl+C")
+    out = tmp_path / "out"
+    out.mkdir()
+    compiler = fake_ahk2exe.path
+
+    first = build(src, out, compiler, cache)
+    assert first.ok and not first.cached and fake_ahk2exe.calls == 1
+    again = build(src, out, compiler, cache)
+    assert again.ok and again.cached and fake_ahk2exe.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert (out / "keymap.exe").read_bytes().startswith(b"MZ")
+
+    # script change
+    write_profile(src, "Ctrl+V")
+    assert not build(src, out, compiler, cache).cached
+    assert fake_ahk2exe.calls == 2
+
+    # compiler mtime change
+    st = compiler.stat()
+    os.utime(compiler, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert not build(src, out, compiler, cache).cached
+    assert fake_ahk2exe.calls == 3
+
+    # compiler path change (same bytes elsewhere)
+    moved = fake_ahk2exe.root / "Ahk2Exe-copy"
+    shutil.copy2(compiler, moved)
+    assert not build(src, out, moved, cache).cached
+    assert fake_ahk2exe.calls == 4
+
+    # base binary identity is part of the key too
+    base = tmp_path / "AutoHotkey64.exe"
+    base.write_bytes(b"base")
+    assert not build(src, out, compiler, cache, base).cached
+    assert build(src, out, compiler, cache, base).cached
+    assert fake_ahk2exe.calls == 5
+
+
+def test_lru_eviction_keeps_recently_used_entries(tmp_path):
+    cache = CompileCache(tmp_path / "cache", max_bytes=3 * 100)
+    artifact = tmp_path / "a.exe"
+    artifact.write_bytes(b"x" * 100)
+    for i, key in enumerate("abc"):
+        cache.put(key, artifact)
+        os.utime(cache._entry(key), ns=(i * 10 ** 9, i * 10 ** 9))
+    assert cache.get("a", tmp_path / "copy.exe")      # a is now the newest
+    cache.put("d", artifact)
+    assert sorted(p.stem for p in cache.root.glob("*.exe")) == ["a", "c", "d"]
+
+
+def test_unreadable_or_locked_destination_is_a_miss(tmp_path):
+    cache = CompileCache(tmp_path / "cache")
+    artifact = tmp_path / "a.exe"
+    artifact.write_bytes(b"MZ")
+    cache.put("k", artifact)
+    blocked = tmp_path / "dest.exe"
+    blocked.mkdir()                                     # can't be overwritten
+    assert cache.get("k", blocked) is False
+    assert cache.get("missing", tmp_path / "x.exe") is False
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_key_depends_on_script_bytes(tmp_path):
+    script = tmp_path / "s.ahk"
+    script.write_text("F1::Send 'a'")
+    key = cache_key(script, "Ahk2Exe.exe")
+    script.write_text("F1::Send 'b'")
+    assert cache_key(script, "Ahk2Exe.exe") != key
@@ -0,0 +1,85 @@
+"""ProcessJob against a stub compiler: a Python one-liner per behaviour."""
+import sys
+import time
+
+from pyahk.compiler import ProcessJob, compile_command
+
+
+def stub(code):
+    return [sys.executable, "-c", code]
+
+
+def test_success_streams_progress_and_captures_output():
+    lines, finished = [], []
+    job = ProcessJob(stub("print('step 1'); print('step 2', flush=True)"),
+                     on_progress=lines.append, on_finished=finished.append).start()
+    result = job.wait(30)
+    assert job.done and result.ok and result.returncode == 0
+    assert lines == ["step 1", "step 2"]
+    assert result.stdout == "step 1\nstep 2\n"
+    assert finished == [result]
+
+
+def test_nonzero_exit_reports_stderr():
+    code = "import sys; sys.stderr.write('syntax error\\n'); sys.exit(3)"
+    result = ProcessJob(stub(code)).start().wait(30)
+    assert not result.ok and result.returncode == 3
+    assert result.error_text() == "syntax error"
+
+
+def test_cancel_kills_a_running_process():
+    started = []
+    job = ProcessJob(stub("print('go', flush=True); import time; time.sleep(60)"),
+                     on_progress=started.append).start()
+    deadline = time.monotonic() + 30
+    while not started and time.monotonic() < deadline:
+        time.sleep(0.01)
+    t0 = time.monotonic()
+    job.cancel()
+    result = job.wait(30)
+    assert result.cancelled and not result.ok
+    assert time.monotonic() - t0 < 10
+    assert result.error_text() == "Cancelled."
+
+
+def test_cancel_before_start_never_runs():
+    job = ProcessJob(stub("raise SystemExit(1)"))
+    job.cancel()
+    result = job.start().wait(30)
+    assert result.cancelled and result.returncode is None
+
+
+def test_timeout_kills_the_process():
+    result = ProcessJob(stub("import time; time.sleep(60)"), timeout=0.5).start().wait(30)
+    assert result.timed_out and not result.ok
+    assert 0.5 <= result.elapsed < 10
+    assert result.error_text().startswith("Timed out")
+
+
+def test_missing_executable_is_a_failed_start():
+    result = ProcessJob(["/nonexistent/Ahk2Exe.exe"]).start().wait(30)
+    assert result.returncode is None and not result.ok
+    assert result.error_text()
+
+
+def test_compile_command_passes_bin_only_when_known():
+    assert compile_command("a.exe", "s.ahk", "s.exe") == \
+        ["a.exe", "/in", "s.ahk", "/out", "s.exe"]
+    assert compile_command("a.exe", "s.ahk", "s.exe", "b.exe")[-2:] == ["/bin", "b.exe"]
+
+
+def test_a_child_holding_the_pipes_does_not_block_completion():
+    # like the installer, which leaves Ahk2Exe's window running
+    code = ("import subprocess, sys; print('installed', flush=True); "
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])")
+    t0 = time.monotonic()
+    result = ProcessJob(stub(code)).start().wait(30)
+    assert result.ok and result.stdout == "installed\n"
+    assert time.monotonic() - t0 < 10
+
+
+def test_uncaptured_output_is_not_read():
+    lines = []
+    result = ProcessJob(stub("print('hidden')"), on_progress=lines.append,
+                        capture=False).start().wait(30)
+    assert result.ok and result.stdout == "" and lines == []
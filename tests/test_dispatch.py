@@ -0,0 +1,38 @@
+import re
+
+from pyahk.dispatch import decode_op, encode_op
+from pyahk.engine import Mapping, Profile, render_script
+from pyahk.steps import repeat_token
+
+_AHK_ESCAPES = {"t": "\t", "n": "\n", "r": "\r"}
+
+
+def table_rows(script):
+    """Rows of ``KeyMapTable`` as the AHK runtime sees them, split on tabs."""
+    lines = script.split("\n")
+    section = lines[lines.index("(RTrim0") + 1:lines.index(')"')]
+    rows = []
+    for line in section:
+        line = re.sub(r"`(.)", lambda m: _AHK_ESCAPES.get(m[1], m[1]), line)
+        rows.append(line.split("\t"))
+    return rows
+
+
+def test_separators_in_text_survive_the_row_format():
+    texts = ["a\tb", "line 1\nline 2\r\n", "100%09 literal\t", 'say "hi" `now`']
+    maps = [Mapping(f"F{i + 1}", (f'"{t}"', "Enter")) for i, t in enumerate(texts)]
+    maps.append(Mapping("F9", (repeat_token(2, ['"x\ty"', "Tab"]), "0.1 s")))
+    script = render_script(Profile(maps=maps, layout="table", optimize=False))
+    rows = table_rows(script)
+    assert len(rows) == len(maps)
+    for (hk, *ops), t in zip(rows, texts):
+        assert [decode_op(op) for op in ops] == [f"t{t}", "s{Enter}"]
+    hk, *ops = rows[-1]
+    assert hk == "f9" and [decode_op(op) for op in ops] == \
+        ["l2:2", "tx\ty", "s{Tab}", "w100"]
+
+
+def test_plain_ops_are_left_alone():
+    assert encode_op("thello 100%") == "thello 100%"
+    assert encode_op("ta\tb%") == "eta%09b%25"
+    assert decode_op("eta%09b%25") == "ta\tb%" and decode_op("t%09") == "t%09"
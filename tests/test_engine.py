@@ -0,0 +1,43 @@
+import io
+
+import pytest
+
+from pyahk.chunked import render_chunked
+from pyahk.dispatch import render_entry
+from pyahk.engine import (
+    Mapping, Profile, body_lines, render_mapping, render_script, save_script,
+    script_size, write_script,
+)
+
+MEMOS = (render_mapping, body_lines, render_entry, render_chunked)
+STEPS = ("Ctrl+C", "0.1 s", '"hello"', "Enter", "Click x2", "Alt+Tab")
+
+
+def profile(**options):
+    maps = [Mapping(f"SC{i + 1:03X}", STEPS[i % 3:i % 3 + 3 + i % 4],
+                    "game" if i % 5 == 0 else "", i % 7 == 0)
+            for i in range(300)]
+    return Profile(maps=maps, toggle="F12", info="F11", **options)
+
+
+@pytest.mark.parametrize("options", [
+    {}, {"optimize": False}, {"dedup": "exact"}, {"dedup": "prefix"},
+    {"layout": "table"}, {"paste_threshold": 3},
+])
+def test_streaming_matches_render_and_keeps_no_blocks(options):
+    p = profile(**options)
+    for memo in MEMOS:
+        memo.cache_clear()
+    buf = io.StringIO()
+    write_script(p, buf, chunk_size=256)
+    assert all(memo.cache_info().currsize == 0 for memo in MEMOS)
+    assert buf.getvalue() == render_script(p)
+    assert script_size(p) == len(buf.getvalue().encode("utf-8"))
+
+
+def test_save_script_writes_the_rendered_text(tmp_path):
+    p = profile(dedup="exact")
+    out = tmp_path / "keymap.ahk"
+    save_script(p, out)
+    assert out.read_text(encoding="utf-8") == render_script(p)
+    assert not list(tmp_path.glob("*.tmp"))
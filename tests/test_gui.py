@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtWidgets import QApplication, QFileDialog, QMessageBox
+
+import main
+import main_zhcn
+from pyahk.engine import Mapping, Profile
+from pyahk.project import save_project
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+@pytest.fixture(params=[main, main_zhcn], ids=lambda m: m.__name__)
+def window(request, qapp, monkeypatch):
+    warnings = []
+    monkeypatch.setattr(QMessageBox, "warning", lambda *a: warnings.append(a[-1]))
+    w = request.param.KeyMapper()
+    w.warnings = warnings
+    yield w
+    w.script.wait()
+    w.deleteLater()
+
+
+def open_file(window, path, monkeypatch):
+    monkeypatch.setattr(QFileDialog, "getOpenFileName", lambda *a: (str(path), ""))
+    window.open_project()
+    window.script.wait()
+
+
+@pytest.mark.parametrize("bad", [
+    {"trigger": "F2", "steps": ["Repeat 2 [oops]"]},
+    {"trigger": "F2", "steps": [3]},
+    {"trigger": "f1", "steps": ["B"]},
+])
+def test_bad_project_leaves_the_window_alone(window, tmp_path, monkeypatch, bad):
+    good = tmp_path / "good.pyahk"
+    save_project(Profile(maps=[Mapping("F5", ("A",))], toggle="F11"), good)
+    open_file(window, good, monkeypatch)
+    before = window._profile()
+
+    path = tmp_path / "bad.pyahk"
+    path.write_text(json.dumps({"format": "pyahk-project", "version": 1, "toggle": "F12",
+                                "maps": [{"trigger": "F1", "steps": ["A"]}, bad]}))
+    open_file(window, path, monkeypatch)
+    assert len(window.warnings) == 1
+    assert window._profile() == before
+    model = window.mapmodel
+    assert [model.data(model.index(r)) for r in range(model.rowCount())]
+
+
+def test_unknown_launch_keys_are_reported(window, tmp_path, monkeypatch):
+    path = tmp_path / "odd.pyahk"
+    path.write_text(json.dumps({"format": "pyahk-project", "version": 1,
+                                "launch": [{"path": "a.exe", "colour": "red"}],
+                                "maps": []}))
+    open_file(window, path, monkeypatch)
+    assert len(window.warnings) == 1
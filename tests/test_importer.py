@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from pyahk.cli import main as cli
+from pyahk.engine import LAYOUTS, Mapping, Profile, render_script, save_script
+from pyahk.importer import import_script, parse_script
+from pyahk.project import load_profile
+from pyahk.steps import repeat_token
+
+MAPS = [
+    Mapping("F1", ('"a  b \t c"', "Ctrl+Shift+Enter", "0.25 s")),
+    Mapping("F2", ('"line 1\nline 2\r\n100%0A"', "Click x2"), "game"),
+    Mapping("SC1F5", (repeat_token(3, ['"p\tq"', "Tab"]), '"say "hi" `now`"')),
+]
+
+
+@pytest.mark.parametrize("layout", LAYOUTS)
+def test_round_trip(layout):
+    profile = Profile(maps=MAPS, toggle="F12", info="F11", optimize=False,
+                      layout=layout, paste_threshold=8)
+    imported, skipped = parse_script(render_script(profile).splitlines(True))
+    assert skipped == []
+    assert imported.maps == MAPS
+    assert (imported.toggle, imported.info) == ("F12", "F11")
+
+
+def test_hand_written_lines_are_reported():
+    script = ["#SingleInstance Force\n", "F1::Send \"^c\"\n", "x := 1\n",
+              "F2::MsgBox(\"hi\")\n"]
+    profile, skipped = parse_script(script)
+    assert profile.maps == [Mapping("F1", ("Ctrl+C",))]
+    assert sorted({s.line for s in skipped}) == [1, 3, 4]
+
+
+def test_import_reports_same_stem_scripts(tmp_path, capsys):
+    a, b = tmp_path / "a" / "x.ahk", tmp_path / "b" / "x.ahk"
+    for path, key in ((a, "Ctrl+C"), (b, "Ctrl+V")):
+        path.parent.mkdir()
+        save_script(Profile(maps=[Mapping("F1", (key,))]), path)
+    out = tmp_path / "out"
+    assert cli(["import", str(a), str(b), "-o", str(out), "-j", "1"]) == 1
+    assert os.listdir(out) == ["x.pyahk"]
+    assert load_profile(out / "x.pyahk").maps == [Mapping("F1", ("Ctrl+C",))]
+    assert f"x.pyahk is already imported from {a}" in capsys.readouterr().err
+    assert import_script(b)[0].maps == [Mapping("F1", ("Ctrl+V",))]
+
+
+def test_typed_text_longer_than_pasted_text_stays_typed():
+    script = ['F1:: PasteText("0123456789")\n',
+              'F2:: SendText "abcdefghijklmnopqrstuvwxyzABCDEFGH"\n']
+    profile, skipped = parse_script(script)
+    assert skipped == []
+    assert profile.maps[1].steps == ('"abcdefghijklmnopqrstuvwxyzABCDEFGH"',)
+    assert profile.paste_threshold == 0
+    assert 'f2:: SendText "abcdefghijklmnopqrstuvwxyzABCDEFGH"' in render_script(profile)
+
+
+def test_typed_text_the_optimizer_would_join_is_kept_apart():
+    script = ['F1:: PasteText("0123456789")\n',
+              'F2:: {\n', '    SendText "abcdef"\n', '    SendText "ghijk"\n', '}\n']
+    profile, skipped = parse_script(script)
+    assert (profile.paste_threshold, profile.optimize) == (9, False)
+    assert profile.maps[1].steps == ('"abcdef"', '"ghijk"')
+    assert "PasteText(\"abcdef" not in render_script(profile)
+    imported, _ = parse_script(render_script(profile).splitlines(True))
+    assert imported.maps == profile.maps
+
+
+def test_hand_written_helper_is_reported():
+    script = ['F1:: PasteText("0123456789")\n',
+              'PasteText(text) {\n', '    MsgBox(text)\n', '}\n']
+    profile, skipped = parse_script(script)
+    assert [(s.line, s.text) for s in skipped] == [(2, "PasteText()")]
+    assert profile.maps == [Mapping("F1", ('"0123456789"',))]
+
+
+def test_exe_path_round_trip():
+    profile = Profile(maps=[Mapping("F1", ("A",))], exe_path=r"C:\Tools\a b.exe",
+                      exe_params="-q --x", exe_delay=1.5)
+    imported, skipped = parse_script(render_script(profile).splitlines(True))
+    assert skipped == []
+    assert (imported.exe_path, imported.exe_params, imported.exe_delay) == \
+        (profile.exe_path, profile.exe_params, profile.exe_delay)
@@ -0,0 +1,59 @@
+import pytest
+
+from pyahk.engine import Profile, header_lines
+from pyahk.launcher import WAIT_FILE, Launch, launch_levels, launch_lines
+
+EDITOR = r"C:\Tools\editor.exe"
+CASES = {
+    # one level, every wait condition and fallback
+    "waits": [
+        Launch(EDITOR, "--new", delay=0.5),
+        Launch(EDITOR, wait="process", name="proc", delay=0.25),
+        Launch(EDITOR, wait="window", target="Editor ahk_class Main",
+               name="win", timeout=5, fallback="exit"),
+        Launch(r"C:\Tools\server.exe", wait="process", name="bare"),
+    ],
+    # three levels, the file wait needs WAIT_FILE
+    "levels": [
+        Launch(r"C:\Tools\client.exe", wait="window", after=("server.exe",)),
+        Launch(r"C:\Tools\server.exe", "-p 80", wait="file",
+               target=r"C:\Tools\ready.flag", timeout=2.5),
+        Launch(r"C:\Tools\db.exe", wait="process", delay=1),
+        Launch(r"C:\Tools\ui.exe", after=("client.exe", "db.exe")),
+    ],
+}
+
+
+@pytest.mark.parametrize("case", sorted(CASES))
+def test_launch_lines_golden(case, golden):
+    golden(f"launch_{case}.ahk", "\n".join(launch_lines(CASES[case])))
+
+
+def test_wait_file_only_when_needed():
+    assert WAIT_FILE[1] not in launch_lines(CASES["waits"])
+    assert launch_lines(CASES["levels"])[-len(WAIT_FILE) - 1:-1] == list(WAIT_FILE)
+    assert launch_lines([]) == []
+
+
+def test_levels_keep_input_order():
+    levels = launch_levels(CASES["levels"])
+    assert [[l.path.split("\\")[-1] for l in level] for level in levels] == \
+        [["server.exe", "db.exe"], ["client.exe"], ["ui.exe"]]
+
+
+@pytest.mark.parametrize("launches", [
+    [Launch("a.exe"), Launch("a.exe")],
+    [Launch("a.exe", after=("b.exe",))],
+    [Launch("a.exe", after=("b.exe",)), Launch("b.exe", after=("a.exe",))],
+    [Launch("a.exe", wait="socket")],
+    [Launch("a.exe", fallback="retry")],
+])
+def test_bad_launches_are_errors(launches):
+    with pytest.raises(ValueError):
+        launch_levels(launches)
+
+
+def test_exe_path_is_a_launch_without_a_wait(golden):
+    profile = Profile(maps=[], exe_path=EDITOR, exe_params="--new", exe_delay=1.5,
+                      launch=CASES["levels"][1:3])
+    golden("launch_exe_path.ahk", "\n".join(header_lines(profile)))
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+
+from pyahk.engine import Mapping, Profile
+from pyahk.launcher import Launch
+from pyahk.project import load_profile, read_project, save_project
+from pyahk.steps import repeat_token
+
+
+def profile():
+    return Profile(maps=[Mapping("F1", ("Ctrl+C", "0.1 s")),
+                         Mapping("F2", (repeat_token(2, ['"hi"', "Tab"]),), "game", True)],
+                   toggle="F12", paste_threshold=5,
+                   launch=[Launch("a.exe", wait="process", after=())])
+
+
+@pytest.mark.parametrize("suffix", [".pyahk", ".pyahkb"])
+def test_round_trip(tmp_path, suffix):
+    path = tmp_path / f"keymap{suffix}"
+    save_project(profile(), path)
+    settings, maps = read_project(path)
+    assert isinstance(maps, list) and maps == list(profile().maps)
+    assert load_profile(path) == profile()
+
+
+@pytest.mark.parametrize("maps", [
+    [{"trigger": "F1", "steps": ["A"]}, {"trigger": "F2", "steps": ["Repeat 2 [oops]"]}],
+    [{"trigger": "F1", "steps": [repeat_token(2, ["A", "Repeat 3 [1]"])]}],
+    [{"trigger": "F1", "steps": ["A"]}, {"trigger": "F2", "steps": [3]}],
+    [{"trigger": "F1", "steps": ["A"]}, {"steps": ["A"]}],
+    [{"trigger": "F1", "steps": ["A"]}, {"trigger": "f1", "steps": ["B"]}],
+    [{"trigger": "F1", "steps": ["A"]}, {"trigger": "F2", "steps": ["B"], "runtime": 1}],
+])
+def test_bad_mappings_fail_the_whole_file(tmp_path, maps):
+    path = tmp_path / "bad.pyahk"
+    path.write_text(json.dumps({"format": "pyahk-project", "version": 1,
+                                "toggle": "F12", "maps": maps}))
+    with pytest.raises(ValueError):
+        read_project(path)
+
+
+def test_corrupt_binary(tmp_path):
+    path = tmp_path / "keymap.pyahkb"
+    save_project(profile(), path)
+    data = path.read_bytes()
+    for bad in (data[:10], data[:-8]):
+        path.write_bytes(bad)
+        with pytest.raises(ValueError):
+            read_project(path)
@@ -0,0 +1,24 @@
+import pytest
+
+from pyahk.engine import Mapping, Profile, render_script
+from pyahk.runtime import RUNTIME_PROFILES, runtime_header, thread_settings
+
+
+@pytest.mark.parametrize("name", sorted(RUNTIME_PROFILES))
+def test_header_golden(name, golden):
+    other = "compatible" if name != "compatible" else "game"
+    profile = Profile(maps=[Mapping("F1", ("Ctrl+C", "0.1 s")),
+                            Mapping("F2", ("A",), runtime=other)],
+                      toggle="F12", runtime=name)
+    golden(f"runtime_{name}.ahk", render_script(profile) + "\n")
+
+
+def test_no_profile_emits_nothing():
+    assert runtime_header("") == [] and thread_settings("") == []
+    script = render_script(Profile(maps=[Mapping("F1", ("A",))]))
+    assert "SendMode" not in script and "#SingleInstance" not in script
+
+
+def test_unknown_profile_is_an_error():
+    with pytest.raises(ValueError):
+        runtime_header("turbo")
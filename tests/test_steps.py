@@ -0,0 +1,69 @@
+import pytest
+
+from pyahk.engine import LAYOUTS, Mapping, Profile, render_script
+from pyahk.steps import (ahk_escape, ahk_string, parse_step, repeat_token,
+                         send_escape, step_label, step_to_ahk, to_ahk_step)
+
+
+def test_step_label_spells_out_repeats():
+    token = repeat_token(2, ['"hi"', repeat_token(3, ["Tab"])])
+    assert step_label(token) == 'Repeat 2 {"hi", Repeat 3 {Tab}}'
+    assert step_label(token, quotes=False) == "Repeat 2 {hi, Repeat 3 {Tab}}"
+
+
+def test_step_label_leaves_non_repeats_alone():
+    assert step_label("Repeat 2 [oops") == "Repeat 2 [oops"
+    assert step_label('"repeat after me"', quotes=False) == "repeat after me"
+
+
+def test_ahk_escape_quotes_and_backticks():
+    assert ahk_escape('say "hi" `now`') == 'say `"hi`" ``now``'
+    assert ahk_string("") == '""'
+    assert ahk_escape("a\r\nb\t{c}") == "a`r`nb\t{c}"
+
+
+def test_send_escape_braces_and_modifier_symbols():
+    assert send_escape("a+b^c!d#e{f}") == "a{+}b{^}c{!}d{#}e{{}f{}}"
+    assert send_escape('plain "text"') == 'plain "text"'
+
+
+@pytest.mark.parametrize("text, line", [
+    ('say "hi"', 'SendText "say `"hi`""'),
+    ("`back`", 'SendText "``back``"'),
+    ("{Enter}", 'SendText "{Enter}"'),
+    ("two\nlines", 'SendText "two`nlines"'),
+    ("", 'SendText ""'),
+])
+def test_text_steps_are_typed_literally(text, line):
+    assert to_ahk_step(f'"{text}"') == line
+
+
+def test_text_over_the_paste_threshold_is_pasted():
+    short, long = '"0123456789"', '"0123456789`"x"'
+    assert step_to_ahk(parse_step(short), paste=10) == 'SendText "0123456789"'
+    assert step_to_ahk(parse_step(long), paste=10) == \
+        'PasteText("0123456789```"x")'
+    assert step_to_ahk(parse_step(long)) == 'SendText "0123456789```"x"'
+
+
+def test_paste_helper_only_with_a_threshold():
+    maps = [Mapping("F1", ('"a long line of text"', "Enter"))]
+    for layout in LAYOUTS:
+        plain = render_script(Profile(maps=maps, layout=layout))
+        pasted = render_script(Profile(maps=maps, layout=layout, paste_threshold=5))
+        assert "PasteText" not in plain
+        assert pasted.count("PasteText(text) {") == 1
+    assert 'f1::\n{\n    PasteText("a long line of text")\n    Send "{Enter}"\n}' \
+        in render_script(Profile(maps=maps, paste_threshold=5))
+
+
+def test_merged_text_is_brace_escaped():
+    script = render_script(Profile(maps=[Mapping("F1", ("Ctrl+A", '"a+b{c}"', "Enter"))]))
+    assert 'f1:: Send "^aa{+}b{{}c{}}{Enter}"' in script
+
+
+def test_repeats_are_blocks_not_statements():
+    token = repeat_token(3, ["A", "0.1 s"])
+    assert to_ahk_step(token) == 'Loop 3 {\n    Send "a"\n    Sleep 100\n}'
+    with pytest.raises(ValueError):
+        step_to_ahk(parse_step(token))
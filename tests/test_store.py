@@ -0,0 +1,54 @@
+import pytest
+
+from pyahk.engine import Mapping
+from pyahk.store import MappingStore
+
+
+def maps(*triggers):
+    return [Mapping(t, ("A",)) for t in triggers]
+
+
+def test_order_and_ids_survive_inserts_and_moves():
+    store = MappingStore(maps("F1", "F2", "F3"))
+    mid = store.insert(1, Mapping("F4", ("B",)))
+    assert [m.trigger for m in store] == ["F1", "F4", "F2", "F3"]
+    store.move(mid, 3)
+    assert [m.trigger for m in store] == ["F1", "F2", "F3", "F4"]
+    assert store.index_of(mid) == 3 and store.id_at(3) == mid
+
+
+def test_extend_is_all_or_nothing_when_the_source_fails():
+    store = MappingStore(maps("F1", "F2"))
+
+    def source():
+        yield Mapping("F3", ("A",))
+        raise RuntimeError("read error")
+
+    with pytest.raises(RuntimeError):
+        store.extend(source())
+    assert len(store) == 2 and list(store.ids()) == [1, 2]
+    assert store.find("F3") is None
+    assert [store[i].trigger for i in range(len(store))] == ["F1", "F2"]
+
+
+def test_duplicate_triggers_are_rejected_in_any_spelling():
+    store = MappingStore(maps("Ctrl+A"))
+    with pytest.raises(ValueError):
+        store.append(Mapping("^a", ("B",)))
+    with pytest.raises(ValueError):
+        store.extend(maps("F5", "ctrl-a"))
+    with pytest.raises(ValueError):
+        MappingStore(maps("F1", "f1"))
+    assert len(store) == 1 and store.find("F5") is None
+
+
+def test_replace_keeps_the_index_consistent():
+    store = MappingStore(maps("F1", "F2"))
+    with pytest.raises(ValueError):
+        store.replace(1, Mapping("F2", ("B",)))
+    assert store.find("F1") == 1 and store.find("F2") == 2
+    store.replace(1, Mapping("F9", ("B",)))
+    assert store.find("F1") is None and store.find("F9") == 1
+    store.remove(2)
+    assert store.find("F2") is None
+    assert store.append(Mapping("F2", ("C",))) == 3
@@ -0,0 +1,53 @@
+import threading
+
+import pytest
+
+pytest.importorskip("PyQt6")
+
+from PyQt6.QtWidgets import QApplication
+
+from pyahk.widgets import JobCancelled, LatestJob
+
+
+@pytest.fixture(scope="module")
+def qapp():
+    return QApplication.instance() or QApplication([])
+
+
+def test_only_the_newest_job_reports(qapp):
+    runner, results = LatestJob(), []
+    gate = threading.Event()
+
+    def slow(cancelled):
+        gate.wait(5)
+        if cancelled():
+            raise JobCancelled
+        return "stale"
+
+    runner.submit(slow, results.append)
+    for i in range(200):
+        runner.submit(lambda cancelled, i=i: i, results.append)
+        if i == 0:
+            gate.set()
+    runner.wait()
+    assert results == [199]
+    assert not runner.pending
+
+
+def test_superseded_jobs_are_kept_until_they_finish(qapp):
+    runner = LatestJob()
+    started, gate = threading.Event(), threading.Event()
+
+    def running(cancelled):
+        started.set()
+        gate.wait(5)
+        return cancelled()
+
+    runner.submit(running, lambda r: None)
+    started.wait(5)
+    first = runner._job
+    runner.submit(lambda cancelled: None, lambda r: None)
+    assert first in runner._live and first.cancelled
+    gate.set()
+    runner.wait()
+    assert not runner._live